@@ -0,0 +1,16 @@
+"""
+ARKHEION-X: package entry point.
+
+The agents are flat modules in modules/quant-engine. Importing this package
+puts that directory on sys.path (relative to the package, not the working
+directory) and nothing else: every agent is imported only when it starts
+(see cli.py).
+"""
+import os
+import sys
+
+__version__ = "0.2.0"
+
+MODULE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules", "quant-engine")
+if MODULE_DIR not in sys.path:
+    sys.path.insert(0, MODULE_DIR)
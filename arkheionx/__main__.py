@@ -0,0 +1,7 @@
+import sys
+
+from arkheionx.cli import main
+
+# Guarded: sharded mode's spawned worker processes import this module again.
+if __name__ == "__main__":
+    sys.exit(main())
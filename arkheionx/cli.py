@@ -0,0 +1,169 @@
+"""
+ARKHEION-X: Command Line Interface v1.0
+
+    arkheionx run all                      # every agent (what main.py always did)
+    arkheionx run correlator               # one agent, or any subset:
+    arkheionx run onchain offchain
+    arkheionx dashboard                    # streamlit run dashboard.py
+    arkheionx backfill --days 7            # the module CLIs: backfill, archive, migrate
+
+Agents are imported lazily: each agent's module (and with it web3, requests,
+pandas...) is imported on the agent's own thread when the supervisor starts
+it, so `arkheionx run correlator` never loads web3 and `arkheionx --help`
+loads no agent at all. Configuration is read once, by settings.py.
+
+Install with `pip install -e .` for the `arkheionx` command, or run
+`python -m arkheionx` from the repository root.
+"""
+import os
+import sys
+import signal
+import logging
+import argparse
+import importlib
+import threading
+import subprocess
+
+from arkheionx import MODULE_DIR, __version__
+
+# --- Configuration ---
+RUN_LOG_FORMAT = '%(asctime)s - [%(threadName)-16s] - %(levelname)s - %(message)s'
+
+# --- Agents (each imported on its own thread, when it starts) ---
+def onchain_agent(stop_event=None, ready_event=None):
+    import engine
+    if engine.USE_ASYNC_PATROL:
+        from async_engine import start_onchain_patrol_async
+        return start_onchain_patrol_async(stop_event=stop_event, ready_event=ready_event)
+    return engine.start_onchain_patrol(stop_event=stop_event, ready_event=ready_event)
+
+def offchain_agent(stop_event=None, ready_event=None):
+    from code_intel import start_offchain_patrol
+    return start_offchain_patrol(stop_event=stop_event, ready_event=ready_event)
+
+def correlator_agent(stop_event=None, ready_event=None):
+    from correlator import start_correlation_analysis
+    return start_correlation_analysis(stop_event=stop_event, ready_event=ready_event)
+
+def archiver_agent(stop_event=None, ready_event=None):
+    from archive import start_archiver
+    return start_archiver(stop_event=stop_event, ready_event=ready_event)
+
+def alerts_agent(stop_event=None, ready_event=None):
+    from alerts import start_alert_dispatcher
+    return start_alert_dispatcher(stop_event=stop_event, ready_event=ready_event)
+
+# Subcommand name -> (thread name, entry point).
+AGENTS = {
+    "onchain": ("OnChain-Agent", onchain_agent),
+    "offchain": ("OffChain-Agent", offchain_agent),
+    "correlator": ("Correlator-Agent", correlator_agent),
+    "archiver": ("Archiver", archiver_agent),
+    "alerts": ("Alert-Dispatcher", alerts_agent),
+}
+
+def run(names):
+    """Runs the named agents until Ctrl+C or SIGTERM. Returns the exit code."""
+    from settings import configure_logging, settings
+    configure_logging(RUN_LOG_FORMAT)
+    from database import persist_signal, shutdown_signal_sink
+    from signal_bus import bus
+    from supervisor import AgentSupervisor
+    from metrics import METRICS_PORT, start_metrics_server
+
+    logging.info(f"Initializing ARKHEION-X Unified Intelligence System ({', '.join(names)})...")
+
+    # Agents publish on the in-process signal bus; SQLite persistence is just one listener.
+    # The correlator subscribes to the bus itself when it starts.
+    bus.add_listener(persist_signal)
+
+    # Sharded mode: the agents run in worker processes and this process is their single writer.
+    onchain_shards = settings.onchain_shards if "onchain" in names else 0
+    offchain_shards = settings.offchain_shards if "offchain" in names else 0
+    shards = None
+    if onchain_shards or offchain_shards:
+        from sharding import ShardSupervisor, run_onchain_shard, run_offchain_shard
+        shards = ShardSupervisor()
+        if onchain_shards:
+            import engine  # For the token list only; the workers scan
+            shards.add_shards("onchain", run_onchain_shard,
+                              list(engine.TARGET_TOKENS) + engine.EXTRA_TOKEN_ADDRESSES, onchain_shards)
+        if offchain_shards:
+            import code_intel
+            shards.add_shards("offchain", run_offchain_shard, code_intel.TARGET_REPOS, offchain_shards)
+        shards.start()
+
+    agents = AgentSupervisor()
+    for name in names:
+        if (name == "onchain" and onchain_shards) or (name == "offchain" and offchain_shards):
+            continue
+        agents.add(*AGENTS[name])
+
+    metrics_server = start_metrics_server(readiness=agents.readiness) if METRICS_PORT else None
+
+    # SIGTERM (e.g. from a service manager) shuts down the same way as Ctrl+C.
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+
+    if agents.start():
+        logging.info("All agents are operational. System is live. Monitoring...")
+    else:
+        logging.info("System is live; agents still initializing are restarted if they fail. Monitoring...")
+
+    try:
+        # A timed wait keeps the main thread responsive to Ctrl+C.
+        while not shutdown.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    logging.info("Shutdown signal received. Stopping all agent patrols.")
+    agents.stop()
+    if shards is not None:
+        shards.stop()
+    shutdown_signal_sink()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    logging.info("Pending signals flushed. Goodbye.")
+    return 0
+
+# --- Tools (their arguments are passed through untouched) ---
+def dashboard(argv):
+    """Serves the Streamlit dashboard; extra arguments go to `streamlit run`."""
+    return subprocess.call([sys.executable, "-m", "streamlit", "run", os.path.join(MODULE_DIR, "dashboard.py"), *argv])
+
+def module_main(module_name):
+    """A tool that runs `module_name`.main(argv)."""
+    def run_tool(argv):
+        from settings import configure_logging
+        configure_logging()
+        return importlib.import_module(module_name).main(argv)
+    return run_tool
+
+# Subcommand -> (help, function taking the remaining arguments).
+TOOLS = {
+    "dashboard": ("Serve the Streamlit dashboard", dashboard),
+    "backfill": ("Backfill historical Transfer signals (backfill.py)", module_main("backfill")),
+    "archive": ("Move old signals into the Parquet archive (archive.py)", module_main("archive")),
+    "migrate": ("Upgrade the signals database schema (migrations.py)", module_main("migrations")),
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in TOOLS:
+        return TOOLS[argv[0]][1](argv[1:])
+
+    parser = argparse.ArgumentParser(
+        prog="arkheionx", description="ARKHEION-X intelligence agents.",
+        epilog="tools (arguments are passed through; see `arkheionx <tool> --help`):\n"
+               + "\n".join(f"  {name:<12}{help}" for name, (help, _) in TOOLS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run agents until Ctrl+C or SIGTERM")
+    run_parser.add_argument("agents", nargs="+", choices=["all", *AGENTS],
+                            help="Agents to run (all: every agent)")
+    args = parser.parse_args(argv)
+
+    names = list(AGENTS) if "all" in args.agents else list(dict.fromkeys(args.agents))
+    return run(names)
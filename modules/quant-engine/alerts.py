@@ -0,0 +1,339 @@
+"""
+ARKHEION-X: Alert Dispatcher v1.0 (Module Edition)
+
+Delivers correlation alerts to Telegram, a webhook and/or a file without ever
+blocking the analysis that raised them.
+
+The correlator does no network I/O: it writes each alert into the
+`alert_outbox` table (one row per configured channel) in the same transaction
+that records the correlation, so an alert is never lost to a crash and never
+queued for a correlation that was rolled back. A dispatcher thread, supervised
+like the agents, then delivers the outbox:
+
+- Coalescing: alerts wait COALESCE_SECONDS in the outbox, and every pending
+  alert of the same group (the commit's repository) on a channel goes out as
+  one message, so a burst of correlated commits and wallets is one alert.
+- Rate limiting: each channel has a token bucket (messages per minute plus a
+  burst); a channel that is out of tokens simply waits for the next cycle.
+- Retries: a failed send is retried with exponential backoff (or after the
+  server's Retry-After), up to MAX_ATTEMPTS, then the rows are marked failed.
+  Alerts queued while a message is retrying go out in a message of their
+  own, with their own attempt count. Rows are marked sent only after the
+  sink succeeds, so delivery is at-least-once.
+
+Sinks are plain objects with a `name`, optional `rate_per_minute`/`burst` and
+a `send(group_key, alerts, text)` method that raises DeliveryError on
+failure; TelegramSink, WebhookSink and FileSink are built in, configured by
+TELEGRAM_BOT_TOKEN + TELEGRAM_CHAT_ID, ALERT_WEBHOOK_URL and ALERT_FILE. HTTP
+goes through urllib, so the dispatcher needs no extra dependency, and every
+URL can point at a local stand-in (benchmarks/fake_alerts.py).
+"""
+import json
+import time
+import random
+import logging
+import threading
+import urllib.error
+import urllib.request
+from email.utils import parsedate_to_datetime
+
+from database import DB_FILE, initialize_db
+from signal_sink import open_connection
+from settings import settings
+import metrics
+
+# --- Configuration ---
+COALESCE_SECONDS = 30         # How long an alert waits for related alerts to join it
+DISPATCH_INTERVAL = 1.0       # Seconds between outbox checks
+MAX_COALESCED = 50            # Alerts merged into one message at most
+MAX_ATTEMPTS = 8              # Delivery attempts before a message is given up on
+RETRY_BASE_DELAY = 10         # Seconds; doubles per failed attempt
+RETRY_MAX_DELAY = 1800
+HTTP_TIMEOUT = 10
+OUTBOX_RETENTION_DAYS = 7     # Sent and failed rows are deleted after this
+CLEANUP_INTERVAL = 3600
+TELEGRAM_API = "https://api.telegram.org"
+TELEGRAM_MAX_CHARS = 4096
+MOVES_PER_ALERT = 5           # Wallet moves listed per commit in a message
+
+class DeliveryError(Exception):
+    """A sink could not deliver. Not retryable errors (e.g. HTTP 400) fail the message at once."""
+
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """`rate_per_minute` tokens per minute, holding at most `burst`."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+# --- Sinks ---
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After value (delay-seconds or an HTTP-date); None if unusable."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def post_json(url, body, timeout=HTTP_TIMEOUT):
+    """POSTs `body` as JSON. Raises DeliveryError; 429 and 5xx responses (and network errors) are retryable."""
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json", "User-Agent": "ARKHEION-X"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        retry_after = e.headers.get("Retry-After") if e.headers is not None else None
+        try:  # Telegram sends it in the body: {"parameters": {"retry_after": 5}}
+            retry_after = json.loads(e.read()).get("parameters", {}).get("retry_after", retry_after)
+        except (ValueError, AttributeError, OSError):
+            pass
+        raise DeliveryError(f"HTTP {e.code} {e.reason}", retryable=e.code == 429 or e.code >= 500,
+                            retry_after=parse_retry_after(retry_after)) from e
+    except (urllib.error.URLError, OSError) as e:
+        raise DeliveryError(f"{type(e).__name__}: {getattr(e, 'reason', e)}") from e
+
+class TelegramSink:
+    """Sends the rendered text through the Bot API's sendMessage (Telegram allows ~20 messages/min per group)."""
+    name = "telegram"
+    rate_per_minute = 20
+    burst = 3
+
+    def __init__(self, bot_token, chat_id, api_url=TELEGRAM_API):
+        self.url = f"{api_url}/bot{bot_token}/sendMessage"
+        self.chat_id = chat_id
+
+    def send(self, group_key, alerts, text):
+        if len(text) > TELEGRAM_MAX_CHARS:
+            text = text[:TELEGRAM_MAX_CHARS - 1] + "…"
+        post_json(self.url, {"chat_id": self.chat_id, "text": text, "disable_web_page_preview": True})
+
+class WebhookSink:
+    """POSTs {"source", "group", "text", "alerts"} as JSON."""
+    name = "webhook"
+    rate_per_minute = 60
+    burst = 10
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, group_key, alerts, text):
+        post_json(self.url, {"source": "ARKHEION-X", "group": group_key, "text": text, "alerts": alerts})
+
+class FileSink:
+    """Appends one JSON line per message. Not rate limited."""
+    name = "file"
+    rate_per_minute = None
+    burst = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, group_key, alerts, text):
+        line = {"sent_at": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()), "group": group_key,
+                "text": text, "alerts": alerts}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+        except OSError as e:
+            raise DeliveryError(f"Could not write {self.path}: {e}") from e
+
+def configured_sinks():
+    """Channel name -> sink for every channel configured in settings."""
+    sinks = []
+    if settings.telegram_bot_token and settings.telegram_chat_id:
+        sinks.append(TelegramSink(settings.telegram_bot_token, settings.telegram_chat_id))
+    if settings.alert_webhook_url:
+        sinks.append(WebhookSink(settings.alert_webhook_url))
+    if settings.alert_file:
+        sinks.append(FileSink(settings.alert_file))
+    return {sink.name: sink for sink in sinks}
+
+# --- Outbox ---
+def correlation_alert(repo, commit_data, smart_money_moves, funding_wallets=None, cluster_count=None):
+    """The JSON payload queued for one correlation (what log_correlation_alert logs)."""
+    funding_wallets = funding_wallets or {}
+    return {
+        "repository": repo,
+        "commit_sha": commit_data.get('commit_sha'),
+        "commit_message": commit_data.get('commit_message'),
+        "commit_url": commit_data.get('commit_url'),
+        "move_count": len(smart_money_moves),
+        "moves": [{key: move.get(key) for key in ("token", "from", "to", "amount", "value_usd_est", "finality")}
+                  for move in smart_money_moves[:MOVES_PER_ALERT]],
+        "funding_wallets": len(funding_wallets),
+        "direct_funders": sum(1 for hops in funding_wallets.values() if hops == 1),
+        "cluster_count": cluster_count or 0,
+    }
+
+def enqueue_alert(conn, group_key, payload, channels, delay=COALESCE_SECONDS):
+    """Queues one alert on every channel. The caller owns the transaction."""
+    due = time.time() + delay
+    conn.executemany(
+        "INSERT INTO alert_outbox (channel, group_key, payload, next_attempt_at) VALUES (?, ?, ?, ?)",
+        [(channel, group_key, json.dumps(payload), due) for channel in channels],
+    )
+
+def render_message(group_key, alerts):
+    """Plain-text message for the coalesced `alerts` of one group."""
+    lines = [f"ARKHEION-X: {len(alerts)} correlated alert(s) for {group_key}"
+             if len(alerts) > 1 else f"ARKHEION-X: correlated alert for {group_key}"]
+    for alert in alerts:
+        message = (alert.get('commit_message') or '').strip().splitlines()
+        lines.append("")
+        lines.append(f"Commit {str(alert.get('commit_sha') or '?')[:7]}: \"{message[0] if message else ''}\"")
+        lines.append(f"{alert.get('move_count', 0)} smart-money move(s):")
+        for move in alert.get('moves', [])[:MOVES_PER_ALERT]:
+            lines.append(f"  - {move.get('amount')} {move.get('token')} -> {str(move.get('to'))[:10]}... "
+                         f"({move.get('value_usd_est', 'unpriced')})"
+                         + (" [provisional]" if move.get('finality') == "provisional" else ""))
+        if alert.get('funding_wallets'):
+            lines.append(f"Funding: {alert['funding_wallets']} wallet(s) ({alert.get('direct_funders', 0)} direct) "
+                         f"across {alert.get('cluster_count', 0)} cluster(s)")
+        if alert.get('commit_url'):
+            lines.append(alert['commit_url'])
+    return "\n".join(lines)
+
+class AlertDispatcher:
+    """Delivers the outbox of one database to a set of sinks; see the module docstring."""
+
+    def __init__(self, sinks, db_file=DB_FILE):
+        self.sinks = dict(sinks)
+        self.buckets = {name: TokenBucket(sink.rate_per_minute, sink.burst) for name, sink in self.sinks.items()
+                        if getattr(sink, "rate_per_minute", None)}
+        self.conn = open_connection(db_file)
+        self._next_cleanup = 0.0
+
+    def run_cycle(self):
+        """Sends every due group whose channel has a token. Returns the number of messages sent."""
+        now = time.time()
+        due = self.conn.execute('''
+            SELECT channel, group_key FROM alert_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            GROUP BY channel, group_key ORDER BY MIN(id)
+        ''', (now,)).fetchall()
+        sent = 0
+        for channel, group_key in due:
+            bucket = self.buckets.get(channel)
+            if bucket is not None and not bucket.try_take():
+                continue  # Rate limited: stays due for the next cycle
+            sent += self._deliver(channel, group_key, now)
+        metrics.alert_outbox_pending.set(
+            self.conn.execute("SELECT COUNT(*) FROM alert_outbox WHERE status = 'pending'").fetchone()[0])
+        if time.monotonic() >= self._next_cleanup:
+            self._cleanup()
+            self._next_cleanup = time.monotonic() + CLEANUP_INTERVAL
+        return sent
+
+    def close(self):
+        self.conn.close()
+
+    # --- Internals ---
+    def _deliver(self, channel, group_key, now=None):
+        """
+        Sends one message for the group. Its oldest due row picks the batch: rows that share its
+        attempt count, so every row in a message has the same history. A fresh batch also takes
+        fresh rows not yet due (coalescing); a retrying batch never takes in rows that have not
+        failed with it.
+        """
+        now = time.time() if now is None else now
+        oldest = self.conn.execute('''
+            SELECT attempts FROM alert_outbox
+            WHERE status = 'pending' AND channel = ? AND group_key = ? AND next_attempt_at <= ?
+            ORDER BY id LIMIT 1
+        ''', (channel, group_key, now)).fetchone()
+        if oldest is None:
+            return 0
+        rows = self.conn.execute('''
+            SELECT id, payload, attempts FROM alert_outbox
+            WHERE status = 'pending' AND channel = ? AND group_key = ? AND attempts = ?
+            AND (attempts = 0 OR next_attempt_at <= ?)
+            ORDER BY id LIMIT ?
+        ''', (channel, group_key, oldest[0], now, MAX_COALESCED)).fetchall()
+        ids = [row[0] for row in rows]
+        alerts = [json.loads(row[1]) for row in rows]
+        attempts = oldest[0] + 1
+        sink = self.sinks.get(channel)
+        try:
+            if sink is None:
+                raise DeliveryError(f"Channel '{channel}' is not configured")
+            sink.send(group_key, alerts, render_message(group_key, alerts))
+        except DeliveryError as e:
+            self._record_failure(channel, ids, attempts, e)
+            return 0
+        except Exception as e:
+            self._record_failure(channel, ids, attempts, DeliveryError(f"{type(e).__name__}: {e}"))
+            return 0
+        self._update(ids, "status = 'sent', sent_at = CURRENT_TIMESTAMP, attempts = ?, last_error = NULL", attempts)
+        metrics.alert_messages.inc(channel=channel)
+        metrics.alerts_delivered.inc(len(ids), channel=channel)
+        logging.info(f"ALERTS: Sent {len(ids)} alert(s) for {group_key} to {channel}.")
+        return 1
+
+    def _record_failure(self, channel, ids, attempts, error):
+        metrics.alert_failures.inc(channel=channel)
+        if not error.retryable or attempts >= MAX_ATTEMPTS:
+            self._update(ids, "status = 'failed', attempts = ?, last_error = ?", attempts, str(error))
+            logging.error(f"ALERTS: Giving up on {len(ids)} alert(s) to {channel} after {attempts} attempt(s): {error}")
+            return
+        delay = error.retry_after if error.retry_after is not None else \
+            min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY) * random.uniform(0.8, 1.2)
+        self._update(ids, "attempts = ?, last_error = ?, next_attempt_at = ?", attempts, str(error), time.time() + delay)
+        logging.warning(f"ALERTS: Delivery to {channel} failed ({error}); retrying in {delay:.0f}s.")
+
+    def _update(self, ids, assignments, *values):
+        with self.conn:
+            self.conn.execute(f"UPDATE alert_outbox SET {assignments} WHERE id IN ({','.join('?' * len(ids))})",
+                              (*values, *ids))
+
+    def _cleanup(self):
+        cutoff = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - OUTBOX_RETENTION_DAYS * 86400))
+        with self.conn:
+            self.conn.execute("DELETE FROM alert_outbox WHERE status != 'pending' AND created_at < ?", (cutoff,))
+
+def start_alert_dispatcher(stop_event=None, ready_event=None):
+    """
+    Delivers the alert outbox until `stop_event` is set. Without configured
+    channels it idles: the correlator queues nothing then.
+    """
+    initialize_db()
+    stop_event = stop_event or threading.Event()
+    sinks = configured_sinks()
+    if ready_event is not None:
+        ready_event.set()
+    if not sinks:
+        logging.info("ALERTS: No alert channel configured (TELEGRAM_BOT_TOKEN + TELEGRAM_CHAT_ID, "
+                     "ALERT_WEBHOOK_URL or ALERT_FILE); alerts are only logged.")
+        stop_event.wait()
+        return
+    dispatcher = AlertDispatcher(sinks)
+    logging.info(f"ALERTS: Dispatching alerts to {', '.join(sinks)}.")
+    try:
+        while not stop_event.wait(DISPATCH_INTERVAL):
+            try:
+                dispatcher.run_cycle()
+            except Exception as e:
+                logging.error(f"ALERTS: Dispatch cycle failed: {e}", exc_info=True)
+    finally:
+        dispatcher.close()
@@ -0,0 +1,205 @@
+"""
+ARKHEION-X: Anomaly Scorer v1.0 (Module Edition)
+
+Per-token statistical baselines for the on-chain agent. A fixed USD threshold
+fires on every routine USDC move and never on a thinly traded token, so each
+token is instead compared with its own recent history:
+
+- Transfer size: an EWMA mean and variance of log10(amount), plus a t-digest
+  of the same values. A Transfer is anomalous when both its z-score and its
+  percentile in the digest cross their thresholds.
+- Transfer frequency: an EWMA mean and variance of Transfers per block. A
+  scanned block range is a spike when its Transfer count is far above what the
+  baseline expects for that many blocks.
+
+Both baselines live in constant memory and forget exponentially: every new
+observation decays the weight of the older ones (EWMA weights and t-digest
+centroid weights alike), so they track a sliding window of roughly
+SIZE_HALF_LIFE Transfers and RATE_HALF_LIFE blocks. Amounts are in token
+units, so scoring also works for unpriced tokens and does not move with price.
+
+A whole block range is scored at once with NumPy, against the baseline as it
+was before the range, and only then folded into it. Until a token has seen
+WARMUP_TRANSFERS Transfers (or WARMUP_BLOCKS blocks) it is not scored; the
+engine falls back to its fixed thresholds meanwhile.
+
+Baselines serialise to plain JSON (`to_state`); the engine persists them in
+agent_state together with its scan checkpoints.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# --- Configuration ---
+SIZE_HALF_LIFE = 20000        # Transfers after which an observation's weight in the size baseline halves
+RATE_HALF_LIFE = 100000       # Blocks after which a block's weight in the frequency baseline halves (~7h on Arbitrum)
+DIGEST_COMPRESSION = 200      # t-digest accuracy; a digest keeps at most ~compression / 2 centroids
+WARMUP_TRANSFERS = 500        # Transfers a size baseline needs before it scores
+WARMUP_BLOCKS = 10000         # Blocks a frequency baseline needs before it scores
+Z_THRESHOLD = 4.0             # log10(amount) z-score a Transfer must reach...
+PERCENTILE_THRESHOLD = 0.9995 # ...together with this percentile, to be anomalous
+RATE_Z_THRESHOLD = 5.0        # Transfer-count z-score above which a scanned range is a frequency spike
+MIN_VARIANCE = 1e-6           # Keeps z-scores finite for tokens that always move the same amount
+
+ANOMALY_AGENT = "anomaly"     # agent_state namespace for the per-token baselines
+
+SIZE_DECAY = 0.5 ** (1 / SIZE_HALF_LIFE)
+RATE_DECAY = 0.5 ** (1 / RATE_HALF_LIFE)
+
+# Scores of one token over one block range. z_scores/percentiles are None while the size
+# baseline warms up; rate_z is None while the frequency baseline does.
+RangeScore = namedtuple("RangeScore", "z_scores percentiles anomalous transfers expected rate_z spike")
+
+class TDigest:
+    """Merging t-digest whose centroid weights decay like an EWMA."""
+
+    def __init__(self, means=(), weights=(), compression=DIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.asarray(means, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+
+    def __len__(self):
+        return len(self.means)
+
+    def add(self, values, weights):
+        """Merges `values` with their `weights` into the digest in one vectorised pass."""
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, weights))
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        quantiles = (cumulative - weights / 2) / cumulative[-1]
+        # k1 scale function: one unit of k per centroid keeps centroids narrow in the tails.
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * quantiles - 1))
+        _, groups = np.unique(k, return_inverse=True)
+        self.weights = np.bincount(groups, weights)
+        self.means = np.bincount(groups, weights * means) / self.weights
+
+    def decay(self, factor):
+        self.weights *= factor
+
+    def cdf(self, values):
+        """Estimated fraction of the (weighted) observations below each of `values`."""
+        if not len(self.means):
+            return np.full(len(values), 0.5)
+        return np.interp(values, self.means, self._midpoints(), left=0.0, right=1.0)
+
+    def quantile(self, q):
+        if not len(self.means):
+            return float("nan")
+        return float(np.interp(q, self._midpoints(), self.means))
+
+    # --- Internals ---
+    def _midpoints(self):
+        cumulative = np.cumsum(self.weights)
+        return (cumulative - self.weights / 2) / cumulative[-1]
+
+def _fold(weight, mean, var, values, decay):
+    """
+    Folds `values` (oldest first) into an exponentially weighted mean and variance
+    with total weight `weight`. Returns (weight, mean, var) and the per-value weights.
+    """
+    ages = decay ** np.arange(len(values) - 1, -1, -1, dtype=float)
+    batch_weight = ages.sum()
+    batch_mean = ages @ values / batch_weight
+    batch_var = ages @ (values - batch_mean) ** 2 / batch_weight
+    total = weight * decay ** len(values) + batch_weight
+    share = batch_weight / total
+    # Variance of the mixture of the old baseline and the batch.
+    var = (1 - share) * var + share * batch_var + share * (1 - share) * (batch_mean - mean) ** 2
+    return (total, mean + share * (batch_mean - mean), var), ages
+
+class TokenBaseline:
+    """Size and frequency baselines of one token; see the module docstring."""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.transfers = state.get("transfers", 0)  # Transfers observed in total (not decayed)
+        self.size = tuple(state.get("size", (0.0, 0.0, 0.0)))  # (weight, mean, variance) of log10(amount)
+        self.digest = TDigest(state.get("digest_means", ()), state.get("digest_weights", ()))
+        self.blocks = state.get("blocks", 0)  # Blocks observed in total
+        self.rate = tuple(state.get("rate", (0.0, 0.0, 0.0)))  # (weight, mean, variance) of Transfers per block
+        self.last_block = state.get("last_block")  # Highest block folded into the frequency baseline
+
+    def score_range(self, amounts, blocks, block_range=None):
+        """
+        Scores Transfers (token `amounts` and their block numbers, in log order) against the
+        baseline, then folds them into it. `block_range` is the (first, last) block the Transfers
+        cover completely; without it only their sizes are scored. Returns a RangeScore.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        blocks = np.asarray(blocks, dtype=np.int64)
+        positive = amounts > 0
+        sizes = np.log10(amounts, out=np.full(len(amounts), -np.inf), where=positive)
+
+        z_scores = percentiles = None
+        anomalous = np.zeros(len(amounts), dtype=bool)
+        if self.transfers >= WARMUP_TRANSFERS:
+            _, mean, var = self.size
+            z_scores = (sizes - mean) / math.sqrt(max(var, MIN_VARIANCE))
+            percentiles = self.digest.cdf(sizes)
+            anomalous = (z_scores >= Z_THRESHOLD) & (percentiles >= PERCENTILE_THRESHOLD)
+
+        from_block, to_block = block_range if block_range is not None else (0, -1)
+        # Blocks already folded in (a rescan after a restart) do not count twice.
+        if self.last_block is not None:
+            from_block = max(from_block, self.last_block + 1)
+        transfers, expected, rate_z = 0, 0.0, None
+        if to_block >= from_block:
+            in_range = blocks[(blocks >= from_block) & (blocks <= to_block)]
+            counts = np.bincount(in_range - from_block, minlength=to_block - from_block + 1).astype(float)
+            transfers, expected = len(in_range), self.rate[1] * len(counts)
+            if self.blocks >= WARMUP_BLOCKS:
+                rate_z = (transfers - expected) / math.sqrt(max(self.rate[2], MIN_VARIANCE) * len(counts))
+            self.rate, _ = _fold(*self.rate, counts, RATE_DECAY)
+            self.blocks += len(counts)
+            self.last_block = to_block
+
+        observed = sizes[positive]
+        if len(observed):
+            self.size, ages = _fold(*self.size, observed, SIZE_DECAY)
+            self.digest.decay(SIZE_DECAY ** len(observed))
+            self.digest.add(observed, ages)
+            self.transfers += len(observed)
+        return RangeScore(z_scores, percentiles, anomalous, transfers, expected,
+                          rate_z, rate_z is not None and rate_z >= RATE_Z_THRESHOLD)
+
+    def median_amount(self):
+        """Typical Transfer size in token units (nan before the first Transfer)."""
+        return 10 ** self.digest.quantile(0.5)
+
+    def to_state(self):
+        return {
+            "transfers": self.transfers, "size": [float(value) for value in self.size],
+            "digest_means": self.digest.means.round(6).tolist(), "digest_weights": self.digest.weights.round(6).tolist(),
+            "blocks": self.blocks, "rate": [float(value) for value in self.rate], "last_block": self.last_block,
+        }
+
+class AnomalyScorer:
+    """Token name -> TokenBaseline, remembering which baselines changed since they were saved."""
+
+    def __init__(self):
+        self.baselines = {}
+        self.changed = set()
+
+    def load(self, states):
+        """Restores baselines from {token_name: state}; missing states start empty."""
+        self.baselines = {token_name: TokenBaseline(state) for token_name, state in states.items()}
+        self.changed.clear()
+
+    def baseline(self, token_name):
+        if token_name not in self.baselines:
+            self.baselines[token_name] = TokenBaseline()
+        return self.baselines[token_name]
+
+    def score_range(self, token_name, amounts, blocks, block_range=None):
+        """TokenBaseline.score_range for `token_name`."""
+        self.changed.add(token_name)
+        return self.baseline(token_name).score_range(amounts, blocks, block_range)
+
+    def changed_states(self):
+        """{token_name: state} of every baseline scored since the last call."""
+        states = {token_name: self.baselines[token_name].to_state() for token_name in self.changed}
+        self.changed.clear()
+        return states
@@ -0,0 +1,279 @@
+"""
+ARKHEION-X: Signal Archive v1.0 (Module Edition)
+
+Columnar cold tier for the signals database. Signals older than
+ARCHIVE_AFTER_DAYS are moved out of `alpha_signals` into zstd-compressed
+Parquet files, partitioned by day:
+
+    archive/date=2026-01-31/part-<first id>-<last id>.parquet
+
+The hot metadata fields are flattened into typed columns (amounts as floats,
+log indexes as integers, low-cardinality strings dictionary-encoded) and the
+raw JSON is kept alongside, so nothing is lost. Each batch is written to its
+file before its rows are deleted from SQLite, and a file is named after the id
+range it holds, so a run interrupted between the two steps simply rewrites the
+same file next time. Small parts of a day are later compacted into one file.
+
+`load_signals()` answers a SignalFilter over both tiers: only the partitions
+inside the date range are opened, the remaining predicates are pushed into the
+Parquet reader, and the hot rows come from SQLite with the same columns.
+
+pyarrow is optional: without it the archiver and archived views are disabled.
+
+Usage (from the repository root):
+    python modules/quant-engine/archive.py                # archive signals older than 30 days
+    python modules/quant-engine/archive.py --days 7
+    python modules/quant-engine/archive.py --compact-only
+"""
+import os
+import sys
+import threading
+import logging
+import argparse
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Archiving is optional; everything stays in SQLite without it.
+    pa = pc = pq = None
+
+from database import DB_FILE
+from signal_sink import open_connection
+from signal_queries import TIMESTAMP_FORMAT, SignalFilter
+
+# --- Configuration ---
+ARCHIVE_DIR = "archive"
+ARCHIVE_AFTER_DAYS = 30     # Must stay well above the correlator's window
+ARCHIVE_BATCH_SIZE = 50000  # Rows per Parquet part (and per delete transaction)
+ARCHIVE_INTERVAL = 6 * 3600 # Seconds between runs of the background archiver
+COMPRESSION = "zstd"
+
+# (column, SQL expression over alpha_signals, Arrow type)
+# Amounts are stored formatted ("1,234.56", "$1,234.56"), so they are cleaned up before the cast.
+ARCHIVE_COLUMNS = [
+    ("id", "id", "int64"),
+    ("timestamp", "timestamp", "timestamp"),
+    ("source", "source", "category"),
+    ("signal_type", "signal_type", "category"),
+    ("confidence_level", "confidence_level", "category"),
+    ("token", "token", "category"),
+    ("repository", "repository", "category"),
+    ("sender", "sender", "string"),
+    ("receiver", "receiver", "string"),
+    ("tx_hash", "tx_hash", "string"),
+    ("log_index", "log_index", "int64"),
+    ("commit_sha", "commit_sha", "string"),
+    ("amount", "CAST(REPLACE(json_extract(metadata, '$.amount'), ',', '') AS REAL)", "float64"),
+    ("value_usd", "CAST(REPLACE(REPLACE(json_extract(metadata, '$.value_usd_est'), '$', ''), ',', '') AS REAL)", "float64"),
+    ("receiver_tx_count", "CASE WHEN json_type(metadata, '$.receiver_tx_count') = 'integer' "
+                          "THEN json_extract(metadata, '$.receiver_tx_count') END", "int64"),
+    ("severity_score", "CAST(json_extract(metadata, '$.severity_score') AS REAL)", "float64"),
+    ("metadata", "metadata", "string"),
+]
+COLUMN_NAMES = [name for name, _, _ in ARCHIVE_COLUMNS]
+SELECT_COLUMNS = ", ".join(f"{expression} AS {name}" if expression != name else name
+                           for name, expression, _ in ARCHIVE_COLUMNS)
+
+def available():
+    return pq is not None
+
+def arrow_schema():
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "timestamp": pa.timestamp("s"),
+    }
+    return pa.schema([(name, types[kind]) for name, _, kind in ARCHIVE_COLUMNS])
+
+def partition_dir(archive_dir, day):
+    return os.path.join(archive_dir, f"date={day.isoformat()}")
+
+def partition_dates(archive_dir=ARCHIVE_DIR):
+    """The days that have an archive partition, oldest first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    days = []
+    for name in os.listdir(archive_dir):
+        if name.startswith("date="):
+            try:
+                days.append(datetime.strptime(name[5:], "%Y-%m-%d").date())
+            except ValueError:
+                continue
+    return sorted(days)
+
+def write_part(archive_dir, day, rows):
+    """Writes one Parquet part atomically. Returns its path."""
+    columns = list(zip(*rows))
+    columns[1] = [datetime.strptime(value, TIMESTAMP_FORMAT) for value in columns[1]]
+    schema = arrow_schema()
+    arrays = [
+        pa.array(values, pa.string()).dictionary_encode() if pa.types.is_dictionary(field.type)
+        else pa.array(values, field.type)
+        for values, field in zip(columns, schema)
+    ]
+    table = pa.Table.from_arrays(arrays, schema=schema)
+    directory = partition_dir(archive_dir, day)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{rows[0][0]}-{rows[-1][0]}.parquet")
+    temp_path = path + ".tmp"
+    pq.write_table(table, temp_path, compression=COMPRESSION)
+    os.replace(temp_path, path)
+    return path
+
+def archive_signals(db_file=DB_FILE, archive_dir=ARCHIVE_DIR, older_than_days=ARCHIVE_AFTER_DAYS):
+    """
+    Moves every signal from before the cutoff day into Parquet, one batch at a time.
+    Only whole days are archived, so a partition is never appended to by a later run
+    except through signals backfilled after the fact. Returns the number of rows moved.
+    """
+    cutoff_day = datetime.now(timezone.utc).date() - timedelta(days=older_than_days)
+    cutoff = cutoff_day.strftime(TIMESTAMP_FORMAT.split()[0])
+    moved = 0
+    last_id = 0
+    with closing(open_connection(db_file)) as conn:
+        while True:
+            rows = conn.execute(
+                f"SELECT {SELECT_COLUMNS} FROM alpha_signals WHERE timestamp < ? AND id > ? ORDER BY id LIMIT ?",
+                (cutoff, last_id, ARCHIVE_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(datetime.strptime(row[1], TIMESTAMP_FORMAT).date(), []).append(row)
+            for day, day_rows in by_day.items():
+                write_part(archive_dir, day, day_rows)
+            # New rows always get higher ids, so this range holds exactly the rows just written.
+            with conn:
+                conn.execute("DELETE FROM alpha_signals WHERE timestamp < ? AND id > ? AND id <= ?",
+                             (cutoff, last_id, rows[-1][0]))
+            last_id = rows[-1][0]
+            moved += len(rows)
+            logging.info(f"ARCHIVER: Moved {moved} signal(s) older than {cutoff} to {archive_dir}.")
+    return moved
+
+def compact_partitions(archive_dir=ARCHIVE_DIR):
+    """Merges the parts of each day into a single file, sorted by timestamp. Returns the partitions compacted."""
+    compacted = 0
+    for day in partition_dates(archive_dir):
+        directory = partition_dir(archive_dir, day)
+        parts = sorted(name for name in os.listdir(directory) if name.endswith(".parquet"))
+        if len(parts) < 2:
+            continue
+        paths = [os.path.join(directory, name) for name in parts]
+        table = pa.concat_tables([pq.read_table(path, schema=arrow_schema()) for path in paths])
+        table = table.sort_by([("timestamp", "ascending"), ("id", "ascending")])
+        ids = table.column("id")
+        path = os.path.join(directory, f"part-{pc.min(ids).as_py()}-{pc.max(ids).as_py()}.parquet")
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION)
+        os.replace(path + ".tmp", path)
+        for old_path in paths:
+            if old_path != path:
+                os.remove(old_path)
+        compacted += 1
+    return compacted
+
+def parquet_filters(signal_filter):
+    filters = []
+    if signal_filter.start is not None:
+        filters.append(("timestamp", ">=", signal_filter.start))
+    if signal_filter.end is not None:
+        filters.append(("timestamp", "<", signal_filter.end))
+    for column, values in (("signal_type", signal_filter.signal_types),
+                           ("confidence_level", signal_filter.confidence_levels),
+                           ("token", signal_filter.tokens)):
+        if values is not None:
+            filters.append((column, "in", list(values)))
+    return filters or None
+
+def load_archived(signal_filter, archive_dir=ARCHIVE_DIR, columns=None):
+    """Archived signals matching the filter as an Arrow table (None when nothing is archived)."""
+    if not available():
+        return None
+    first_day = signal_filter.start.date() if signal_filter.start is not None else None
+    last_day = signal_filter.end.date() if signal_filter.end is not None else None
+    paths = []
+    for day in partition_dates(archive_dir):
+        # Partition pruning: days outside the range are never opened.
+        if (first_day and day < first_day) or (last_day and day > last_day):
+            continue
+        directory = partition_dir(archive_dir, day)
+        paths.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".parquet"))
+    if not paths:
+        return None
+    filters = parquet_filters(signal_filter)
+    tables = [pq.read_table(path, columns=columns, filters=filters, schema=arrow_schema()) for path in paths]
+    return pa.concat_tables(tables)
+
+def load_signals(signal_filter=None, db_file=DB_FILE, archive_dir=ARCHIVE_DIR, columns=None):
+    """
+    Signals matching the filter from the hot table and the archive, as one DataFrame
+    with the ARCHIVE_COLUMNS layout, newest first. `columns` narrows what is read.
+    """
+    signal_filter = signal_filter or SignalFilter()
+    columns = list(columns) if columns else list(COLUMN_NAMES)
+    for required in ("id", "timestamp"):
+        if required not in columns:
+            columns.append(required)
+
+    where, params = signal_filter.where()
+    expressions = dict((name, expression) for name, expression, _ in ARCHIVE_COLUMNS)
+    select = ", ".join(f"{expressions[name]} AS {name}" for name in columns)
+    with closing(open_connection(db_file)) as conn:
+        hot = pd.read_sql_query(f"SELECT {select} FROM alpha_signals{where}", conn, params=params)
+    hot['timestamp'] = pd.to_datetime(hot['timestamp'])
+
+    frames = [hot]
+    archived = load_archived(signal_filter, archive_dir, columns)
+    if archived is not None and archived.num_rows:
+        frames.append(archived.to_pandas())
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else hot
+    # A run interrupted between writing a part and deleting its rows leaves both copies.
+    df = df.drop_duplicates(subset="id")
+    return df.sort_values(["timestamp", "id"], ascending=False, ignore_index=True)
+
+def start_archiver(interval=ARCHIVE_INTERVAL, stop_event=None, ready_event=None):
+    """Background loop for main.py: archives and compacts every `interval` seconds."""
+    stop_event = stop_event or threading.Event()
+    if ready_event is not None:
+        ready_event.set()
+    if not available():
+        logging.warning("ARCHIVER: pyarrow is not installed; signals will stay in SQLite.")
+        stop_event.wait()  # Nothing to do, but not a failure worth restarting over
+        return
+    while not stop_event.is_set():
+        try:
+            moved = archive_signals()
+            compacted = compact_partitions()
+            logging.info(f"ARCHIVER: Run complete. {moved} signal(s) archived, {compacted} partition(s) compacted.")
+        except Exception as e:
+            logging.error(f"ARCHIVER: Run failed: {e}", exc_info=True)
+        stop_event.wait(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old ARKHEION-X signals into a partitioned Parquet archive.")
+    parser.add_argument("--db", default=DB_FILE, help=f"Path to the SQLite database (default: {DB_FILE})")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help=f"Archive root directory (default: {ARCHIVE_DIR})")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help=f"Archive signals older than this many days (default: {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--compact-only", action="store_true", help="Only compact existing partitions")
+    args = parser.parse_args(argv)
+
+    if not available():
+        print("pyarrow is required for archiving: pip install pyarrow")
+        return 1
+    if not args.compact_only:
+        moved = archive_signals(args.db, args.archive_dir, args.days)
+        print(f"Archived {moved} signal(s) older than {args.days} day(s).")
+    print(f"Compacted {compact_partitions(args.archive_dir)} partition(s).")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
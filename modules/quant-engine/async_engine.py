@@ -0,0 +1,350 @@
+"""
+ARKHEION-X: Async Quant Engine v1.0 (Module Edition)
+
+An asyncio flavour of the on-chain intelligence agent. All RPC traffic goes
+through a health-scored ProviderPool of AsyncWeb3 endpoints, so a degraded
+RPC is failed over immediately instead of sitting through error sleeps, and
+the latency-critical head lookup is raced across the two healthiest endpoints.
+
+When ARBITRUM_WS_URL is set the agent subscribes to `newHeads` and to a
+filtered `logs` stream over WebSocket instead of polling: Transfers are
+handled as they are announced, and any gap left by a dropped connection is
+backfilled with ranged get_logs calls over the HTTP pool after reconnecting.
+Every new head's parentHash is checked against the block tracker; a chain
+reorganization rolls back the orphaned blocks' signals and reconnects, which
+re-scans them.
+
+Decoding and classification are shared with engine.py: this module only
+replaces the transport. Select it with ONCHAIN_ASYNC=true.
+"""
+import time
+import asyncio
+import logging
+from web3 import Web3, AsyncWeb3, WebSocketProvider
+
+import engine
+from database import initialize_db, persist_signal
+from signal_bus import bus
+from rpc_pool import ProviderPool, NoHealthyEndpointError
+from block_tracker import normalize_hash
+from wallet_classifier import FreshWalletClassifier, RPC_BATCH_SIZE
+from price_oracle import PriceOracle
+from settings import configure_logging
+import metrics
+
+# --- Configuration ---
+STREAM_FLUSH_SIZE = 200        # Buffered streamed Transfers that trigger an early flush of whole blocks
+RECONNECT_BASE_DELAY = 1       # Seconds; doubles per failed reconnect
+RECONNECT_MAX_DELAY = 60
+STREAM_CHECKPOINT_INTERVAL = 5 # Seconds between checkpoint writes while streaming
+STREAM_DEDUPE_BLOCKS = 256     # Blocks behind the head whose streamed logs are remembered, to drop repeats
+STOP_POLL_INTERVAL = 0.5       # Seconds between checks of the supervisor's stop event
+
+async def fetch_transfer_logs(pool, from_block, to_block):
+    """Async counterpart of engine.fetch_transfer_logs: one eth_getLogs, halved on range errors."""
+    params = {
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "address": engine.transfer_addresses,
+        "topics": [engine.TRANSFER_TOPIC],
+    }
+    try:
+        return await pool.call(lambda w3: w3.eth.get_logs(params))
+    except Exception as e:
+        if from_block >= to_block or not engine.is_range_error(e):
+            raise
+        middle = (from_block + to_block) // 2
+        logging.info(f"ON-CHAIN AGENT: Provider rejected blocks {from_block}-{to_block}; splitting the range.")
+        lower, upper = await asyncio.gather(
+            fetch_transfer_logs(pool, from_block, middle),
+            fetch_transfer_logs(pool, middle + 1, to_block),
+        )
+        return lower + upper
+
+async def get_block_header(pool, number):
+    return await pool.call(lambda w3: w3.eth.get_block(number))
+
+def header_reader(pool, loop):
+    """
+    A blocking get_header for engine's chain checks (check_chain, finalize), which run off the
+    event loop in a worker thread: each header is fetched through the pool on `loop`.
+    """
+    return lambda number: asyncio.run_coroutine_threadsafe(get_block_header(pool, number), loop).result()
+
+async def batch_nonces(w3, addresses):
+    """Fetches transaction counts for many addresses in one JSON-RPC batch request."""
+    async with w3.batch_requests() as batch:
+        for address in addresses:
+            batch.add(w3.eth.get_transaction_count(address))
+        results = await batch.async_execute()
+    return dict(zip(addresses, results))
+
+async def resolve_fresh_wallets(pool, significant):
+    """Warms the fresh-wallet cache for every significant receiver, one batch per RPC_BATCH_SIZE."""
+    unknown = engine.fresh_wallets.unknown([event['args']['to'] for event, _, _, _ in significant])
+    chunks = [unknown[i:i + RPC_BATCH_SIZE] for i in range(0, len(unknown), RPC_BATCH_SIZE)]
+    results = await asyncio.gather(
+        *(pool.call(lambda w3, chunk=chunk: batch_nonces(w3, chunk)) for chunk in chunks),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, dict):
+            engine.fresh_wallets.store(result)
+        else:
+            # Addresses left uncached are looked up one by one by handle_event.
+            logging.warning(f"ON-CHAIN AGENT: Batched nonce lookup failed: {result}")
+
+async def handle_events(pool, events, block_range=None):
+    """
+    Scores and classifies decoded Transfers (engine.select_significant). Scoring prices the
+    events first (one multicall per block window), which blocks, so it runs off the event loop.
+    """
+    significant, spikes = await asyncio.to_thread(engine.select_significant, events, block_range)
+    engine.record_signal_blocks(significant)
+    await resolve_fresh_wallets(pool, significant)
+    # Classification may still fall back to blocking RPC calls; keep them off the event loop.
+    await asyncio.to_thread(engine.handle_significant, significant, spikes)
+
+async def scan_block_range(pool, from_block, to_block):
+    """Async counterpart of engine.scan_block_range. Returns the last block fully scanned."""
+    scanned = from_block - 1
+    for chunk_start in range(from_block, to_block + 1, engine.MAX_BLOCK_RANGE):
+        chunk_end = min(chunk_start + engine.MAX_BLOCK_RANGE - 1, to_block)
+        started = time.perf_counter()
+        tip = await get_block_header(pool, chunk_end)
+        raw_logs = await fetch_transfer_logs(pool, chunk_start, chunk_end)
+        events = list(engine.decode_transfer_logs(raw_logs, skip_checkpointed=True))
+        if not engine.tip_is_consistent(events, chunk_end, tip):
+            break
+        await handle_events(pool, events, (chunk_start, chunk_end))
+        engine.block_tracker.record(chunk_end, tip['hash'])
+        await asyncio.to_thread(engine.commit_checkpoint, chunk_end)
+        engine.record_scan(chunk_start, chunk_end, len(events), time.perf_counter() - started)
+        scanned = chunk_end
+    return scanned
+
+async def follow_chain(pool, latest_block, target_block):
+    """Checks the chain for a reorg (engine.check_chain), then scans up to `target_block`."""
+    read_header = header_reader(pool, asyncio.get_running_loop())
+    latest_block = await asyncio.to_thread(engine.check_chain, latest_block, read_header)
+    return await scan_block_range(pool, latest_block + 1, target_block)
+
+def rescan_from(latest_block, buffered):
+    """
+    The last block whose streamed Transfers are all handled: buffered ones were not, and a late
+    log can belong to a block the stream already passed. Stream checkpoints never go beyond it.
+    """
+    if not buffered:
+        return latest_block
+    return min(latest_block, min(event['blockNumber'] for event, _, _ in buffered) - 1)
+
+async def rewind_for_buffered(latest_block, buffered):
+    """When a stream ends, moves the checkpoint back so the backfill after reconnecting re-reads the buffered Transfers."""
+    resume = rescan_from(latest_block, buffered)
+    if resume < latest_block:
+        await asyncio.to_thread(engine.commit_checkpoint, resume)
+    return resume
+
+def confirmed(events, through_block):
+    """Splits buffered (event, token, config) items into those of blocks <= through_block and the rest."""
+    if through_block is None:
+        return events, []
+    return ([item for item in events if item[0]['blockNumber'] <= through_block],
+            [item for item in events if item[0]['blockNumber'] > through_block])
+
+async def flush_whole_blocks(pool, buffered, latest_block):
+    """
+    Early flush of a full buffer: handles the blocks before the newest one buffered with their
+    block range, as a new head would, so their Transfers are scored for frequency too and the
+    checkpoint can pass them (a reconnect never re-reads them into the baselines). Returns
+    (latest_block, buffered).
+    """
+    through = max(event['blockNumber'] for event, _, _ in buffered) - 1
+    if through <= latest_block:
+        return latest_block, buffered  # All in one block: it waits for the next head
+    ready, buffered = confirmed(buffered, through)
+    await handle_events(pool, ready, (latest_block + 1, through))
+    metrics.blocks_scanned.inc(through - latest_block, agent=engine.CHECKPOINT_AGENT)
+    return through, buffered
+
+async def stream_transfers(pool, ws_url, latest_block):
+    """
+    Subscription mode: streams newHeads and Transfer logs over WebSocket.
+    Reconnects with backoff and backfills missed blocks through the HTTP pool.
+    """
+    delay = RECONNECT_BASE_DELAY
+    log_filter = {"address": engine.transfer_addresses, "topics": [engine.TRANSFER_TOPIC]}
+    read_header = header_reader(pool, asyncio.get_running_loop())
+    # With a confirmation depth and no provisional signals, streamed Transfers wait in the
+    # buffer until their block is deep enough.
+    holding = engine.CONFIRMATIONS and not engine.PROVISIONAL_SIGNALS
+    while True:
+        buffered = []
+        try:
+            async with AsyncWeb3(WebSocketProvider(ws_url)) as w3:
+                head_subscription = await w3.eth.subscribe("newHeads")
+                await w3.eth.subscribe("logs", log_filter)
+
+                # Subscribing first means nothing between the backfill and the stream is missed.
+                target_block = engine.scan_target(await w3.eth.block_number)
+                if target_block > latest_block:
+                    logging.info(f"ON-CHAIN AGENT: Backfilling blocks {latest_block + 1}-{target_block} after (re)connect.")
+                    latest_block = await follow_chain(pool, latest_block, target_block)
+                logging.info(f"ON-CHAIN AGENT: Streaming newHeads/logs from {ws_url}.")
+                delay = RECONNECT_BASE_DELAY
+
+                # Logs of blocks up to here came from the backfill's get_logs; later ones only
+                # from the stream, where a log may arrive after the head that follows its block.
+                backfilled_through = latest_block
+                streamed = {}  # (tx hash, log index) -> block, in arrival order
+                last_checkpoint = time.monotonic()
+                async for message in w3.socket.process_subscriptions():
+                    result = message["result"]
+                    if message["subscription"] == head_subscription:
+                        number = result["number"]
+                        if (engine.block_tracker.conflicts(number, result["hash"])
+                                or not engine.block_tracker.parent_matches(number, result["parentHash"])):
+                            latest_block = min(latest_block, await asyncio.to_thread(
+                                engine.handle_reorg, latest_block, engine.canonical_hashes(read_header)))
+                            break  # Reconnect: the buffer is dropped and the blocks after the fork re-scanned
+                        engine.block_tracker.record(number, result["hash"])
+                        while streamed and next(iter(streamed.values())) < number - STREAM_DEDUPE_BLOCKS:
+                            del streamed[next(iter(streamed))]
+                        # Logs of the new head may still be in flight, so only the blocks
+                        # before it are known to be fully handled.
+                        ready_through = engine.scan_target(number - 1)
+                        ready, buffered = confirmed(buffered, ready_through)
+                        if ready or ready_through > latest_block:
+                            complete = (latest_block + 1, ready_through)
+                            await handle_events(pool, ready, complete if complete[1] >= complete[0] else None)
+                        if ready_through > latest_block:
+                            metrics.blocks_scanned.inc(ready_through - latest_block, agent=engine.CHECKPOINT_AGENT)
+                            latest_block = ready_through
+                        if engine.PROVISIONAL_SIGNALS:
+                            checked = await asyncio.to_thread(engine.finalize, number, latest_block, read_header)
+                            if checked < latest_block:
+                                latest_block = checked
+                                break  # A reorg below the confirmation depth: reconnect and re-scan
+                        if time.monotonic() - last_checkpoint >= STREAM_CHECKPOINT_INTERVAL:
+                            await asyncio.to_thread(engine.commit_checkpoint, rescan_from(latest_block, buffered))
+                            last_checkpoint = time.monotonic()
+                        continue
+                    if result.get("removed") or result["blockNumber"] <= backfilled_through:
+                        continue  # Retracted by a reorg (the head check rolls it back), or backfilled
+                    # A late log of a block already passed is still handled (with the next head);
+                    # only a repeat of a log already streamed is dropped.
+                    key = (normalize_hash(result["transactionHash"]), result["logIndex"])
+                    if key in streamed:
+                        continue
+                    streamed[key] = result["blockNumber"]
+                    buffered.extend(engine.decode_transfer_logs([result]))
+                    if len(buffered) >= STREAM_FLUSH_SIZE and not holding:
+                        latest_block, buffered = await flush_whole_blocks(pool, buffered, latest_block)
+            # Left the stream on a reorg: the backfill after reconnecting re-scans from the fork.
+            latest_block = await rewind_for_buffered(latest_block, buffered)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Transfers buffered but not yet handled are re-fetched by the backfill, which
+            # starts before the oldest of them; inserts are idempotent.
+            latest_block = await rewind_for_buffered(latest_block, buffered)
+            logging.error(f"ON-CHAIN AGENT: WebSocket stream lost ({e}). Reconnecting in {delay}s...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+async def patrol(rpc_urls=None, ready_event=None):
+    """
+    The asyncio patrol loop. `rpc_urls` defaults to engine.RPC_URLS (handy for stub servers);
+    `ready_event` is set once initialization is done.
+    """
+    pool = ProviderPool(rpc_urls or engine.RPC_URLS, is_request_error=engine.is_range_error)
+
+    engine.erc20_abi = engine.load_erc20_abi()
+    if engine.erc20_abi is None:
+        return
+    try:
+        head = await pool.call(lambda w3: w3.eth.block_number, race=True)
+    except NoHealthyEndpointError as e:
+        logging.critical(f"ON-CHAIN AGENT: Could not reach any RPC endpoint ({e}). Terminating patrol.")
+        return
+
+    # Nonces normally come from batched pool calls; this sync client is only the per-address fallback.
+    # Price and token-metadata multicalls run on it off the event loop.
+    sync_w3 = Web3(Web3.HTTPProvider(pool.best_url()))
+    initialize_db()
+    await asyncio.to_thread(engine.load_token_metadata, sync_w3)
+    # Decoding needs no provider; contracts and decoders are built once.
+    engine.transfer_decoders = engine.build_transfer_decoders(Web3())
+    engine.transfer_addresses = [Web3.to_checksum_address(address) for address in engine.transfer_decoders]
+    engine.fresh_wallets = FreshWalletClassifier(sync_w3, engine.FRESH_WALLET_TX_COUNT)
+    engine.price_oracle = PriceOracle(sync_w3, engine.TARGET_TOKENS)
+    await asyncio.to_thread(engine.load_baselines)
+    latest_block = await asyncio.to_thread(engine.resume_block, engine.scan_target(head))
+    health_checks = asyncio.create_task(pool.run_health_checks())
+    if ready_event is not None:
+        ready_event.set()
+    logging.info(f"ON-CHAIN AGENT: Async patrol started across {len(pool.endpoints)} RPC endpoints. "
+                 f"Monitoring {len(engine.TARGET_TOKENS)} tokens...")
+
+    try:
+        if engine.WS_RPC_URL:
+            await stream_transfers(pool, engine.WS_RPC_URL, latest_block)
+            return
+        throttled = 0  # Consecutive cycles on which every endpoint was rate limiting
+        while True:
+            try:
+                new_block = await pool.call(lambda w3: w3.eth.block_number, race=True)
+                target_block = engine.scan_target(new_block)
+                if target_block > latest_block:
+                    latest_block = await follow_chain(pool, latest_block, target_block)
+                if engine.PROVISIONAL_SIGNALS:
+                    latest_block = await asyncio.to_thread(
+                        engine.finalize, new_block, latest_block, header_reader(pool, asyncio.get_running_loop()))
+                throttled = 0
+                await asyncio.sleep(engine.POLLING_INTERVAL)
+            except NoHealthyEndpointError as e:
+                if engine.is_rate_limit_error(e):
+                    # Every endpoint is throttling: each was failed over (and ejected), back off too.
+                    throttled += 1
+                    logging.warning(f"ON-CHAIN AGENT: Every RPC endpoint is rate limiting; "
+                                    f"backing off {engine.rate_limit_delay(throttled)}s.")
+                    await asyncio.sleep(engine.rate_limit_delay(throttled))
+                    continue
+                logging.error(f"ON-CHAIN AGENT: No healthy RPC endpoint: {e}. Pool: {pool.snapshot()}")
+                await asyncio.sleep(engine.POLLING_INTERVAL)
+            except Exception as e:
+                logging.error(f"ON-CHAIN AGENT: An unexpected error occurred: {e}", exc_info=True)
+                await asyncio.sleep(engine.POLLING_INTERVAL)
+    finally:
+        health_checks.cancel()
+
+async def run_until_stopped(rpc_urls=None, stop_event=None, ready_event=None):
+    """Runs the patrol and cancels it once the (thread-side) `stop_event` is set."""
+    task = asyncio.create_task(patrol(rpc_urls, ready_event))
+    while not task.done():
+        if stop_event is not None and stop_event.is_set():
+            task.cancel()
+            break
+        await asyncio.wait({task}, timeout=STOP_POLL_INTERVAL)
+    try:
+        await task
+    except asyncio.CancelledError:
+        # Chunks are checkpointed as they finish; an interrupted one is re-scanned on restart.
+        logging.info("ON-CHAIN AGENT: Patrol stopped.")
+
+def start_onchain_patrol_async(rpc_urls=None, stop_event=None, ready_event=None):
+    """
+    Entry point with the same contract as engine.start_onchain_patrol,
+    so main.py can run it in an agent thread.
+    """
+    try:
+        asyncio.run(run_until_stopped(rpc_urls, stop_event, ready_event))
+    except KeyboardInterrupt:
+        logging.info("ON-CHAIN AGENT: Shutdown signal received. Terminating patrol.")
+
+if __name__ == "__main__":
+    # This block allows the script to be run standalone for testing purposes.
+    print("--- Running Async On-Chain Agent in standalone test mode ---")
+    configure_logging()
+    bus.add_listener(persist_signal)
+    start_onchain_patrol_async()
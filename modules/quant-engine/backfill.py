@@ -0,0 +1,185 @@
+"""
+ARKHEION-X: Historical Backfill v1.0 (Module Edition)
+
+Seeds the signals database with history. A block range is split into chunks
+that are fetched concurrently (bounded by --workers) with one multi-token
+eth_getLogs each. Chunk size adapts as it goes: it shrinks when a provider
+rejects a range as too large and grows again after quiet successes. Decoded
+Transfers go through the live agent's scoring and classification
+(engine.select_significant), dated by their block, and inserts are idempotent,
+so overlapping or repeated backfills never duplicate signals.
+
+Usage (from the repository root):
+    python modules/quant-engine/backfill.py --from-block 250000000 --to-block 251000000
+    python modules/quant-engine/backfill.py --days 7 --workers 8
+
+Note: fresh-wallet classification uses each receiver's *current* nonce. Prices
+are read at each chunk's blocks, which needs an RPC with archive state; other
+providers fall back to the current price. Transfers are scored against the
+saved anomaly baselines, which the backfill updates in memory but never saves:
+the live agent owns them. With ONCHAIN_CONFIRMATIONS set, the default
+--to-block is the last block with that many confirmations, and backfilled
+signals are never provisional: the live agent's reorg checks only cover the
+blocks it scanned itself.
+"""
+import sys
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from web3 import Web3
+
+import engine
+from database import initialize_db, persist_signal, flush_signals
+from signal_bus import bus
+from wallet_classifier import FreshWalletClassifier
+from price_oracle import PriceOracle
+from settings import configure_logging
+
+# --- Configuration ---
+DEFAULT_WORKERS = 4
+INITIAL_CHUNK_SIZE = 2000
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 50000
+GROWTH_FACTOR = 1.5          # Applied after a chunk returns fewer than QUIET_CHUNK_LOGS logs
+QUIET_CHUNK_LOGS = 1000
+MAX_RANGE_ATTEMPTS = 5       # Non-range errors tolerated per block range before giving up
+ARBITRUM_BLOCKS_PER_DAY = 345600  # ~0.25s blocks, used to translate --days into a block range
+
+class AdaptiveChunker:
+    """Hands out block ranges whose size follows what the provider accepts."""
+
+    def __init__(self, from_block, to_block, chunk_size=INITIAL_CHUNK_SIZE):
+        self.next_block = from_block
+        self.to_block = to_block
+        self.chunk_size = chunk_size
+        self.retries = deque()  # Ranges rejected as too large, already split in two
+
+    def has_work(self):
+        return bool(self.retries) or self.next_block <= self.to_block
+
+    def next_range(self):
+        if self.retries:
+            return self.retries.popleft()
+        start = self.next_block
+        end = min(start + int(self.chunk_size) - 1, self.to_block)
+        self.next_block = end + 1
+        return start, end
+
+    def on_success(self, log_count):
+        if log_count < QUIET_CHUNK_LOGS:
+            self.chunk_size = min(self.chunk_size * GROWTH_FACTOR, MAX_CHUNK_SIZE)
+
+    def on_too_large(self, start, end):
+        middle = (start + end) // 2
+        self.retries.extend([(start, middle), (middle + 1, end)])
+        self.chunk_size = max((end - start + 1) // 2, MIN_CHUNK_SIZE)
+
+def fetch_block_timestamps(block_numbers):
+    """Block number -> timestamp for the blocks that produced significant Transfers."""
+    return {number: engine.w3.eth.get_block(number)['timestamp'] for number in block_numbers}
+
+def handle_chunk(raw_logs, start, end):
+    """Decodes, scores and classifies one fetched chunk. Returns the number of significant Transfers."""
+    events = list(engine.decode_transfer_logs(raw_logs))
+    significant, spikes = engine.select_significant(events, (start, end))
+    if significant or spikes:
+        blocks = {event['blockNumber'] for event, _, _, _ in significant}
+        timestamps = fetch_block_timestamps(blocks | ({end} if spikes else set()))
+        engine.handle_significant(significant, spikes, timestamps)
+    return len(significant)
+
+def run_backfill(from_block, to_block, workers=DEFAULT_WORKERS, chunk_size=INITIAL_CHUNK_SIZE):
+    chunker = AdaptiveChunker(from_block, to_block, chunk_size)
+    total_blocks = to_block - from_block + 1
+    scanned_blocks = signals = 0
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Backfill") as pool:
+        in_flight = {}
+        failures = {}
+        throttled = 0  # Consecutive rate-limited requests
+        while chunker.has_work() or in_flight:
+            while chunker.has_work() and len(in_flight) < workers:
+                start, end = chunker.next_range()
+                in_flight[pool.submit(engine.get_transfer_logs, start, end)] = (start, end)
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = in_flight.pop(future)
+                try:
+                    raw_logs = future.result()
+                except Exception as e:
+                    if engine.is_rate_limit_error(e):
+                        # Throttling says nothing about this range: retry it after a growing pause.
+                        throttled += 1
+                        logging.warning(f"BACKFILL: Provider is rate limiting ({e}); "
+                                        f"backing off {engine.rate_limit_delay(throttled)}s.")
+                        chunker.retries.append((start, end))
+                        time.sleep(engine.rate_limit_delay(throttled))
+                        continue
+                    if engine.is_range_error(e) and start < end:
+                        chunker.on_too_large(start, end)
+                        logging.info(f"BACKFILL: Blocks {start}-{end} too large; chunk size now {int(chunker.chunk_size)}.")
+                        continue
+                    failures[(start, end)] = failures.get((start, end), 0) + 1
+                    if failures[(start, end)] >= MAX_RANGE_ATTEMPTS:
+                        raise RuntimeError(f"Blocks {start}-{end} failed {MAX_RANGE_ATTEMPTS} times: {e}") from e
+                    logging.error(f"BACKFILL: Blocks {start}-{end} failed ({e}); retrying.")
+                    chunker.retries.append((start, end))
+                    time.sleep(failures[(start, end)])
+                    continue
+                throttled = 0
+                chunker.on_success(len(raw_logs))
+                # Classification runs here, on one thread, so nonce lookups batch per chunk.
+                signals += handle_chunk(raw_logs, start, end)
+                scanned_blocks += end - start + 1
+                rate = scanned_blocks / max(time.monotonic() - started, 1e-6)
+                logging.info(f"BACKFILL: {scanned_blocks}/{total_blocks} blocks ({rate:,.0f} blocks/s), "
+                             f"{signals} significant transfer(s).")
+
+    flush_signals()
+    return scanned_blocks, signals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill historical Transfer signals into the ARKHEION-X database.")
+    parser.add_argument("--from-block", type=int, help="First block to scan")
+    parser.add_argument("--to-block", type=int, help="Last block to scan (default: chain head, less ONCHAIN_CONFIRMATIONS)")
+    parser.add_argument("--days", type=float, help="Scan roughly this many days back from --to-block instead of --from-block")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent get_logs requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--chunk-size", type=int, default=INITIAL_CHUNK_SIZE, help=f"Initial blocks per request (default: {INITIAL_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.from_block is None and args.days is None:
+        parser.error("one of --from-block or --days is required")
+
+    engine.w3 = engine.connect_to_rpc()
+    if not engine.w3:
+        logging.critical("BACKFILL: Could not establish RPC connection.")
+        return 1
+    engine.erc20_abi = engine.load_erc20_abi()
+    if engine.erc20_abi is None:
+        return 1
+    initialize_db()
+    engine.load_token_metadata()
+    engine.transfer_decoders = engine.build_transfer_decoders()
+    engine.transfer_addresses = [Web3.to_checksum_address(address) for address in engine.transfer_decoders]
+    engine.fresh_wallets = FreshWalletClassifier(engine.w3, engine.FRESH_WALLET_TX_COUNT)
+    engine.price_oracle = PriceOracle(engine.w3, engine.TARGET_TOKENS)
+    engine.load_baselines()
+    engine.PROVISIONAL_SIGNALS = False
+    bus.add_listener(persist_signal)
+
+    to_block = args.to_block if args.to_block is not None else engine.scan_target(engine.w3.eth.block_number)
+    from_block = args.from_block if args.from_block is not None else max(0, to_block - int(args.days * ARBITRUM_BLOCKS_PER_DAY))
+    logging.info(f"BACKFILL: Scanning blocks {from_block}-{to_block} with {args.workers} worker(s)...")
+
+    scanned_blocks, signals = run_backfill(from_block, to_block, args.workers, args.chunk_size)
+    logging.info(f"BACKFILL: Done. {scanned_blocks} blocks scanned, {signals} significant transfer(s) classified.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
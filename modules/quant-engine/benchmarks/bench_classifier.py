@@ -0,0 +1,73 @@
+"""
+ARKHEION-X: Commit Classifier Benchmark
+
+Measures commit-classification throughput over a seeded synthetic corpus and
+compares the compiled classifier with the old per-keyword substring test.
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/bench_classifier.py --commits 200000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commit_classifier import CommitClassifier
+
+# The keyword list code_intel.py used before the classifier, for comparison.
+LEGACY_KEYWORDS = ["fix", "patch", "exploit", "vulnerability", "security", "emergency", "hotfix", "critical"]
+
+FILLER_WORDS = (
+    "update refactor prefix dispatch rename bump deps readme tests cleanup lint "
+    "pool router factory oracle vault token governance docs module handler config "
+    "add remove improve support migrate adjust build release version changelog"
+).split()
+SIGNAL_PHRASES = [
+    "fix reentrancy in withdraw", "emergency pause", "patch oracle manipulation vector",
+    "security: harden access control", "hotfix for overflow", "fixes #1234",
+]
+PATHS = [
+    "contracts/Vault.sol", "contracts/Pool.sol", "src/router.ts", "docs/guide.md",
+    "README.md", "test/Vault.t.sol", ".github/workflows/ci.yml", "scripts/deploy.js",
+]
+
+def build_corpus(size, seed, signal_ratio):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(4, 16))
+        if rng.random() < signal_ratio:
+            words.insert(rng.randint(0, len(words)), rng.choice(SIGNAL_PHRASES))
+        corpus.append((" ".join(words), rng.sample(PATHS, rng.randint(1, 3))))
+    return corpus
+
+def legacy_classify(message):
+    lowered = message.lower()
+    return [keyword for keyword in LEGACY_KEYWORDS if keyword in lowered]
+
+def timed(label, fn, corpus):
+    started = time.perf_counter()
+    hits = sum(1 for message, files in corpus if fn(message, files))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {len(corpus) / elapsed:>12,.0f} commits/s   {hits:>8,} flagged")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark commit classification throughput.")
+    parser.add_argument("--commits", type=int, default=200000, help="Synthetic commits to classify (default: 200000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--signal-ratio", type=float, default=0.05, help="Share of commits containing a sensitive phrase")
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.commits, args.seed, args.signal_ratio)
+    classifier = CommitClassifier()
+    print(f"Corpus: {len(corpus):,} commits (seed {args.seed}, signal ratio {args.signal_ratio})")
+    timed("substring (legacy)", lambda message, files: legacy_classify(message), corpus)
+    timed("compiled, message only", lambda message, files: classifier.classify(message).score >= 2, corpus)
+    timed("compiled, message + paths", lambda message, files: classifier.classify(message, files).score >= 2, corpus)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+Shared setup for the pytest-benchmark tests.
+
+The scenarios are run_benchmarks.py's; this runs them on a database seeded
+once per session. --bench-scale multiplies every volume, as --scale does for
+the standalone runner.
+
+Run from the repository root:
+    python -m pytest modules/quant-engine/benchmarks --bench-scale 0.1
+"""
+import logging
+
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-scale", type=float, default=1.0, help="Multiplies every benchmark volume (default: 1.0)")
+
+@pytest.fixture(scope="session")
+def bench_context(request, tmp_path_factory):
+    """A run context on a freshly seeded database, shared by every benchmark."""
+    import database
+    from run_benchmarks import DEFAULT_ROUNDS, DEFAULT_SEED_ROWS, Context
+    scale = request.config.getoption("--bench-scale")
+    ctx = Context(str(tmp_path_factory.mktemp("bench")), scale, 42, DEFAULT_ROUNDS)
+    ctx.seed_database(int(DEFAULT_SEED_ROWS * scale))
+    logging.disable(logging.CRITICAL)
+    yield ctx
+    logging.disable(logging.NOTSET)
+    database.shutdown_signal_sink()
@@ -0,0 +1,116 @@
+"""
+ARKHEION-X: Fake Alert Receiver
+
+A local stand-in for the alert channels of alerts.py: the Telegram Bot API's
+sendMessage (POST /bot<token>/sendMessage) and a webhook (POST to any other
+path). Every message received is recorded, so a benchmark or a manual test
+can check what was delivered, how it was coalesced and how often.
+
+Failures can be injected: `fail_next(count, status)` answers the next `count`
+messages with `status` (429 replies carry a Retry-After header and Telegram's
+`parameters.retry_after`), to exercise the dispatcher's backoff.
+
+Point alerts at the printed URL to use it:
+    TELEGRAM_BOT_TOKEN=test TELEGRAM_CHAT_ID=1 with alerts.TELEGRAM_API = <url>
+    ALERT_WEBHOOK_URL=<url>/webhook
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/fake_alerts.py --port 8700
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Configuration ---
+RETRY_AFTER_SECONDS = 1
+
+class FakeAlertReceiver:
+    """Records every message POSTed to it; see the module docstring."""
+
+    def __init__(self):
+        self.messages = []  # (path, body) in arrival order
+        self.requests = 0
+        self.failures = 0
+        self._fail = []  # Statuses for the next requests
+        self._lock = threading.Lock()
+
+    def fail_next(self, count, status=429):
+        with self._lock:
+            self._fail.extend([status] * count)
+
+    def receive(self, path, body):
+        """Returns the status to answer with."""
+        with self._lock:
+            self.requests += 1
+            if self._fail:
+                self.failures += 1
+                return self._fail.pop(0)
+            self.messages.append((path, body))
+            return 200
+
+class AlertHandler(BaseHTTPRequestHandler):
+    receiver = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return self._reply(400, {"ok": False, "description": "Bad Request: invalid JSON"})
+        telegram = self.path.endswith("/sendMessage")
+        if telegram and not (isinstance(body, dict) and body.get("chat_id") and body.get("text")):
+            return self._reply(400, {"ok": False, "description": "Bad Request: chat_id and text are required"})
+        status = self.receiver.receive(self.path, body)
+        if status == 429:
+            return self._reply(429, {"ok": False, "description": "Too Many Requests",
+                                     "parameters": {"retry_after": RETRY_AFTER_SECONDS}},
+                               {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        if status != 200:
+            return self._reply(status, {"ok": False, "description": "Injected failure"})
+        self._reply(200, {"ok": True, "result": {"message_id": self.receiver.requests}} if telegram else {"ok": True})
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(receiver, port=0, host="127.0.0.1"):
+    """Serves `receiver` from a background thread. Returns (server, url)."""
+    handler = type("FakeAlertHandler", (AlertHandler,), {"receiver": receiver})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Fake-Alerts", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receive and print alert messages.")
+    parser.add_argument("--port", type=int, default=8700)
+    args = parser.parse_args(argv)
+
+    receiver = FakeAlertReceiver()
+    server, url = serve(receiver, args.port)
+    print(f"Fake alert receiver at {url} (Telegram API base, or {url}/webhook). Ctrl+C to stop.")
+    printed = 0
+    try:
+        while True:
+            time.sleep(1)
+            for path, body in receiver.messages[printed:]:
+                print(f"--- {path}\n{body.get('text') if isinstance(body, dict) else body}")
+            printed = len(receiver.messages)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+ARKHEION-X: Fake GitHub API Server
+
+A local stand-in for the part of the GitHub REST API the off-chain agent
+uses: the commit list of a repository (newest first, paged with Link headers,
+ETag / If-None-Match answered with 304) and single commits with their changed
+files. Rate-limit headers are sent the way GitHub sends them.
+
+Commits are synthetic and seeded. They appear at a configurable rate per
+repository, either on a wall-clock timer (--commits-per-minute) or when a
+benchmark calls `add_commits()` explicitly, so polling cost can be measured
+for any commit volume.
+
+Point code_intel.GITHUB_API at the printed URL to use it.
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/fake_github.py --repos 20 --commits-per-minute 30
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Configuration ---
+RATE_LIMIT = 5000
+SENSITIVE_SHARE = 0.05  # Share of commits whose message carries a security keyword
+
+FILLER_WORDS = (
+    "update refactor prefix dispatch rename bump deps readme tests cleanup lint "
+    "pool router factory oracle vault token governance docs module handler config"
+).split()
+SENSITIVE_PHRASES = ["fix reentrancy in withdraw", "emergency pause", "patch oracle manipulation vector",
+                     "security: harden access control", "hotfix for overflow"]
+PATHS = ["contracts/Vault.sol", "contracts/Pool.sol", "src/router.ts", "docs/guide.md",
+         "README.md", "test/Vault.t.sol", "scripts/deploy.js"]
+
+class FakeGitHub:
+    """Per-repository synthetic commit histories; see the module docstring."""
+
+    def __init__(self, repos, seed=42, commits_per_minute=0.0, initial_commits=5):
+        self.seed = seed
+        self.commits_per_minute = commits_per_minute
+        self.counts = {repo: initial_commits for repo in repos}
+        self.started = time.monotonic()
+        self.requests = 0
+        self.not_modified = 0
+        self.shas = {}  # sha -> (repo, index) of every commit listed so far
+        self._lock = threading.Lock()
+
+    def add_commits(self, count, repos=None):
+        """Makes `count` new commits appear in each of `repos` (default: every repository)."""
+        with self._lock:
+            for repo in repos or list(self.counts):
+                self.counts[repo] += count
+
+    def head(self, repo):
+        """Number of commits `repo` has now."""
+        timed = int((time.monotonic() - self.started) / 60 * self.commits_per_minute)
+        return self.counts[repo] + timed
+
+    def commit(self, repo, index, base_url):
+        rng = random.Random(f"{self.seed}:{repo}:{index}")
+        words = rng.choices(FILLER_WORDS, k=rng.randint(4, 12))
+        if rng.random() < SENSITIVE_SHARE:
+            words.insert(rng.randint(0, len(words)), rng.choice(SENSITIVE_PHRASES))
+        sha = hashlib.sha1(f"{self.seed}:{repo}:{index}".encode()).hexdigest()
+        self.shas[sha] = (repo, index)
+        return {
+            "sha": sha,
+            "commit": {"message": " ".join(words)},
+            "html_url": f"{base_url}/{repo}/commit/{sha}",
+            "files": [{"filename": path} for path in rng.sample(PATHS, rng.randint(1, 3))],
+        }
+
+    def list_commits(self, repo, page, per_page, base_url):
+        head = self.head(repo)
+        newest = head - (page - 1) * per_page
+        indexes = range(newest - 1, max(newest - per_page, 0) - 1, -1)
+        commits = []
+        for index in indexes:
+            commit = self.commit(repo, index, base_url)
+            del commit["files"]
+            commits.append(commit)
+        has_next = newest - per_page > 0
+        return commits, head, has_next
+
+class GitHubHandler(BaseHTTPRequestHandler):
+    github = None
+
+    def do_GET(self):
+        github = self.github
+        with github._lock:
+            github.requests += 1
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+        base_url = f"http://{self.headers.get('Host')}"
+        if len(parts) < 4 or parts[0] != "repos" or parts[3] != "commits":
+            return self._reply(404, {"message": "Not Found"})
+        repo = f"{parts[1]}/{parts[2]}"
+        if repo not in github.counts:
+            return self._reply(404, {"message": "Not Found"})
+        if len(parts) == 5:
+            found = github.shas.get(parts[4])
+            if found is None or found[0] != repo:
+                return self._reply(404, {"message": "No commit found for SHA"})
+            return self._reply(200, github.commit(repo, found[1], base_url))
+
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        commits, head, has_next = github.list_commits(repo, page, per_page, base_url)
+        etag = f'"{repo}:{head}:{page}"'
+        if self.headers.get("If-None-Match") == etag:
+            with github._lock:
+                github.not_modified += 1
+            return self._reply(304, None, {"ETag": etag})
+        headers = {"ETag": etag}
+        if has_next:
+            headers["Link"] = f'<{base_url}{url.path}?per_page={per_page}&page={page + 1}>; rel="next"'
+        self._reply(200, commits, headers)
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(max(RATE_LIMIT - self.github.requests, 0)))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(github, port=0, host="127.0.0.1"):
+    """Serves `github` from a background thread. Returns (server, url)."""
+    handler = type("FakeGitHubHandler", (GitHubHandler,), {"github": github})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Fake-GitHub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic GitHub commit histories.")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repos", type=int, default=4, help="Repositories to serve, named bench/repo-<n> (default: 4)")
+    parser.add_argument("--commits-per-minute", type=float, default=10.0, help="New commits per repository per minute")
+    args = parser.parse_args(argv)
+
+    repos = [f"bench/repo-{index}" for index in range(args.repos)]
+    github = FakeGitHub(repos, args.seed, args.commits_per_minute)
+    server, url = serve(github, args.port)
+    print(f"Fake GitHub serving {len(repos)} repositories at {url}. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+ARKHEION-X: Fake Arbitrum JSON-RPC Server
+
+A local stand-in for an Arbitrum RPC endpoint that serves a synthetic,
+reproducible chain of ERC20 Transfer logs. Every block's logs are derived from
+(seed, block number) alone, so any range can be requested in any order and a
+run with the same settings always sees the same chain. `reorg(depth)` replaces
+the newest `depth` blocks with a new branch (other hashes, other logs), to
+exercise the agent's reorg handling (block_tracker.py).
+
+Supported methods: web3_clientVersion, net_version, eth_chainId,
+eth_blockNumber, eth_getBlockByNumber, eth_getLogs, eth_getTransactionCount
+(single and JSON-RPC batches). eth_call is not served: give benchmark tokens
+their decimals, symbol and a "fixed" price so no contract reads are needed.
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/fake_rpc.py --port 8545 --transfers-per-block 20
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Configuration ---
+CHAIN_ID = 42161
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+DEFAULT_HEAD = 250_000_000
+BLOCK_TIME = 0.25             # Seconds between blocks when the head advances
+WALLET_POOL_SIZE = 20000      # Distinct senders/receivers the transfers are drawn from
+FRESH_WALLET_SHARE = 0.1      # Share of wallets whose nonce is below engine.FRESH_WALLET_TX_COUNT
+LARGE_TRANSFER_SHARE = 0.05   # Share of transfers worth more than engine.MIN_TRANSFER_VALUE_USD (at $1)
+
+# The engine's default target tokens, with the metadata a benchmark pins instead of reading on-chain.
+DEFAULT_TOKENS = [
+    ("0xaf88d065e77c8cC2239327C5EDb3A432268e5831", 6),    # USDC
+    ("0x912CE59144191C1204E64559FE8253a0e49E6548", 18),   # ARB
+]
+
+def _hex(value):
+    return hex(value)
+
+def _word(value):
+    return "0x" + format(value, "064x")
+
+def _address_topic(address):
+    return "0x" + "0" * 24 + address[2:].lower()
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+class FakeChain:
+    """Deterministic Transfer logs per block; see the module docstring."""
+
+    def __init__(self, seed=42, transfers_per_block=10, tokens=DEFAULT_TOKENS, head=DEFAULT_HEAD,
+                 advance=False, max_block_range=None, max_logs=None, latency=0.0):
+        self.seed = seed
+        self.transfers_per_block = transfers_per_block
+        self.tokens = [(address.lower(), decimals) for address, decimals in tokens]
+        self.start_head = head
+        self.advance = advance
+        self.max_block_range = max_block_range
+        self.max_logs = max_logs
+        self.latency = latency
+        self.started = time.monotonic()
+        rng = random.Random(seed)
+        self.wallets = ["0x" + format(rng.getrandbits(160), "040x") for _ in range(WALLET_POOL_SIZE)]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.forks = []  # Blocks above each of these belong to one more replacement branch
+
+    def reorg(self, depth):
+        """Replaces the newest `depth` blocks (up to the current head) with a new branch."""
+        with self._lock:
+            self.forks.append(self.head() - depth)
+
+    def branch(self, number):
+        return sum(1 for fork in self.forks if number > fork)
+
+    def head(self):
+        if not self.advance:
+            return self.start_head
+        return self.start_head + int((time.monotonic() - self.started) / BLOCK_TIME)
+
+    def block_hash(self, number):
+        branch = self.branch(number)
+        label = f"{self.seed}:block:{number}" if not branch else f"{self.seed}:{branch}:block:{number}"
+        return "0x" + hashlib.sha256(label.encode()).hexdigest()
+
+    def block_timestamp(self, number):
+        # Anchored so the head block is "now" at startup.
+        return int(time.time() - (self.start_head - number) * BLOCK_TIME)
+
+    def nonce(self, address):
+        digest = int.from_bytes(hashlib.sha256(f"{self.seed}:nonce:{address.lower()}".encode()).digest()[:4], "big")
+        if digest % 1000 < FRESH_WALLET_SHARE * 1000:
+            return digest % 5
+        return 5 + digest % 5000
+
+    def block_logs(self, number):
+        branch = self.branch(number)
+        rng = random.Random(self.seed * 1_000_003 + number + branch * 7_919_000_001)
+        count = rng.randint(0, 2 * self.transfers_per_block) if self.transfers_per_block else 0
+        block_hash = self.block_hash(number)
+        logs = []
+        for index in range(count):
+            address, decimals = rng.choice(self.tokens)
+            # Log-uniform amounts between 1 and 1M tokens; the top slice is "significant".
+            whole = 10 ** rng.uniform(0, 4) if rng.random() > LARGE_TRANSFER_SHARE else 10 ** rng.uniform(4, 6)
+            value = int(whole * 10 ** decimals)
+            label = f"{self.seed}:tx:{number}:{index}" if not branch else f"{self.seed}:{branch}:tx:{number}:{index}"
+            tx_hash = "0x" + hashlib.sha256(label.encode()).hexdigest()
+            logs.append({
+                "address": address,
+                "topics": [TRANSFER_TOPIC, _address_topic(rng.choice(self.wallets)), _address_topic(rng.choice(self.wallets))],
+                "data": _word(value),
+                "blockNumber": _hex(number),
+                "blockHash": block_hash,
+                "transactionHash": tx_hash,
+                "transactionIndex": _hex(index),
+                "logIndex": _hex(index),
+                "removed": False,
+            })
+        return logs
+
+    def get_logs(self, params):
+        head = self.head()
+        from_block = self._block_param(params.get("fromBlock", "latest"), head)
+        to_block = self._block_param(params.get("toBlock", "latest"), head)
+        if self.max_block_range and to_block - from_block + 1 > self.max_block_range:
+            raise RPCError(-32005, f"block range too large: max {self.max_block_range} blocks")
+        addresses = params.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        wanted = {address.lower() for address in addresses} if addresses else None
+        logs = []
+        for number in range(from_block, min(to_block, head) + 1):
+            logs.extend(log for log in self.block_logs(number) if wanted is None or log["address"] in wanted)
+            if self.max_logs and len(logs) > self.max_logs:
+                raise RPCError(-32005, f"query returned more than {self.max_logs} results")
+        return logs
+
+    def handle(self, request):
+        """Answers one JSON-RPC request object."""
+        with self._lock:
+            self.requests += 1
+        method, params = request.get("method"), request.get("params") or []
+        try:
+            if method == "web3_clientVersion":
+                result = "ARKHEION-X/fake-rpc"
+            elif method == "net_version":
+                result = str(CHAIN_ID)
+            elif method == "eth_chainId":
+                result = _hex(CHAIN_ID)
+            elif method == "eth_blockNumber":
+                result = _hex(self.head())
+            elif method == "eth_getBlockByNumber":
+                number = self._block_param(params[0], self.head())
+                result = {
+                    "number": _hex(number), "hash": self.block_hash(number),
+                    "parentHash": self.block_hash(number - 1), "timestamp": _hex(self.block_timestamp(number)),
+                    "transactions": [],
+                }
+            elif method == "eth_getLogs":
+                result = self.get_logs(params[0])
+            elif method == "eth_getTransactionCount":
+                result = _hex(self.nonce(params[0]))
+            else:
+                raise RPCError(-32601, f"Method {method} is not served by the fake chain")
+        except RPCError as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": e.code, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    # --- Internals ---
+    def _block_param(self, value, head):
+        if value in ("latest", "safe", "finalized", "pending"):
+            return head
+        if value == "earliest":
+            return 0
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+class RPCHandler(BaseHTTPRequestHandler):
+    chain = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.chain.latency:
+            time.sleep(self.chain.latency)
+        response = [self.chain.handle(item) for item in body] if isinstance(body, list) else self.chain.handle(body)
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(chain, port=0, host="127.0.0.1"):
+    """Serves `chain` from a background thread. Returns (server, url)."""
+    handler = type("FakeChainHandler", (RPCHandler,), {"chain": chain})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Fake-RPC", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic Arbitrum chain of ERC20 Transfers over JSON-RPC.")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--transfers-per-block", type=int, default=10, help="Mean Transfer logs per block (default: 10)")
+    parser.add_argument("--head", type=int, default=DEFAULT_HEAD, help=f"Head block number (default: {DEFAULT_HEAD})")
+    parser.add_argument("--advance", action="store_true", help=f"Advance the head every {BLOCK_TIME}s")
+    parser.add_argument("--max-block-range", type=int, help="Reject eth_getLogs ranges wider than this")
+    parser.add_argument("--max-logs", type=int, help="Reject eth_getLogs results longer than this")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every HTTP request")
+    args = parser.parse_args(argv)
+
+    chain = FakeChain(args.seed, args.transfers_per_block, head=args.head, advance=args.advance,
+                      max_block_range=args.max_block_range, max_logs=args.max_logs, latency=args.latency)
+    server, url = serve(chain, args.port)
+    print(f"Fake chain serving at {url} (head {chain.head()}). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
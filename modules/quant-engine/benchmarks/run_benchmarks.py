@@ -0,0 +1,468 @@
+"""
+ARKHEION-X: Benchmark Suite
+
+Runs the agents' hot paths against local stand-ins, so a change to
+engine.py, code_intel.py, correlator.py or the dashboard queries can be
+measured without a live RPC or the GitHub API:
+
+    ingest_blocks          engine.scan_block_range over the fake chain (blocks/s)
+    log_signal_writes      database.log_signal + flush through the batch writer (rows/s)
+    correlator_cycle       CorrelationEngine.run_cycle over newly written signals (rows/s)
+    dashboard_cached_page  the in-memory path of dashboard.load_and_process_data
+    dashboard_sql_page     the SQLite path of dashboard.load_and_process_data
+    offchain_poll          code_intel.check_repos against the fake GitHub (commits/s)
+    classify_commits       CommitClassifier.classify over a synthetic corpus (commits/s)
+    alert_dispatch         AlertDispatcher.run_cycle delivering the outbox to the fake
+                           webhook receiver, coalesced per repository (alerts/s)
+    startup_<entry point>  import time of what `arkheionx run <agent>` (or the dashboard)
+                           loads before the agent starts, in a fresh interpreter
+
+Everything runs in a scratch directory on a database seeded by seed_db.py.
+Results are written as JSON in the layout pytest-benchmark uses (per
+benchmark: name, group, params, stats, extra_info), and --compare prints the
+change of every mean against an earlier report. Scenarios whose dependencies
+are not installed are reported as skipped.
+
+The same scenarios run as pytest-benchmark tests (test_benchmarks.py), which
+adds pytest-benchmark's own storage, comparison and histogram options.
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/run_benchmarks.py --output before.json
+    python modules/quant-engine/benchmarks/run_benchmarks.py --output after.json --compare before.json
+    python -m pytest modules/quant-engine/benchmarks --benchmark-autosave
+"""
+import os
+import sys
+import json
+import time
+import re
+import random
+import logging
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE_DIR = os.path.dirname(BENCH_DIR)
+REPO_DIR = os.path.dirname(os.path.dirname(MODULE_DIR))
+sys.path.insert(0, MODULE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import database
+import seed_db
+
+# --- Configuration ---
+REPORT_VERSION = "1.0"
+DEFAULT_ROUNDS = 5
+DEFAULT_SEED_ROWS = 200000    # --scale multiplies every volume below
+BLOCKS_PER_ROUND = 2000
+TRANSFERS_PER_BLOCK = 10
+WRITES_PER_ROUND = 20000
+CORRELATOR_ROWS_PER_ROUND = 5000
+BENCH_REPOS = 8
+COMMITS_PER_ROUND = 25        # Per repository
+CLASSIFIER_COMMITS = 100000
+ALERTS_PER_ROUND = 2000
+
+# Entry point -> modules it imports before its agent can start (the CLI imports agents lazily).
+STARTUP_IMPORTS = {
+    "cli": ["arkheionx.cli"],
+    "correlator": ["arkheionx.cli", "correlator"],
+    "offchain": ["arkheionx.cli", "code_intel"],
+    "onchain": ["arkheionx.cli", "engine", "async_engine"],
+    "archiver": ["arkheionx.cli", "archive"],
+    "alerts": ["arkheionx.cli", "alerts"],
+    # dashboard.py renders on import; these are its imports.
+    "dashboard": ["streamlit", "plotly.express", "signal_cache", "archive"],
+}
+
+SCENARIOS = []
+
+def scenario(name, group, unit):
+    """Registers a benchmark. The function gets the run context and returns a Round."""
+    def register(fn):
+        SCENARIOS.append((name, group, unit, fn))
+        return fn
+    return register
+
+class Round:
+    """
+    What one benchmark round runs: `prepare()` (untimed, e.g. writing the rows to process),
+    then `work()` (timed), which handles `units` units. A `self_timed` work returns its own
+    duration in seconds instead (e.g. measured inside a child process).
+    """
+
+    def __init__(self, work, units, prepare=None, close=None, params=None, extra_info=None, self_timed=False):
+        self.work = work
+        self.units = units
+        self.prepare = prepare
+        self.close = close or (lambda: None)
+        self.params = params or {}
+        self.extra_info = extra_info if extra_info is not None else {}
+        self.self_timed = self_timed
+
+    def run(self):
+        """Runs one round. Returns (seconds, units)."""
+        if self.prepare is not None:
+            self.prepare()
+        elapsed, result = timed(self.work)
+        return (result if self.self_timed else elapsed), self.units
+
+class Context:
+    def __init__(self, workdir, scale, seed, rounds):
+        self.workdir = workdir
+        self.scale = scale
+        self.seed = seed
+        self.rounds = rounds
+        self.db_file = os.path.join(workdir, "bench.db")
+        self.persisting = False
+
+    def seed_database(self, rows):
+        """Points the agents at a fresh database of `rows` seeded signals. Returns the seconds it took."""
+        database.DB_FILE = self.db_file
+        seconds, _ = timed(seed_db.generate, self.db_file, rows, 30, self.seed)
+        return seconds
+
+    def persist_signals(self):
+        """Wires the bus to the batch writer once, as main.py does."""
+        from signal_bus import bus
+        if not self.persisting:
+            bus.add_listener(database.persist_signal)
+            self.persisting = True
+
+    def volume(self, base):
+        return max(1, int(base * self.scale))
+
+def stats_of(times, units):
+    """pytest-benchmark style statistics over per-round durations, plus throughput."""
+    ordered = sorted(times)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else [ordered[0]] * 3
+    mean = statistics.fmean(ordered)
+    return {
+        "min": ordered[0], "max": ordered[-1], "mean": mean,
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "median": statistics.median(ordered), "iqr": quartiles[2] - quartiles[0],
+        "rounds": len(ordered), "ops": 1 / mean if mean else 0.0,
+        "throughput": sum(units) / sum(times) if sum(times) else 0.0,
+    }
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+# --- Scenarios ---
+@scenario("ingest_blocks", "ingest", "blocks")
+def bench_ingest(ctx):
+    from web3 import Web3
+    import engine
+    import fake_rpc
+    from wallet_classifier import FreshWalletClassifier
+    from price_oracle import PriceOracle
+
+    chain = fake_rpc.FakeChain(ctx.seed, TRANSFERS_PER_BLOCK)
+    server, url = fake_rpc.serve(chain)
+    # Metadata and prices are pinned so the fake chain never has to answer eth_call.
+    engine.TARGET_TOKENS.clear()
+    engine.TARGET_TOKENS.update({
+        "USDC": {"address": "0xaf88d065e77c8cC2239327C5EDb3A432268e5831", "decimals": 6, "symbol": "USDC",
+                 "price": {"type": "fixed", "price": 1.0}},
+        "ARB": {"address": "0x912CE59144191C1204E64559FE8253a0e49E6548", "decimals": 18, "symbol": "ARB",
+                "price": {"type": "fixed", "price": 0.8}},
+    })
+    engine.w3 = Web3(Web3.HTTPProvider(url))
+    with open(os.path.join(MODULE_DIR, "erc20_abi.json")) as f:
+        engine.erc20_abi = json.load(f)
+    engine.transfer_decoders = engine.build_transfer_decoders()
+    engine.transfer_addresses = [Web3.to_checksum_address(address) for address in engine.transfer_decoders]
+    engine.fresh_wallets = FreshWalletClassifier(engine.w3, engine.FRESH_WALLET_TX_COUNT)
+    engine.price_oracle = PriceOracle(engine.w3, engine.TARGET_TOKENS)
+    engine.token_checkpoints = {}
+    ctx.persist_signals()
+
+    blocks = ctx.volume(BLOCKS_PER_ROUND)
+    next_block = [chain.head() - (ctx.rounds + 1) * blocks]
+
+    def scan_next_range():
+        from_block = next_block[0]
+        next_block[0] += blocks
+        engine.scan_block_range(from_block, from_block + blocks - 1)
+    return Round(scan_next_range, blocks, close=server.shutdown,
+                 params={"blocks_per_round": blocks, "transfers_per_block": TRANSFERS_PER_BLOCK})
+
+@scenario("log_signal_writes", "db", "rows")
+def bench_log_signal(ctx):
+    writes = ctx.volume(WRITES_PER_ROUND)
+    counter = [0]
+
+    def write_batch():
+        for _ in range(writes):
+            counter[0] += 1
+            database.log_signal("Benchmark", "Large Token Transfer",
+                                {"token": "USDC", "tx_hash": f"0xbench{counter[0]:x}", "log_index": 0}, "HIGH")
+        database.flush_signals()
+    return Round(write_batch, writes, params={"rows_per_round": writes})
+
+@scenario("correlator_cycle", "correlator", "rows")
+def bench_correlator(ctx):
+    from correlator import CorrelationEngine, REPO_TOKENS
+    from signal_sink import INSERT_SQL, open_connection
+
+    engine = CorrelationEngine(ctx.db_file)
+    engine.start()
+    writer = open_connection(ctx.db_file)
+    rows = ctx.volume(CORRELATOR_ROWS_PER_ROUND)
+    rng = random.Random(ctx.seed)
+
+    def insert_new_signals():
+        now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        batch = []
+        for _ in range(rows):
+            if rng.random() < 0.5:
+                metadata = {"repository": rng.choice(seed_db.REPOS), "commit_sha": format(rng.getrandbits(160), "040x"),
+                            "commit_message": "fix reentrancy"}
+                batch.append((now, "Off-Chain Agent", "Sensitive Commit", json.dumps(metadata), "HIGH"))
+            else:
+                metadata = {"token": rng.choice(REPO_TOKENS[rng.choice(seed_db.REPOS)]),
+                            "from": "0x" + format(rng.getrandbits(160), "040x"),
+                            "to": "0x" + format(rng.getrandbits(160), "040x"), "amount": "50,000.00",
+                            "tx_hash": "0x" + format(rng.getrandbits(256), "064x"), "log_index": 0}
+                batch.append((now, "On-Chain Agent", "Fresh Wallet Accumulation", json.dumps(metadata), "CRITICAL"))
+        with writer:
+            writer.executemany(INSERT_SQL, batch)
+
+    def close():
+        writer.close()
+        engine.close()
+    return Round(engine.run_cycle, rows, prepare=insert_new_signals, close=close,
+                 params={"rows_per_round": rows, "window_hours": engine.window_seconds // 3600})
+
+def _recent_filter(days):
+    today = datetime.now(timezone.utc).date()
+    from signal_queries import SignalFilter
+    return SignalFilter.for_dates(today - timedelta(days=days - 1), today)
+
+@scenario("dashboard_cached_page", "dashboard", "pages")
+def bench_dashboard_cached(ctx):
+    from signal_cache import SignalFrameCache, page_of
+
+    cache = SignalFrameCache(ctx.db_file, retention_days=7)
+    refresh_seconds, refreshed = timed(cache.refresh)
+    signal_filter = _recent_filter(3)
+
+    return Round(lambda: page_of(cache.select(signal_filter)), 1, params={"filter_days": 3},
+                 extra_info={"initial_refresh_seconds": refresh_seconds, "cached_rows": refreshed})
+
+@scenario("dashboard_sql_page", "dashboard", "pages")
+def bench_dashboard_sql(ctx):
+    from signal_queries import SignalFilter, open_readonly, fetch_page
+
+    today = datetime.now(timezone.utc).date()
+    # Older than the cache retention, so load_and_process_data would page it in SQLite.
+    signal_filter = SignalFilter.for_dates(today - timedelta(days=20), today - timedelta(days=10),
+                                           confidence_levels=("CRITICAL", "HIGH"))
+    conn = open_readonly(ctx.db_file)
+    cursor = [None]
+
+    def next_page():
+        page, cursor[0] = fetch_page(conn, signal_filter, cursor[0])  # Walk deeper pages, as a user clicking "Older" would
+    return Round(next_page, 1, close=conn.close, params={"filter_days": 11})
+
+@scenario("offchain_poll", "offchain", "commits")
+def bench_offchain(ctx):
+    import code_intel
+    import fake_github
+    from concurrent.futures import ThreadPoolExecutor
+
+    repos = [f"bench/repo-{index}" for index in range(BENCH_REPOS)]
+    github = fake_github.FakeGitHub(repos, ctx.seed)
+    server, url = fake_github.serve(github)
+    code_intel.GITHUB_API = url
+    code_intel.GITHUB_PAT = "benchmark"
+    code_intel.TARGET_REPOS = repos
+    code_intel.session = code_intel.create_session()
+    code_intel.executor = ThreadPoolExecutor(max_workers=code_intel.MAX_WORKERS, thread_name_prefix="Bench-Poller")
+    ctx.persist_signals()
+    code_intel.check_repos()  # Records the current head of every repo, as the first patrol does
+    commits = ctx.volume(COMMITS_PER_ROUND)
+
+    def close():
+        code_intel.executor.shutdown()
+        server.shutdown()
+    return Round(code_intel.check_repos, commits * len(repos), prepare=lambda: github.add_commits(commits),
+                 close=close, params={"repos": len(repos), "commits_per_repo_per_round": commits})
+
+@scenario("classify_commits", "classifier", "commits")
+def bench_classifier(ctx):
+    from commit_classifier import CommitClassifier
+    from bench_classifier import build_corpus
+
+    classifier = CommitClassifier()
+    corpus = build_corpus(ctx.volume(CLASSIFIER_COMMITS), ctx.seed, 0.05)
+
+    def classify_all():
+        for message, files in corpus:
+            classifier.classify(message, files)
+    return Round(classify_all, len(corpus), params={"commits": len(corpus)})
+
+@scenario("alert_dispatch", "alerts", "alerts")
+def bench_alert_dispatch(ctx):
+    import alerts
+    import fake_alerts
+    from signal_sink import open_connection
+
+    receiver = fake_alerts.FakeAlertReceiver()
+    server, url = fake_alerts.serve(receiver)
+    sink = alerts.WebhookSink(f"{url}/webhook")
+    sink.rate_per_minute = None  # Measure the dispatcher, not the channel's rate limit
+    dispatcher = alerts.AlertDispatcher({sink.name: sink}, ctx.db_file)
+    writer = open_connection(ctx.db_file)
+    count = ctx.volume(ALERTS_PER_ROUND)
+    rng = random.Random(ctx.seed)
+
+    def enqueue_alerts():
+        with writer:
+            for _ in range(count):
+                repo = rng.choice(seed_db.REPOS)
+                payload = {"repository": repo, "commit_sha": format(rng.getrandbits(160), "040x"),
+                           "commit_message": "fix reentrancy", "move_count": 1,
+                           "moves": [{"token": "UNI", "to": "0x" + format(rng.getrandbits(160), "040x"),
+                                      "amount": "50,000.00", "value_usd_est": "$400,000.00"}]}
+                alerts.enqueue_alert(writer, repo, payload, [sink.name], delay=0)
+
+    def deliver_all():
+        messages = 0
+        while True:
+            sent = dispatcher.run_cycle()
+            if not sent:
+                bench_round.extra_info["messages_per_round"] = messages
+                return
+            messages += sent
+
+    def close():
+        writer.close()
+        dispatcher.close()
+        server.shutdown()
+    bench_round = Round(deliver_all, count, prepare=enqueue_alerts, close=close,
+                        params={"alerts_per_round": count, "max_coalesced": alerts.MAX_COALESCED})
+    return bench_round
+
+def startup_imports(modules, workdir):
+    """Seconds a fresh interpreter spends importing `modules` (interpreter startup excluded)."""
+    code = (f"import sys, time; sys.path[:0] = [{REPO_DIR!r}, {MODULE_DIR!r}]; started = time.perf_counter()\n"
+            f"import {', '.join(modules)}\nprint(time.perf_counter() - started)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=workdir)
+    if result.returncode:
+        missing = re.search(r"No module named '([^']+)'", result.stderr)
+        if missing:
+            raise ImportError(result.stderr.strip().splitlines()[-1], name=missing.group(1))
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr}")
+    return float(result.stdout.split()[-1])
+
+def startup_scenario(modules):
+    def bench_startup(ctx):
+        startup_imports(modules, ctx.workdir)  # Fails (and skips) early if a dependency is missing
+        return Round(lambda: startup_imports(modules, ctx.workdir), len(modules), params={"modules": modules},
+                     self_timed=True)
+    return bench_startup
+
+for entry_point, modules in STARTUP_IMPORTS.items():
+    scenario(f"startup_{entry_point}", "startup", "imports")(startup_scenario(modules))
+
+# --- Runner ---
+def run_scenario(ctx, name, group, unit, factory, warmup):
+    entry = {"name": name, "group": group, "params": {}, "stats": None, "extra_info": {"unit": unit}}
+    try:
+        bench_round = factory(ctx)
+    except ImportError as e:
+        entry["extra_info"]["skipped"] = f"missing dependency: {e.name or e}"
+        return entry
+    try:
+        for _ in range(warmup):
+            bench_round.run()
+        times, units = [], []
+        for _ in range(ctx.rounds):
+            elapsed, count = bench_round.run()
+            times.append(elapsed)
+            units.append(count)
+    finally:
+        bench_round.close()
+    entry["params"] = bench_round.params
+    entry["stats"] = stats_of(times, units)
+    entry["extra_info"].update(bench_round.extra_info)
+    return entry
+
+def compare(report, baseline):
+    """Prints each benchmark's mean and throughput change against a baseline report."""
+    previous = {entry["name"]: entry for entry in baseline["benchmarks"] if entry.get("stats")}
+    print(f"\n{'benchmark':<24} {'baseline mean':>14} {'mean':>12} {'change':>9}")
+    for entry in report["benchmarks"]:
+        old = previous.get(entry["name"])
+        if not entry.get("stats") or old is None or not old["stats"]["mean"]:
+            continue
+        change = (entry["stats"]["mean"] - old["stats"]["mean"]) / old["stats"]["mean"] * 100
+        print(f"{entry['name']:<24} {old['stats']['mean'] * 1000:>11.2f} ms {entry['stats']['mean'] * 1000:>9.2f} ms "
+              f"{change:>+8.1f}%")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ARKHEION-X benchmark suite and write a JSON report.")
+    parser.add_argument("--output", default="benchmark-report.json", help="Report file (default: benchmark-report.json)")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks (names or groups)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed rounds before measuring (default: 1)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies every benchmark volume (default: 1.0)")
+    parser.add_argument("--seed-rows", type=int, default=DEFAULT_SEED_ROWS, help="Signals in the seeded database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Scratch directory (default: a temporary one)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agents' log output")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="arkheionx-bench-"))
+        ctx = Context(workdir, args.scale, args.seed, args.rounds)
+        seed_rows = int(args.seed_rows * args.scale)
+        seconds = ctx.seed_database(seed_rows)
+        print(f"Seeded {seed_rows:,} signal(s) in {seconds:.1f}s.")
+
+        benchmarks = []
+        for name, group, unit, factory in SCENARIOS:
+            if args.only and name not in args.only and group not in args.only:
+                continue
+            # The agents print each flushed batch; keep the report readable.
+            quiet = stack.enter_context(open(os.devnull, "w"))
+            with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(quiet):
+                entry = run_scenario(ctx, name, group, unit, factory, args.warmup)
+            benchmarks.append(entry)
+            if entry["stats"] is None:
+                print(f"{name:<24} skipped ({entry['extra_info']['skipped']})")
+            else:
+                print(f"{name:<24} mean {entry['stats']['mean'] * 1000:>10.2f} ms   "
+                      f"{entry['stats']['throughput']:>12,.0f} {unit}/s")
+        database.shutdown_signal_sink()
+
+    report = {
+        "version": REPORT_VERSION,
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "machine_info": {"python_version": platform.python_version(), "platform": platform.platform(),
+                         "processor": platform.processor(), "cpu_count": os.cpu_count()},
+        "settings": {"rounds": args.rounds, "warmup": args.warmup, "scale": args.scale,
+                     "seed": args.seed, "seed_rows": seed_rows},
+        "benchmarks": benchmarks,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}.")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+ARKHEION-X: Seeded Signal Database Generator
+
+Fills an ARKHEION-X SQLite database with synthetic `alpha_signals` rows, the
+way the agents would have written them over the last --days days: large
+transfers, fresh-wallet accumulations and sensitive commits, with realistic
+metadata and strictly increasing ids over time. The same --seed always
+produces the same rows, so benchmark runs stay comparable.
+
+Usage (from the repository root):
+    python modules/quant-engine/benchmarks/seed_db.py --db bench.db --rows 2000000 --days 60
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate
+from signal_sink import INSERT_SQL, open_connection
+
+# --- Configuration ---
+INSERT_BATCH_SIZE = 50000
+TOKENS = [("USDC", 1.0), ("ARB", 0.8), ("WETH", 3000.0), ("GMX", 30.0)]
+REPOS = ["Uniswap/v3-core", "aave/aave-v3-core", "lidofinance/lido-dao", "smartcontractkit/chainlink"]
+COMMIT_MESSAGES = ["fix reentrancy in withdraw", "emergency pause of the vault", "patch oracle manipulation vector",
+                   "security: harden access control", "hotfix for overflow in rewards"]
+
+# Share of each signal kind among the generated rows.
+LARGE_TRANSFER_SHARE = 0.75
+FRESH_WALLET_SHARE = 0.15   # The rest are sensitive commits
+
+def synthetic_rows(rows, days, seed, now=None):
+    """Yields `rows` signal rows in time order, spread evenly over the last `days` days."""
+    rng = random.Random(seed)
+    now = now if now is not None else time.time()
+    start = now - days * 86400
+    step = days * 86400 / max(rows, 1)
+    for index in range(rows):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start + index * step))
+        kind = rng.random()
+        if kind < LARGE_TRANSFER_SHARE + FRESH_WALLET_SHARE:
+            token, price = rng.choice(TOKENS)
+            amount = 10 ** rng.uniform(4, 7) / price
+            fresh = kind >= LARGE_TRANSFER_SHARE
+            metadata = {
+                "token": token,
+                "from": "0x" + format(rng.getrandbits(160), "040x"),
+                "to": "0x" + format(rng.getrandbits(160), "040x"),
+                "amount": f"{amount:,.2f}", "value_usd_est": f"${amount * price:,.2f}",
+                "tx_hash": "0x" + format(rng.getrandbits(256), "064x"), "log_index": rng.randint(0, 300),
+                "receiver_tx_count": rng.randint(0, 4) if fresh else rng.randint(5, 5000),
+            }
+            yield (timestamp, "On-Chain Agent",
+                   "Fresh Wallet Accumulation" if fresh else "Large Token Transfer",
+                   json.dumps(metadata), "CRITICAL" if fresh else "HIGH")
+        else:
+            repo = rng.choice(REPOS)
+            score = round(rng.uniform(2.0, 12.0), 2)
+            sha = format(rng.getrandbits(160), "040x")
+            metadata = {
+                "repository": repo, "commit_sha": sha, "commit_message": rng.choice(COMMIT_MESSAGES),
+                "keywords_found": ["fix"], "severity_score": score, "sensitive_paths": ["contracts/Vault.sol"],
+                "commit_url": f"https://github.com/{repo}/commit/{sha}",
+            }
+            yield (timestamp, "Off-Chain Agent", "Sensitive Commit", json.dumps(metadata),
+                   "CRITICAL" if score >= 8 else "HIGH" if score >= 4 else "MEDIUM")
+
+def generate(db_file, rows, days=30, seed=42, batch_size=INSERT_BATCH_SIZE):
+    """Creates (or migrates) `db_file` and appends `rows` synthetic signals. Returns rows inserted."""
+    conn = open_connection(db_file)
+    try:
+        migrate(conn)
+        inserted = 0
+        batch = []
+        for row in synthetic_rows(rows, days, seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += _insert(conn, batch)
+                batch = []
+        if batch:
+            inserted += _insert(conn, batch)
+        return inserted
+    finally:
+        conn.close()
+
+def _insert(conn, batch):
+    with conn:
+        before = conn.total_changes
+        conn.executemany(INSERT_SQL, batch)
+        return conn.total_changes - before
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed an ARKHEION-X database with synthetic signals.")
+    parser.add_argument("--db", default="bench.db", help="Database file to create or extend (default: bench.db)")
+    parser.add_argument("--rows", type=int, default=1000000, help="Signals to generate (default: 1000000)")
+    parser.add_argument("--days", type=int, default=30, help="Days the signals are spread over (default: 30)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    inserted = generate(args.db, args.rows, args.days, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Inserted {inserted:,} signal(s) into {args.db} in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+The run_benchmarks.py scenarios as pytest-benchmark tests.
+
+Each round's prepare step (writing the rows to process, queueing commits)
+runs untimed, as in the standalone runner. The startup benchmarks time the
+whole child process; the import time it reports is kept in extra_info.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+from run_benchmarks import SCENARIOS
+
+@pytest.mark.parametrize("name, group, unit, factory", SCENARIOS, ids=[name for name, _, _, _ in SCENARIOS])
+def test_scenario(benchmark, bench_context, name, group, unit, factory):
+    try:
+        bench_round = factory(bench_context)
+    except ImportError as e:
+        pytest.skip(f"missing dependency: {e.name or e}")
+    benchmark.group = group
+    import_seconds = []
+
+    def work():
+        result = bench_round.work()
+        if bench_round.self_timed:
+            import_seconds.append(result)
+
+    try:
+        benchmark.pedantic(work, setup=bench_round.prepare, rounds=bench_context.rounds, warmup_rounds=1)
+    finally:
+        bench_round.close()
+    benchmark.extra_info.update(bench_round.params, unit=unit, units_per_round=bench_round.units,
+                                **bench_round.extra_info)
+    if import_seconds:
+        benchmark.extra_info["import_seconds"] = import_seconds
@@ -0,0 +1,145 @@
+"""
+ARKHEION-X: Block Tracker v1.0 (Module Edition)
+
+Reorg awareness for the on-chain agent. The agent used to scan up to the
+head, so Transfers from blocks that a reorganization later orphaned stayed in
+`alpha_signals` for good and could still be correlated.
+
+BlockTracker keeps the hashes of recently scanned blocks (every block that
+produced a signal, plus the last block of every scanned range) in a ring
+buffer bounded to the last HISTORY_BLOCKS block numbers. Before the agent
+scans further, it checks that the next block's parentHash is the hash it
+recorded for the last scanned block. When it is not, the recorded blocks are
+compared with the canonical chain, newest first: the newest one that still
+matches is the fork point, and every signal of a later block is rolled back
+(deleted) and its blocks re-scanned. The header of a range's last block is
+read before its logs, so a reorg racing the scan leaves a stale hash that the
+next check catches.
+
+Confirmation depth (ONCHAIN_CONFIRMATIONS=N) has two modes:
+
+- By default the agent only scans blocks with N confirmations, so its signals
+  are N blocks late but practically never orphaned.
+- With ONCHAIN_PROVISIONAL=true it scans up to the head and marks its signals
+  `"finality": "provisional"`. Once blocks have N confirmations, the hashes
+  recorded for them (a few headers: the signals' blocks and range ends) are
+  checked against the canonical chain and their signals are marked final in
+  place. Only headers are re-read; logs are never fetched twice.
+
+The tracker itself does no I/O: the engines feed it hashes and headers, and
+the SQL below rolls back or finalizes the signals of a set of tokens.
+"""
+import bisect
+
+# --- Configuration ---
+HISTORY_BLOCKS = 512   # Block numbers behind the newest recorded block whose hashes are kept
+                       # (raised to twice the confirmation depth); the deepest reorg that is
+                       # rolled back exactly. Deeper ones roll back to the oldest recorded block.
+
+FINALITY_PROVISIONAL = "provisional"
+FINALITY_FINAL = "final"
+REORG_SIGNAL = "Chain Reorganization"  # Published after every rollback (metadata: tokens, fork_block)
+
+def normalize_hash(value):
+    """Block hashes arrive as HexBytes, bytes or hex strings; the tracker stores 0x-prefixed hex."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.hex()
+    value = str(value).lower()
+    return value if value.startswith("0x") else "0x" + value
+
+class BlockTracker:
+    """Ring buffer of recent (block number, hash) pairs; see the module docstring."""
+
+    def __init__(self, state=None, history_blocks=HISTORY_BLOCKS):
+        state = state or {}
+        self.history_blocks = history_blocks
+        entries = sorted((int(number), block_hash) for number, block_hash in state.get("blocks", []))
+        self._numbers = [number for number, _ in entries]
+        self._hashes = dict(entries)
+        self.finalized_through = state.get("finalized_through")  # Highest block whose signals are final
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def hash_of(self, number):
+        return self._hashes.get(number)
+
+    def record(self, number, block_hash):
+        """Remembers the hash of block `number` (replacing any hash recorded for it)."""
+        if number not in self._hashes:
+            if self._numbers and number < self._numbers[-1] - self.history_blocks:
+                return  # Older than the history kept
+            bisect.insort(self._numbers, number)
+        self._hashes[number] = normalize_hash(block_hash)
+        cutoff = bisect.bisect_left(self._numbers, self._numbers[-1] - self.history_blocks)
+        for old in self._numbers[:cutoff]:
+            del self._hashes[old]
+        del self._numbers[:cutoff]
+
+    def conflicts(self, number, block_hash):
+        """True if block `number` was recorded with a hash other than `block_hash`."""
+        known = self._hashes.get(number)
+        return known is not None and known != normalize_hash(block_hash)
+
+    def parent_matches(self, number, parent_hash):
+        """False only if block `number - 1` was recorded with a hash other than `parent_hash`."""
+        return not self.conflicts(number - 1, parent_hash)
+
+    def between(self, first, last):
+        """The recorded (number, hash) pairs with first <= number <= last, oldest first."""
+        lo = bisect.bisect_left(self._numbers, first)
+        hi = bisect.bisect_right(self._numbers, last)
+        return [(number, self._hashes[number]) for number in self._numbers[lo:hi]]
+
+    def find_fork(self, canonical_hash, below=None):
+        """
+        The highest recorded block (below `below`, if given) whose hash is still canonical.
+        `canonical_hash(number)` returns the chain's current hash of a block. Returns None
+        when no recorded block matches: the reorg is deeper than the ring buffer.
+        """
+        for number in reversed(self._numbers):
+            if below is not None and number >= below:
+                continue
+            if canonical_hash(number) == self._hashes[number]:
+                return number
+        return None
+
+    def oldest(self):
+        return self._numbers[0] if self._numbers else None
+
+    def rollback(self, fork_block):
+        """Forgets every block above `fork_block`."""
+        cutoff = bisect.bisect_right(self._numbers, fork_block)
+        for number in self._numbers[cutoff:]:
+            del self._hashes[number]
+        del self._numbers[cutoff:]
+        if self.finalized_through is not None and self.finalized_through > fork_block:
+            self.finalized_through = fork_block
+
+    def to_state(self):
+        return {"blocks": [[number, self._hashes[number]] for number in self._numbers],
+                "finalized_through": self.finalized_through}
+
+# --- Signal updates (the caller owns the transaction) ---
+def _token_filter(tokens):
+    return f"token IN ({','.join('?' * len(tokens))})"
+
+def rollback_signals(conn, source, tokens, fork_block):
+    """Deletes the signals of `tokens` from blocks above `fork_block`. Returns the number deleted."""
+    tokens = list(tokens)
+    return conn.execute(
+        f"DELETE FROM alpha_signals WHERE source = ? AND block_number > ? AND {_token_filter(tokens)}",
+        (source, fork_block, *tokens),
+    ).rowcount
+
+def finalize_signals(conn, source, tokens, from_block, through_block):
+    """Marks the provisional signals of `tokens` in [from_block, through_block] final. Returns their number."""
+    tokens = list(tokens)
+    return conn.execute(f"""
+        UPDATE alpha_signals SET metadata = json_set(metadata, '$.finality', '{FINALITY_FINAL}')
+        WHERE source = ? AND block_number BETWEEN ? AND ? AND {_token_filter(tokens)}
+        AND json_extract(metadata, '$.finality') = '{FINALITY_PROVISIONAL}'
+    """, (source, from_block, through_block, *tokens)).rowcount
+
+# Record kind -> update, for writers that apply updates sent by shard workers (sharding.py).
+SIGNAL_UPDATES = {"rollback": rollback_signals, "finalize": finalize_signals}
@@ -1,27 +1,36 @@
 """
-ARKHEION-X: Code-Intel Engine v1.1 (Module Edition)
+ARKHEION-X: Code-Intel Engine v2.0 (Module Edition)
 
 This script acts as the off-chain intelligence agent. It has been refactored
 to be importable by a main controller script (main.py). Its primary function
 is to monitor GitHub repositories for significant commits.
+
+Repositories are polled concurrently over one pooled HTTP session. Every
+request is conditional (If-None-Match with the last ETag), so repos with no
+new commits cost a 304 that does not count against the rate limit. When a repo
+did change, its commits are paged through back to the last SHA we saw, so a
+burst of commits between polls is never missed. The ETag and SHA per repo are
+persisted, and the polling cadence adapts to the X-RateLimit-* headers.
 """
-import os
 import time
+import threading
 import requests
 import logging
-from dotenv import load_dotenv
-
-# Import local database utilities
-from database import initialize_db, log_signal
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-# --- Configuration ---
-load_dotenv()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Import local database and signal bus utilities
+from database import initialize_db, persist_signal, read_state, write_state
+from signal_bus import Signal, bus
+from commit_classifier import CommitClassifier
+import metrics
+from settings import configure_logging, settings
 
 # --- Global Variables ---
 # Will be initialized by the start function
 GITHUB_PAT = None
-last_seen_commits = {}
+session = None
+executor = None
 
 # A list of target repositories (owner/repo) to monitor.
 TARGET_REPOS = [
@@ -32,82 +41,214 @@ TARGET_REPOS = [
     # Add more high-value repositories here
 ]
 
-# Keywords that can indicate significant, potentially market-moving events.
-SENSITIVE_KEYWORDS = ["fix", "patch", "exploit", "vulnerability", "security", "emergency", "hotfix", "critical"]
+# Keyword weights and path rules live in commit_classifier.py.
+# Commits scoring below this (e.g. LOW severity, docs-only fixes) are not signalled.
+MIN_SIGNAL_SCORE = 2.0
 
 # Polling interval in seconds.
-POLLING_INTERVAL = 300 # 5 minutes
+POLLING_INTERVAL = 300 # 5 minutes; the floor/default when the rate limit allows it
+MAX_POLLING_INTERVAL = 3600
+
+GITHUB_API = "https://api.github.com"
+MAX_WORKERS = 8        # Concurrent repo polls (and pooled connections)
+COMMITS_PER_PAGE = 100
+RATE_LIMIT_RESERVE = 100  # Requests kept in reserve for other tools sharing the token
+STATE_AGENT = "offchain"
+
+class RateLimitTracker:
+    """Remembers the latest X-RateLimit-* headers and derives a safe polling interval."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = None
+        self.requests_last_cycle = 0
+
+    def update(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_at = response.headers.get('X-RateLimit-Reset')
+        with self._lock:
+            if response.status_code != 304:
+                self.requests_last_cycle += 1
+            if remaining is not None:
+                self.remaining = int(remaining)
+            if reset_at is not None:
+                self.reset_at = int(reset_at)
+
+    def next_interval(self):
+        """Spreads the remaining budget evenly until the reset, never polling faster than POLLING_INTERVAL."""
+        with self._lock:
+            spent, self.requests_last_cycle = self.requests_last_cycle, 0
+            if self.remaining is None or self.reset_at is None:
+                return POLLING_INTERVAL
+            until_reset = max(self.reset_at - time.time(), 1)
+            budget = self.remaining - RATE_LIMIT_RESERVE
+            if budget <= 0:
+                return min(until_reset + 1, MAX_POLLING_INTERVAL)
+            cycles_affordable = budget / max(spent, 1)
+            return min(max(POLLING_INTERVAL, until_reset / cycles_affordable), MAX_POLLING_INTERVAL)
+
+rate_limit = RateLimitTracker()
+classifier = CommitClassifier()
+
+def create_session():
+    """One keep-alive session with a connection pool sized for the worker threads."""
+    new_session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=2)
+    new_session.mount("https://", adapter)
+    new_session.headers.update({
+        'Authorization': f'token {GITHUB_PAT}',
+        'Accept': 'application/vnd.github+json',
+    })
+    return new_session
+
+def fetch_new_commits(repo, state):
+    """
+    Returns (new_commits_oldest_first, etag). On a 304 returns ([], etag).
+    Without a previously seen SHA only the newest commit is returned, to avoid
+    alerting on the repository's entire history. Otherwise pages back until the
+    last seen commit, however long the burst, so no commit is skipped.
+    """
+    url = f"{GITHUB_API}/repos/{repo}/commits"
+    headers = {'If-None-Match': state['etag']} if state.get('etag') else {}
+    response = session.get(url, headers=headers, params={'per_page': COMMITS_PER_PAGE}, timeout=30)
+    rate_limit.update(response)
+    if response.status_code == 304:
+        return [], state['etag']
+    response.raise_for_status()
+    etag = response.headers.get('ETag')
+
+    last_sha = state.get('last_sha')
+    new_commits = []
+    while True:
+        commits = response.json()
+        for commit in commits:
+            if commit['sha'] == last_sha:
+                return list(reversed(new_commits)), etag
+            new_commits.append(commit)
+            if last_sha is None:
+                return new_commits, etag
+        next_url = response.links.get('next', {}).get('url')
+        if not commits or not next_url:
+            break
+        response = session.get(next_url, timeout=30)
+        rate_limit.update(response)
+        response.raise_for_status()
+
+    # The whole history was listed without the last seen commit: it was rewritten (force-push).
+    logging.warning(f"OFF-CHAIN AGENT: Last seen commit of {repo} is no longer in its history; "
+                    f"resuming from the newest commit.")
+    return new_commits[:1], etag
+
+def fetch_changed_files(repo, commit_sha):
+    """Returns the file paths touched by a commit (one extra request, only for keyword hits)."""
+    response = session.get(f"{GITHUB_API}/repos/{repo}/commits/{commit_sha}", timeout=30)
+    rate_limit.update(response)
+    response.raise_for_status()
+    return [changed['filename'] for changed in response.json().get('files', [])]
+
+def analyze_commit(repo, commit):
+    """Scores a commit and publishes a signal if it looks sensitive."""
+    commit_sha = commit['sha']
+    commit_message = commit['commit']['message']
+    logging.info(f"OFF-CHAIN AGENT: New commit found for {repo}: {commit_sha[:7]}")
+
+    result = classifier.classify(commit_message)
+    if not result.keywords:
+        return
+    try:
+        result = classifier.classify(commit_message, fetch_changed_files(repo, commit_sha))
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"OFF-CHAIN AGENT: Could not fetch changed files for {repo}@{commit_sha[:7]} ({e}); scoring the message only.")
+
+    if result.score >= MIN_SIGNAL_SCORE:
+        logging.warning(f"OFF-CHAIN AGENT: SENSITIVE COMMIT DETECTED in {repo}! (score {result.score:.1f}, {result.severity})")
+        signal_metadata = {
+            "repository": repo,
+            "commit_sha": commit_sha,
+            "commit_message": commit_message,
+            "keywords_found": result.keywords,
+            "severity_score": round(result.score, 2),
+            "sensitive_paths": result.sensitive_paths[:20],
+            "commit_url": commit['html_url']
+        }
+        bus.publish(Signal("Off-Chain Agent", "Sensitive Commit", signal_metadata, result.severity))
+
+def poll_repo(repo):
+    """Polls one repository and analyzes every commit made since the last poll. Returns the commit count."""
+    try:
+        state = read_state(STATE_AGENT, f"repo:{repo}", {})
+        new_commits, etag = fetch_new_commits(repo, state)
+        if not new_commits:
+            if etag != state.get('etag'):
+                write_state(STATE_AGENT, f"repo:{repo}", {**state, 'etag': etag})
+            return 0
+
+        for commit in new_commits:
+            analyze_commit(repo, commit)
+        write_state(STATE_AGENT, f"repo:{repo}", {'etag': etag, 'last_sha': new_commits[-1]['sha']})
+        return len(new_commits)
+
+    except requests.exceptions.HTTPError as e:
+         if e.response.status_code == 404:
+             logging.error(f"OFF-CHAIN AGENT: Repository not found: {repo}. Please check the name.")
+         else:
+             logging.error(f"OFF-CHAIN AGENT: HTTP Error for {repo}: {e}")
+    except (IndexError, KeyError):
+        logging.warning(f"OFF-CHAIN AGENT: Could not parse commit data for {repo}.")
+    except Exception as e:
+        logging.error(f"OFF-CHAIN AGENT: An unexpected error occurred for repo {repo}: {e}")
+    return 0
 
 def check_repos():
-    """Polls all target repositories for new, sensitive commits."""
-    headers = {'Authorization': f'token {GITHUB_PAT}'}
-    
-    for repo in TARGET_REPOS:
-        try:
-            url = f"https://api.github.com/repos/{repo}/commits"
-            response = requests.get(url, headers=headers, params={'per_page': 1})
-            response.raise_for_status()
-            
-            latest_commit = response.json()[0]
-            commit_sha = latest_commit['sha']
-            commit_message = latest_commit['commit']['message'].lower()
-
-            if last_seen_commits.get(repo) != commit_sha:
-                logging.info(f"OFF-CHAIN AGENT: New commit found for {repo}: {commit_sha[:7]}")
-                last_seen_commits[repo] = commit_sha
-                
-                found_keywords = [keyword for keyword in SENSITIVE_KEYWORDS if keyword in commit_message]
-                
-                if found_keywords:
-                    logging.warning(f"OFF-CHAIN AGENT: SENSITIVE COMMIT DETECTED in {repo}!")
-                    signal_metadata = {
-                        "repository": repo,
-                        "commit_sha": commit_sha,
-                        "commit_message": latest_commit['commit']['message'],
-                        "keywords_found": found_keywords,
-                        "commit_url": latest_commit['html_url']
-                    }
-                    log_signal("Off-Chain Agent", "Sensitive Commit", signal_metadata, "HIGH")
-
-        except requests.exceptions.HTTPError as e:
-             if e.response.status_code == 404:
-                 logging.error(f"OFF-CHAIN AGENT: Repository not found: {repo}. Please check the name.")
-             else:
-                 logging.error(f"OFF-CHAIN AGENT: HTTP Error for {repo}: {e}")
-        except (IndexError, KeyError):
-            logging.warning(f"OFF-CHAIN AGENT: Could not parse commit data for {repo}.")
-        except Exception as e:
-            logging.error(f"OFF-CHAIN AGENT: An unexpected error occurred for repo {repo}: {e}")
-
-def start_offchain_patrol():
+    """Polls all target repositories concurrently for new, sensitive commits."""
+    commits = sum(executor.map(poll_repo, TARGET_REPOS))
+    metrics.events_per_cycle.observe(commits, agent=STATE_AGENT)
+
+def start_offchain_patrol(stop_event=None, ready_event=None):
     """
     This is the main function to be called by main.py to start the agent.
     """
-    global GITHUB_PAT
-    GITHUB_PAT = os.getenv("GITHUB_PAT")
+    global GITHUB_PAT, session, executor
+    GITHUB_PAT = settings.github_pat
 
     if not GITHUB_PAT:
         logging.critical("OFF-CHAIN AGENT: GITHUB_PAT not found in .env file. Terminating patrol.")
         return
 
+    session = create_session()
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="OffChain-Poller")
     initialize_db()
     logging.info("OFF-CHAIN AGENT: Patrol started.")
-    
+
+    stop_event = stop_event or threading.Event()
+    if ready_event is not None:
+        ready_event.set()
+
     # Run once at the beginning to populate initial state
     logging.info("OFF-CHAIN AGENT: Running initial repository check...")
     check_repos()
 
-    while True:
+    while not stop_event.is_set():
         try:
-            logging.info(f"OFF-CHAIN AGENT: Patrol finished. Sleeping for {POLLING_INTERVAL} seconds.")
-            time.sleep(POLLING_INTERVAL)
+            interval = rate_limit.next_interval()
+            logging.info(f"OFF-CHAIN AGENT: Patrol finished (rate limit remaining: {rate_limit.remaining}). "
+                         f"Sleeping for {interval:.0f} seconds.")
+            if stop_event.wait(interval):
+                break
             logging.info("OFF-CHAIN AGENT: Running repository patrol...")
             check_repos()
         except KeyboardInterrupt:
             logging.info("OFF-CHAIN AGENT: Shutdown signal received. Terminating patrol.")
-            break
+            executor.shutdown(wait=False)
+            return
+    # Let in-flight polls finish so their ETag/SHA state matches the signals they published.
+    executor.shutdown(wait=True)
+    logging.info("OFF-CHAIN AGENT: Patrol stopped.")
 
 if __name__ == "__main__":
     # This block allows the script to be run standalone for testing purposes.
     print("--- Running Off-Chain Agent in standalone test mode ---")
-    start_offchain_patrol()
\ No newline at end of file
+    configure_logging()
+    bus.add_listener(persist_signal)
+    start_offchain_patrol()
@@ -0,0 +1,164 @@
+"""
+ARKHEION-X: Commit Classifier v1.0 (Module Edition)
+
+Scores commits for how likely they are to be market-moving. A configurable set
+of weighted keywords and phrases is compiled once into a single regex built
+from a character trie of the rules (shared prefixes share one branch), so a
+message is scanned in one pass however many rules there are. Word-boundary
+rules mean "prefix" no longer matches "fix" nor "dispatch" "patch". The
+message score is then scaled by where the change landed: touching contracts
+raises it, documentation- or test-only changes lower it.
+
+Messages and rules are both casefolded before matching (rather than matched
+with re.IGNORECASE, which also folds characters such as "ſ" that str.lower()
+leaves alone), so every match maps back to its rule.
+
+Rule syntax: a word or phrase (whitespace matches any run of whitespace).
+A trailing `*` turns it into a stem match ("vulnerab*" matches "vulnerable",
+"vulnerability", ...); otherwise the phrase must match whole words.
+"""
+import re
+from dataclasses import dataclass, field
+
+# --- Configuration ---
+# Keyword/phrase -> weight.
+KEYWORD_RULES = {
+    "exploit*": 5,
+    "vulnerab*": 5,
+    "emergency": 5,
+    "reentran*": 5,
+    "cve": 5,
+    "oracle manipulation": 5,
+    "security": 4,
+    "critical": 4,
+    "hotfix*": 4,
+    "drain*": 3,
+    "overflow": 3,
+    "access control": 3,
+    "pause": 3,
+    "unpause": 3,
+    "fix": 2,
+    "fixes": 2,
+    "fixed": 2,
+    "patch": 2,
+    "patched": 2,
+    "audit*": 2,
+    "bug": 1,
+    "upgrade*": 1,
+}
+
+# Path regex -> multiplier. Benign rules are checked first for each file. The strongest sensitive
+# multiplier among the changed files wins; a benign multiplier only applies when every file is benign.
+SENSITIVE_PATH_RULES = {
+    r"(^|/)contracts?/": 1.5,
+    r"\.(sol|vy|huff)$": 1.5,
+    r"(^|/)src/": 1.2,
+}
+BENIGN_PATH_RULES = {
+    r"(^|/)(docs?|documentation)/": 0.25,
+    r"\.(md|rst|txt)$": 0.25,
+    r"(^|/)(tests?|spec|__tests__)/": 0.5,
+    r"\.(t|spec|test)\.(sol|js|ts)$": 0.5,
+    r"(^|/)\.github/": 0.25,
+}
+
+# Score thresholds for each severity level, highest first.
+SEVERITY_LEVELS = [(8.0, "CRITICAL"), (4.0, "HIGH"), (2.0, "MEDIUM"), (0.0001, "LOW")]
+
+@dataclass
+class CommitClassification:
+    score: float
+    severity: str
+    keywords: list = field(default_factory=list)
+    sensitive_paths: list = field(default_factory=list)
+
+def _trie_pattern(node):
+    """Renders a character trie as a regex, so rules sharing a prefix share one branch."""
+    branches = [(r"\s+" if char == " " else re.escape(char)) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if "" in node:
+        # Listed after the branches, so the longest rule wins.
+        branches.append(r"\w*" if node[""] == "stem" else r"\b")
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+def compile_rules(rules):
+    """
+    Compiles {phrase: weight} into one regex over a trie of the phrases.
+    Returns (pattern, exact_weights, stem_weights); a match is mapped back to its rule by rule_for().
+    """
+    trie, exact, stems = {}, {}, {}
+    for phrase, weight in rules.items():
+        stem = phrase.endswith("*")
+        normalized = " ".join(phrase.rstrip("*").casefold().split())
+        node = trie
+        for char in normalized:
+            node = node.setdefault(char, {})
+        node[""] = "stem" if stem else "word"
+        (stems if stem else exact)[normalized] = (phrase, weight)
+    # Longest stems first, so the most specific one claims a match.
+    stems = dict(sorted(stems.items(), key=lambda item: -len(item[0])))
+    return re.compile(r"\b" + _trie_pattern(trie)), exact, stems
+
+class CommitClassifier:
+    """Scores commit messages (and optionally changed file paths) in a single regex pass."""
+
+    def __init__(self, rules=None, sensitive_paths=None, benign_paths=None):
+        self.pattern, self.exact, self.stems = compile_rules(rules or KEYWORD_RULES)
+        self.sensitive_paths = [(re.compile(p, re.IGNORECASE), m) for p, m in (sensitive_paths or SENSITIVE_PATH_RULES).items()]
+        self.benign_paths = [(re.compile(p, re.IGNORECASE), m) for p, m in (benign_paths or BENIGN_PATH_RULES).items()]
+
+    def rule_for(self, matched_text):
+        """Maps a matched span back to its (phrase, weight) rule, or None."""
+        normalized = " ".join(matched_text.casefold().split())
+        rule = self.exact.get(normalized)
+        if rule is not None:
+            return rule
+        for stem, rule in self.stems.items():
+            if normalized.startswith(stem):
+                return rule
+        return None
+
+    def score_message(self, message):
+        """Returns (score, matched_rules). Each rule counts once per message."""
+        matched = {}
+        for match in self.pattern.finditer(message.casefold()):
+            rule = self.rule_for(match.group())
+            if rule is not None:
+                matched[rule[0]] = rule[1]
+        return float(sum(matched.values())), list(matched)
+
+    def path_multiplier(self, files):
+        """Returns (multiplier, sensitive_files) for the paths touched by a commit."""
+        if not files:
+            return 1.0, []
+        sensitive_files = []
+        strongest = 1.0
+        benign_factors = []
+        for path in files:
+            # Benign rules win, so contracts/test/Vault.t.sol counts as a test, not a contract.
+            factors = [m for regex, m in self.benign_paths if regex.search(path)]
+            if factors:
+                benign_factors.append(min(factors))
+                continue
+            benign_factors.append(None)
+            factors = [m for regex, m in self.sensitive_paths if regex.search(path)]
+            if factors:
+                sensitive_files.append(path)
+                strongest = max(strongest, max(factors))
+        if sensitive_files:
+            return strongest, sensitive_files
+        if benign_factors and all(factor is not None for factor in benign_factors):
+            return max(benign_factors), []
+        return 1.0, []
+
+    def classify(self, message, files=None):
+        score, keywords = self.score_message(message)
+        multiplier, sensitive_files = self.path_multiplier(files) if score else (1.0, [])
+        score *= multiplier
+        return CommitClassification(score, severity_for(score), keywords, sensitive_files)
+
+def severity_for(score):
+    for threshold, level in SEVERITY_LEVELS:
+        if score >= threshold:
+            return level
+    return None
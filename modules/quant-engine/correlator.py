@@ -1,105 +1,497 @@
 """
-ARKHEION-X: Correlator Engine v1.1 (Module Edition)
+ARKHEION-X: Correlator Engine v2.0 (Module Edition)
 
 This script acts as the central brain. It has been refactored to be
 importable by a main controller script (main.py). Its purpose is to
-periodically analyze the signals database to find actionable correlations.
+find actionable correlations between off-chain and on-chain signals.
+
+Signals published on the in-process signal bus are evaluated the moment they
+arrive. The database is read as a catch-up path for signals written by other
+processes (or dropped while the correlator was busy).
+
+The engine is incremental: each cycle reads only the signals written since a
+persisted rowid high-water mark, and correlates them against a sliding-window
+index of recent events held in memory. Alerts already raised are recorded in
+the `correlation_alerts` table so they survive restarts.
+
+A sensitive commit is only linked to moves of its protocol's own tokens
+(REPO_TOKENS), as long as the on-chain agent monitors at least one of them
+(token_registry.py); otherwise it is linked to moves of any token, as before.
+Every on-chain signal's sender/receiver feeds a wallet graph (wallet_graph.py)
+that traces who funded the accumulating wallets.
+
+Every alert is also queued in the `alert_outbox` table, in the same
+transaction as its ledger entry, for the alert dispatcher (alerts.py) to
+deliver to Telegram, a webhook or a file.
 """
-import sqlite3
 import json
 import time
+import heapq
+import bisect
+import sqlite3
 import logging
+import calendar
+import threading
+from collections import deque
+from datetime import datetime
 
 # Import local database utilities
-from database import initialize_db
+from database import DB_FILE, initialize_db, load_state, save_state
+from signal_sink import open_connection
+from signal_bus import bus
+from wallet_graph import WalletGraph
+from token_registry import TOKEN_METADATA_AGENT, monitored_tokens
+from alerts import configured_sinks, correlation_alert, enqueue_alert
+import metrics
+from settings import configure_logging
 
 # --- Configuration ---
-DB_FILE = "modules/quant-engine/arkheionx.db" # Updated path for root execution
-POLLING_INTERVAL = 60  # Check for correlations every 60 seconds
-CORRELATION_WINDOW_HOURS = 24 # How far back to look for connections
+POLLING_INTERVAL = 60  # Catch up on signals written by other processes every 60 seconds
+CORRELATION_WINDOW_HOURS = 24 # How far apart two signals may be and still be connected
+READ_BATCH_SIZE = 5000 # Max new signals read per query
+LATENCY_SAMPLES = 1000 # Recent alerts kept for detection-to-alert latency stats
+STOP_CHECK_INTERVAL = 1.0 # Max seconds between checks of the supervisor's stop event
+FUNDING_HOPS = 2 # How far back funding is traced from an accumulating wallet
+GRAPH_PRUNE_INTERVAL = 600 # Seconds between sweeps of expired wallet-graph edges
+
+# The tokens each monitored repository's protocol governs, by on-chain symbol (all of them are
+# in token_registry.DEFAULT_TOKENS). A sensitive commit is only linked to moves of these tokens;
+# repositories not listed, or none of whose tokens the on-chain agent monitors, match every token.
+REPO_TOKENS = {
+    "Uniswap/v3-core": ["UNI"],
+    "aave/aave-v3-core": ["AAVE"],
+    "lidofinance/lido-dao": ["LDO", "wstETH"],
+    "smartcontractkit/chainlink": ["LINK"],
+}
+
+STATE_AGENT = "correlator"
+OFF_CHAIN_SOURCE = "Off-Chain Agent"
+ON_CHAIN_SOURCE = "On-Chain Agent"
+
+# Only sensitive commits and CRITICAL on-chain moves take part in correlation,
+# but every on-chain move is read: its sender and receiver feed the wallet graph.
+SIGNAL_COLUMNS = "id, timestamp, source, dedupe_key, metadata, confidence_level"
+RELEVANT_SIGNALS = f"source IN ('{OFF_CHAIN_SOURCE}', '{ON_CHAIN_SOURCE}')"
+
+
+def is_reorg(source, data):
+    """True for the on-chain agent's Chain Reorganization signals (see block_tracker.py)."""
+    return source == ON_CHAIN_SOURCE and 'fork_block' in data
+
+def parse_db_timestamp(value):
+    """Converts a SQLite CURRENT_TIMESTAMP string (UTC) to epoch seconds."""
+    return calendar.timegm(datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S').timetuple())
+
+class SlidingWindowIndex:
+    """
+    Events ordered by time, bounded to a trailing window. Signals mostly arrive in
+    time order and are appended to the main run in O(1); the few that arrive late go
+    to a small sorted run by insort, O(k) for k late events. Range lookups bisect both
+    runs, O(log n). Eviction advances the start of the main run instead of deleting
+    its prefix (a deque would make the bisects O(n)) and compacts it once half of it
+    has expired, so it is amortised O(1) per event.
+    """
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self._times = []
+        self._events = []
+        self._start = 0  # Entries of the main run before this have expired
+        self._late_times = []
+        self._late_events = []
+        self._keys = set()
+
+    def __len__(self):
+        return len(self._times) - self._start + len(self._late_times)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, ts, key, event):
+        """Inserts an event. Returns False if an event with this key is already indexed."""
+        if key in self._keys:
+            return False
+        if len(self._times) == self._start or ts >= self._times[-1]:
+            self._times.append(ts)
+            self._events.append((key, event))
+        else:
+            position = bisect.bisect_right(self._late_times, ts)
+            self._late_times.insert(position, ts)
+            self._late_events.insert(position, (key, event))
+        self._keys.add(key)
+        return True
+
+    def between(self, start, end):
+        """Returns the (key, event) pairs whose time lies in [start, end], in time order."""
+        lo = bisect.bisect_left(self._times, start, self._start)
+        hi = bisect.bisect_right(self._times, end, lo)
+        if not self._late_times:
+            return self._events[lo:hi]
+        late_lo = bisect.bisect_left(self._late_times, start)
+        late_hi = bisect.bisect_right(self._late_times, end, late_lo)
+        merged = heapq.merge(zip(self._times[lo:hi], self._events[lo:hi]),
+                             zip(self._late_times[late_lo:late_hi], self._late_events[late_lo:late_hi]),
+                             key=lambda item: item[0])
+        return [pair for _, pair in merged]
+
+    def evict(self, now):
+        """Drops every event older than the window."""
+        cutoff_ts = now - self.window_seconds
+        cutoff = bisect.bisect_left(self._times, cutoff_ts, self._start)
+        for key, _ in self._events[self._start:cutoff]:
+            self._keys.discard(key)
+        self._start = cutoff
+        if self._start * 2 > len(self._times):
+            del self._times[:self._start]
+            del self._events[:self._start]
+            self._start = 0
+        late_cutoff = bisect.bisect_left(self._late_times, cutoff_ts)
+        if late_cutoff:
+            for key, _ in self._late_events[:late_cutoff]:
+                self._keys.discard(key)
+            del self._late_times[:late_cutoff]
+            del self._late_events[:late_cutoff]
+
+    def remove_if(self, predicate):
+        """Drops every event for which `predicate(key, event)` is true. Returns the number dropped."""
+        dropped = 0
+        for times, events, start in ((self._times, self._events, self._start),
+                                     (self._late_times, self._late_events, 0)):
+            kept_times, kept_events = [], []
+            for ts, (key, event) in zip(times[start:], events[start:]):
+                if predicate(key, event):
+                    self._keys.discard(key)
+                    dropped += 1
+                else:
+                    kept_times.append(ts)
+                    kept_events.append((key, event))
+            times[:] = kept_times
+            events[:] = kept_events
+        self._start = 0
+        return dropped
+
+class CorrelationEngine:
+    """Reads new signals past a watermark and correlates them against in-memory windows."""
+
+    def __init__(self, db_file=DB_FILE, window_hours=CORRELATION_WINDOW_HOURS, alert_channels=None):
+        self.window_seconds = window_hours * 3600
+        self.conn = open_connection(db_file)
+        self.on_chain = {}  # token -> SlidingWindowIndex of its CRITICAL moves
+        self.off_chain = SlidingWindowIndex(self.window_seconds)
+        self.graph = WalletGraph()
+        self._next_prune = 0.0
+        self.alerted = set()
+        self.watermark = None
+        self.alert_latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._pending_alerts = []
+        self.monitored_tokens = None  # Tokens the on-chain agent monitors (see _load_monitored_tokens)
+        # Channels every alert is queued for (none: alerts are only logged).
+        self.alert_channels = list(configured_sinks()) if alert_channels is None else list(alert_channels)
+        self._pending_outbox = []
+        self._reorgs = set()  # reorg_ids of Chain Reorganization signals already applied
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def start(self):
+        """Restores the watermark and dedupe ledger, then re-indexes the current window."""
+        window_start = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - self.window_seconds))
+        self.alerted = {
+            row[0] for row in self.conn.execute(
+                "SELECT commit_key FROM correlation_alerts WHERE alerted_at > ?", (window_start,)
+            )
+        }
+        self.watermark = load_state(self.conn, STATE_AGENT, "watermark")
+        resuming = self.watermark is not None
+        if not resuming:
+            # First run: treat everything inside the current window as new.
+            row = self.conn.execute(
+                "SELECT MIN(id) FROM alpha_signals WHERE timestamp > ?", (window_start,)
+            ).fetchone()
+            self.watermark = (row[0] - 1) if row[0] is not None else self._max_id()
+        self._load_graph()
+        self._load_monitored_tokens()
+        if resuming:
+            # Rows at or below the watermark were already evaluated; they only need re-indexing.
+            rows = self.conn.execute(f"""
+                SELECT {SIGNAL_COLUMNS} FROM alpha_signals
+                WHERE timestamp > ? AND id <= ? AND {RELEVANT_SIGNALS}
+                ORDER BY id
+            """, (window_start, self.watermark))
+            for row in rows:
+                self._index(*row)
+        logging.info(
+            f"CORRELATOR AGENT: Resuming after signal #{self.watermark} with "
+            f"{len(self.off_chain)} commit(s) and {self.move_count()} on-chain move(s) in the window, "
+            f"{self.graph.edge_count} wallet-graph edge(s)."
+        )
+
+    def move_count(self):
+        return sum(len(index) for index in self.on_chain.values())
+
+    def run_cycle(self):
+        """Processes every signal written since the watermark. Returns the number of signals read."""
+        for token, index in list(self.on_chain.items()):
+            index.evict(time.time())
+            if not len(index):
+                del self.on_chain[token]
+        self.off_chain.evict(time.time())
+        if time.monotonic() >= self._next_prune:
+            self.graph.prune()
+            self._next_prune = time.monotonic() + GRAPH_PRUNE_INTERVAL
+            self._load_monitored_tokens()
+        # Commits that left the window can never correlate again, so their dedupe entries go too.
+        self.alerted = {key for key in self.alerted if key in self.off_chain}
+        # Bound the cycle by the current max id so rows committed mid-cycle are never skipped.
+        ceiling = self._max_id()
+        total = 0
+        while self.watermark < ceiling:
+            rows = self.conn.execute(f"""
+                SELECT {SIGNAL_COLUMNS} FROM alpha_signals
+                WHERE id > ? AND id <= ? AND {RELEVANT_SIGNALS}
+                ORDER BY id LIMIT ?
+            """, (self.watermark, ceiling, READ_BATCH_SIZE)).fetchall()
+            for row in rows:
+                self.evaluate(*row)
+            # Irrelevant rows are filtered out by the query, so a short batch means we reached the ceiling.
+            self.watermark = rows[-1][0] if len(rows) == READ_BATCH_SIZE else ceiling
+            self._persist()
+            total += len(rows)
+        metrics.correlator_watermark.set(self.watermark)
+        return total
+
+    def evaluate(self, row_id, timestamp, source, dedupe_key, metadata_json, confidence):
+        """Indexes one signal read from the database and raises any correlation it completes."""
+        ts = parse_db_timestamp(timestamp)
+        data = json.loads(metadata_json) if metadata_json else {}
+        self._ingest(ts, dedupe_key or f"row:{row_id}", source, data, confidence, detected_at=ts)
+
+    def on_signal(self, signal):
+        """Evaluates a signal pushed over the signal bus as soon as it was published."""
+        if signal.source not in (ON_CHAIN_SOURCE, OFF_CHAIN_SOURCE):
+            return
+        key = signal.dedupe_key or f"{signal.source}:{signal.detected_at}"
+        self._ingest(signal.detected_at, key, signal.source, signal.metadata, signal.confidence,
+                     detected_at=signal.detected_at)
+        if self._pending_alerts:
+            self._persist(watermark=False)
+
+    def latency_summary(self):
+        """Detection-to-alert latency statistics (seconds) over the most recent alerts."""
+        if not self.alert_latencies:
+            return {"count": 0}
+        ordered = sorted(self.alert_latencies)
+        return {
+            "count": len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+    def close(self):
+        self.conn.close()
+
+    # --- Internals ---
+    def _ingest(self, ts, key, source, data, confidence, detected_at):
+        metrics.correlator_lag.set(max(0.0, time.time() - detected_at))
+        if is_reorg(source, data):
+            self._drop_orphaned(data)
+            return
+        index = self.off_chain if source == OFF_CHAIN_SOURCE else self._move_index(data, confidence, ts)
+        if index is None or not index.add(ts, key, (ts, data)):
+            return  # Not a CRITICAL move, or already seen (e.g. via the bus before the database)
+        if source == OFF_CHAIN_SOURCE:
+            self._check_commit(key, ts, data, detected_at)
+        else:
+            # A new on-chain move may complete correlations for commits still waiting in the window.
+            for commit_key, (commit_ts, commit_data) in self.off_chain.between(ts - self.window_seconds, ts + self.window_seconds):
+                self._check_commit(commit_key, commit_ts, commit_data, detected_at)
+
+    def _index(self, row_id, timestamp, source, dedupe_key, metadata_json, confidence):
+        ts = parse_db_timestamp(timestamp)
+        data = json.loads(metadata_json) if metadata_json else {}
+        if is_reorg(source, data):
+            # The orphaned moves were deleted from the database, so they were never re-indexed.
+            self._reorgs.add(data.get('reorg_id'))
+            return
+        index = self.off_chain if source == OFF_CHAIN_SOURCE else self._move_index(data, confidence, ts)
+        if index is not None:
+            index.add(ts, dedupe_key or f"row:{row_id}", (ts, data))
+
+    def _move_index(self, data, confidence, ts):
+        """Adds a move to the wallet graph; returns its token's window index if it can correlate."""
+        self.graph.add_transfer(data.get('from'), data.get('to'), ts)
+        if confidence != 'CRITICAL':
+            return None
+        token = data.get('token')
+        if token not in self.on_chain:
+            self.on_chain[token] = SlidingWindowIndex(self.window_seconds)
+        return self.on_chain[token]
+
+    def _load_monitored_tokens(self):
+        """
+        Works out the tokens the on-chain agent monitors from its configuration (a token given by
+        address counts once the agent has cached its symbol) and warns about repositories in
+        REPO_TOKENS none of whose tokens are among them: their commits fall back to matching
+        moves of every token.
+        """
+        monitored = monitored_tokens(lambda address: load_state(self.conn, TOKEN_METADATA_AGENT, address))
+        if monitored == self.monitored_tokens:
+            return
+        self.monitored_tokens = monitored
+        for repo, tokens in REPO_TOKENS.items():
+            if not monitored.intersection(tokens):
+                logging.warning(f"CORRELATOR AGENT: None of {repo}'s tokens ({', '.join(tokens)}) is monitored "
+                                f"on-chain; its commits are correlated with moves of every token.")
+
+    def _repo_tokens(self, repo):
+        """The tokens a commit of `repo` is linked to, or None for every token."""
+        tokens = REPO_TOKENS.get(repo)
+        if tokens is None or not self.monitored_tokens or not self.monitored_tokens.intersection(tokens):
+            return None
+        return tokens
+
+    def _drop_orphaned(self, data):
+        """
+        Applies a Chain Reorganization signal: the moves of its tokens from blocks above the fork
+        point were rolled back, so they can no longer correlate. (Their wallet-graph edges age out.)
+        """
+        reorg_id = data.get('reorg_id')
+        if reorg_id in self._reorgs:
+            return  # Already applied when it arrived over the bus
+        self._reorgs.add(reorg_id)
+        fork_block = data.get('fork_block')
+        removed = 0
+        for token in data.get('tokens', []):
+            index = self.on_chain.get(token)
+            if index is not None:
+                removed += index.remove_if(
+                    lambda key, event: (event[1].get('block_number') or 0) > fork_block)
+        logging.warning(f"CORRELATOR AGENT: Chain reorganization after block {fork_block}; "
+                        f"dropped {removed} orphaned on-chain move(s).")
+
+    def _load_graph(self):
+        """Re-adds the wallet-graph edges of signals already evaluated, back to the graph's retention."""
+        graph_start = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - self.graph.retention_seconds))
+        rows = self.conn.execute("""
+            SELECT timestamp, sender, receiver FROM alpha_signals
+            WHERE source = ? AND timestamp > ? AND id <= ? AND sender IS NOT NULL
+        """, (ON_CHAIN_SOURCE, graph_start, self.watermark))
+        for timestamp, sender, receiver in rows:
+            self.graph.add_transfer(sender, receiver, parse_db_timestamp(timestamp))
+
+    def _check_commit(self, commit_key, commit_ts, commit_data, detected_at):
+        if commit_key in self.alerted:
+            return
+        tokens = self._repo_tokens(commit_data.get('repository'))
+        indexes = self.on_chain.values() if tokens is None else [self.on_chain[t] for t in tokens if t in self.on_chain]
+        smart_money_moves = [
+            move_data for index in indexes
+            for _, (_, move_data) in index.between(commit_ts - self.window_seconds, commit_ts + self.window_seconds)
+        ]
+        if smart_money_moves:
+            receivers = [move_data.get('to') for move_data in smart_money_moves]
+            funding_wallets = self.graph.funding_wallets(receivers, FUNDING_HOPS)
+            clusters = {self.graph.cluster_id(receiver) for receiver in receivers} - {None}
+            repo = commit_data.get('repository')
+            log_correlation_alert(repo, commit_data, smart_money_moves, funding_wallets, len(clusters))
+            if self.alert_channels:
+                self._pending_outbox.append(
+                    (repo, correlation_alert(repo, commit_data, smart_money_moves, funding_wallets, len(clusters))))
+            latency = max(0.0, time.time() - detected_at)
+            self.alert_latencies.append(latency)
+            logging.info(f"CORRELATOR AGENT: Detection-to-alert latency: {latency * 1000:.0f} ms.")
+            self.alerted.add(commit_key)
+            self._pending_alerts.append((commit_key, repo, len(smart_money_moves)))
+
+    def _max_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM alpha_signals").fetchone()[0]
+
+    def _persist(self, watermark=True):
+        """Commits new alerts, their outbox rows (and the watermark) together, and prunes expired ledger entries."""
+        window_start = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - 2 * self.window_seconds))
+        with self.conn:
+            if watermark:
+                save_state(self.conn, STATE_AGENT, "watermark", self.watermark)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO correlation_alerts (commit_key, repository, move_count) VALUES (?, ?, ?)",
+                self._pending_alerts,
+            )
+            for repo, payload in self._pending_outbox:
+                enqueue_alert(self.conn, repo, payload, self.alert_channels)
+            self.conn.execute("DELETE FROM correlation_alerts WHERE alerted_at < ?", (window_start,))
+        self._pending_alerts = []
+        self._pending_outbox = []
 
 # --- Global Variables ---
-# To avoid spamming alerts for the same correlation repeatedly
-processed_correlations = set()
+# The engine is created once by start_correlation_analysis (or lazily by find_correlations).
+engine = None
 
 def find_correlations():
-    """Queries the database and looks for connections between different signals."""
+    """Runs one incremental correlation cycle over the signals written since the last one."""
+    global engine
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        # 1. Get recent sensitive commits that we haven't processed yet
-        cursor.execute(f"""
-            SELECT rowid, metadata FROM alpha_signals
-            WHERE source = 'Off-Chain Agent'
-            AND timestamp > datetime('now', '-{CORRELATION_WINDOW_HOURS} hours')
-        """)
-        
-        sensitive_commits = cursor.fetchall()
-
-        for commit_id, commit_data_json in sensitive_commits:
-            if commit_id in processed_correlations:
-                continue # Skip if we've already alerted for this commit
-
-            commit_data = json.loads(commit_data_json)
-            repo = commit_data.get('repository')
-            
-            # Simple logic for now: Check for any critical smart money moves in the same window
-            cursor.execute(f"""
-                SELECT metadata FROM alpha_signals
-                WHERE source = 'On-Chain Agent'
-                AND confidence_level = 'CRITICAL'
-                AND timestamp > datetime('now', '-{CORRELATION_WINDOW_HOURS} hours')
-            """)
-            
-            smart_money_moves = cursor.fetchall()
-
-            if smart_money_moves:
-                log_correlation_alert(repo, commit_data, smart_money_moves)
-                processed_correlations.add(commit_id) # Mark this commit as processed
-        
-        conn.close()
-
+        if engine is None:
+            engine = CorrelationEngine()
+            engine.start()
+        engine.run_cycle()
     except sqlite3.Error as e:
         logging.error(f"CORRELATOR AGENT: Database error during correlation: {e}")
     except Exception as e:
         logging.error(f"CORRELATOR AGENT: An unexpected error occurred: {e}", exc_info=True)
 
-def log_correlation_alert(repo, commit_data, smart_money_moves):
+def log_correlation_alert(repo, commit_data, smart_money_moves, funding_wallets=None, cluster_count=None):
     """Formats and logs a critical correlation alert."""
     logging.critical("="*60)
     logging.critical("!!! CRITICAL ALPHA SIGNAL: ON-CHAIN & OFF-CHAIN CORRELATION !!!")
-    logging.critical(f"  Description: A sensitive code change was detected around the same time as significant smart money activity.")
+    logging.critical("  Description: A sensitive code change was detected around the same time as significant smart money activity.")
     logging.critical(f"  Off-Chain Signal: Sensitive commit in repo -> {repo}")
     logging.critical(f"  Commit Message: \"{commit_data.get('commit_message', '').strip()}\"")
     logging.critical(f"  On-Chain Signal(s): Found {len(smart_money_moves)} related 'Fresh Wallet' movements.")
-    
-    for move_data_json in smart_money_moves[:3]: # Log max 3 examples to keep it clean
-        move_data = json.loads(move_data_json[0])
-        logging.warning(f"    - Fresh wallet '{move_data.get('to')[:10]}...' accumulated {move_data.get('amount')} {move_data.get('token')}")
-    
+
+    for move_data in smart_money_moves[:3]: # Log max 3 examples to keep it clean
+        logging.warning(f"    - Fresh wallet '{str(move_data.get('to'))[:10]}...' accumulated {move_data.get('amount')} {move_data.get('token')}")
+
+    if funding_wallets:
+        direct = sum(1 for hops in funding_wallets.values() if hops == 1)
+        logging.critical(f"  Funding: {len(funding_wallets)} wallet(s) within {FUNDING_HOPS} hops "
+                         f"({direct} direct) funded them, across {cluster_count} wallet cluster(s).")
+        for address, hops in sorted(funding_wallets.items(), key=lambda item: item[1])[:3]:
+            logging.warning(f"    - Funder '{address[:10]}...' ({hops} hop(s) upstream)")
+
     logging.critical("="*60)
-    # This is where a high-priority Telegram alert would be sent.
 
-def start_correlation_analysis():
+def start_correlation_analysis(stop_event=None, ready_event=None):
     """
     This is the main function to be called by main.py to start the agent.
     """
     initialize_db()
+    subscription = bus.subscribe("Correlator-Agent")
     logging.info("CORRELATOR AGENT: Analysis patrol started. Awaiting signals...")
-    
-    while True:
-        try:
-            # logging.info("CORRELATOR AGENT: Running correlation analysis cycle...")
-            find_correlations()
-            time.sleep(POLLING_INTERVAL)
-        except KeyboardInterrupt:
-            logging.info("CORRELATOR AGENT: Shutdown signal received. Terminating patrol.")
-            break
+    stop_event = stop_event or threading.Event()
+    if ready_event is not None:
+        ready_event.set()
+
+    next_catch_up = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() >= next_catch_up:
+                    find_correlations()
+                    next_catch_up = time.monotonic() + POLLING_INTERVAL
+                timeout = min(STOP_CHECK_INTERVAL, max(0.0, next_catch_up - time.monotonic()))
+                signal = subscription.get(timeout=timeout)
+                if signal is not None and engine is not None:
+                    engine.on_signal(signal)
+            except KeyboardInterrupt:
+                logging.info("CORRELATOR AGENT: Shutdown signal received. Terminating patrol.")
+                break
+            except sqlite3.Error as e:
+                logging.error(f"CORRELATOR AGENT: Database error while evaluating a signal: {e}")
+            except Exception as e:
+                logging.error(f"CORRELATOR AGENT: An unexpected error occurred: {e}", exc_info=True)
+    finally:
+        bus.unsubscribe(subscription)
 
 if __name__ == "__main__":
     # This block allows the script to be run standalone for testing purposes.
     print("--- Running Correlator Agent in standalone test mode ---")
-    start_correlation_analysis()
\ No newline at end of file
+    configure_logging()
+    start_correlation_analysis()
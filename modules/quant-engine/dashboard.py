@@ -3,16 +3,31 @@ ARKHEION-X: Quant Engine v3.0 - Intelligence Command Center
 
 This Streamlit application serves as an interactive dashboard to view, filter,
 and analyze on-chain and off-chain alpha signals logged by ARKHEION-X agents.
+Recent signals are served from an incrementally refreshed in-memory frame;
+older date ranges are filtered, aggregated and paged by SQLite, together with
+the Parquet archive once they reach archived days.
 """
 import streamlit as st
 import pandas as pd
 import sqlite3
-import json
 import plotly.express as px
-from datetime import datetime, timedelta
+from contextlib import closing
+
+from signal_queries import (
+    PAGE_SIZE, SignalFilter, open_readonly, timestamp_bounds, distinct_values,
+    count_by, summary, fetch_page, latest_signal,
+)
+from signal_cache import SignalFrameCache, summary_of, counts_of, page_of, latest_of
+import archive
+from settings import settings
 
 # --- Configuration ---
-DB_FILE = "arkheionx.db"
+DB_FILE = settings.arkheionx_db
+CACHE_RETENTION_DAYS = 7  # Signals kept in memory; older date ranges are queried from SQLite
+ARCHIVE_DIR = archive.ARCHIVE_DIR
+# Columns read for date ranges that reach into the Parquet archive.
+LONG_RANGE_COLUMNS = ["id", "timestamp", "source", "signal_type", "confidence_level", "token", "repository",
+                      "sender", "receiver", "tx_hash", "commit_sha", "amount", "value_usd", "receiver_tx_count"]
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -22,29 +37,93 @@ st.set_page_config(
 )
 
 # --- Data Loading and Processing ---
+# Views within the cache retention are answered from one process-wide frame that
+# only ever appends new rows; older ones are pushed down to SQLite (see
+# signal_queries.py), where only the signal-log page on screen reaches pandas.
+# Ranges reaching archived days also read the pruned Parquet partitions (archive.py).
+@st.cache_resource
+def get_signal_cache():
+    return SignalFrameCache(DB_FILE, CACHE_RETENTION_DAYS)
+
 @st.cache_data(ttl=30)  # Refresh data cache every 30 seconds
-def load_and_process_data():
-    """Loads data from the SQLite DB, parses JSON metadata, and returns a DataFrame."""
+def load_timestamp_bounds():
     try:
-        # Use a read-only connection to prevent database locking issues
-        conn = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True)
-        query = "SELECT timestamp, source, signal_type, metadata, confidence_level FROM alpha_signals ORDER BY timestamp DESC"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-
-        # If metadata is a JSON string, expand it into columns
-        if not df.empty and isinstance(df['metadata'].iloc[0], str):
-            try:
-                meta_df = pd.json_normalize(df['metadata'].apply(json.loads))
-                df = pd.concat([df.drop('metadata', axis=1), meta_df], axis=1)
-            except json.JSONDecodeError:
-                st.warning("Could not parse all metadata JSON strings.")
-        
-        # Convert timestamp to datetime objects for proper filtering
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
-    except Exception:
-        return pd.DataFrame()
+        with closing(open_readonly(DB_FILE)) as conn:
+            oldest, newest = timestamp_bounds(conn)
+    except sqlite3.Error:
+        oldest = newest = None
+    archived_days = archive.partition_dates(ARCHIVE_DIR) if archive.available() else []
+    if archived_days:
+        first_archived = pd.Timestamp(archived_days[0]).to_pydatetime()
+        last_archived = pd.Timestamp(archived_days[-1]).to_pydatetime()
+        oldest = min(oldest, first_archived) if oldest is not None else first_archived
+        newest = max(newest, last_archived) if newest is not None else last_archived
+    return oldest, newest
+
+def reaches_archive(signal_filter):
+    archived_days = archive.partition_dates(ARCHIVE_DIR) if archive.available() else []
+    return bool(archived_days) and (signal_filter.start is None or signal_filter.start.date() <= archived_days[-1])
+
+@st.cache_data(ttl=300)
+def query_long_range(signal_filter):
+    """Hot rows plus the pruned archive partitions, for ranges reaching past the hot table."""
+    df = archive.load_signals(signal_filter, DB_FILE, ARCHIVE_DIR, columns=LONG_RANGE_COLUMNS)
+    return df.rename(columns={'sender': 'from', 'receiver': 'to'})
+
+@st.cache_data(ttl=30)
+def load_filter_options(date_filter):
+    """Signal types, confidence levels and tokens present in the selected date range."""
+    if reaches_archive(date_filter):
+        df = query_long_range(date_filter)
+        return tuple(list(counts_of(df, column)) for column in ('signal_type', 'confidence_level', 'token'))
+    with closing(open_readonly(DB_FILE)) as conn:
+        return (distinct_values(conn, 'signal_type', date_filter),
+                distinct_values(conn, 'confidence_level', date_filter),
+                distinct_values(conn, 'token', date_filter))
+
+@st.cache_data(ttl=30)
+def query_overview(signal_filter):
+    with closing(open_readonly(DB_FILE)) as conn:
+        return {
+            "summary": summary(conn, signal_filter),
+            "confidence_counts": count_by(conn, 'confidence_level', signal_filter),
+            "token_counts": count_by(conn, 'token', signal_filter),
+            "latest_critical": latest_signal(conn, signal_filter, 'CRITICAL'),
+        }
+
+@st.cache_data(ttl=30)
+def query_page(signal_filter, cursor=None):
+    with closing(open_readonly(DB_FILE)) as conn:
+        return fetch_page(conn, signal_filter, cursor, PAGE_SIZE)
+
+def load_overview(signal_filter):
+    """Metrics, chart aggregates and the latest critical signal for the current filters."""
+    cache = get_signal_cache()
+    if cache.covers(signal_filter):
+        df = cache.select(signal_filter)
+    elif reaches_archive(signal_filter):
+        df = query_long_range(signal_filter)
+    else:
+        return query_overview(signal_filter)
+    return {
+        "summary": summary_of(df),
+        "confidence_counts": counts_of(df, 'confidence_level'),
+        "token_counts": counts_of(df, 'token'),
+        "latest_critical": latest_of(df, 'CRITICAL'),
+    }
+
+def load_and_process_data(signal_filter, cursor=None):
+    """Loads one page of the filtered signal log, with its metadata expanded into columns."""
+    cache = get_signal_cache()
+    if cache.covers(signal_filter):
+        return page_of(cache.select(signal_filter), cursor, PAGE_SIZE)
+    if reaches_archive(signal_filter):
+        return page_of(query_long_range(signal_filter), cursor, PAGE_SIZE)
+    return query_page(signal_filter, cursor)
+
+def selection_or_all(selected, options):
+    """None (no SQL restriction) when every option is selected."""
+    return None if set(selected) == set(options) else tuple(selected)
 
 # --- Styling Functions ---
 def style_dataframe(df):
@@ -66,55 +145,49 @@ def style_dataframe(df):
 
 # --- Main Application ---
 st.title("ARKHEION-X: Intelligence Command Center")
-df_raw = load_and_process_data()
+oldest, newest = load_timestamp_bounds()
+if oldest is not None:
+    get_signal_cache().refresh()  # Appends only the rows added since the last rerun
 
 # --- Sidebar Filters ---
 st.sidebar.title("Filter Controls")
-if not df_raw.empty:
-    date_range = st.sidebar.date_input(
-        "Date Range",
-        value=(df_raw['timestamp'].min().date(), df_raw['timestamp'].max().date()),
-        min_value=df_raw['timestamp'].min().date(),
-        max_value=df_raw['timestamp'].max().date()
-    )
-    
-    # Convert date_range to datetime for filtering
-    start_date = pd.to_datetime(date_range[0])
-    end_date = pd.to_datetime(date_range[1]) + timedelta(days=1) # Include the end day
-
-    df_filtered = df_raw[(df_raw['timestamp'] >= start_date) & (df_raw['timestamp'] <= end_date)]
-
-    signal_types = df_filtered['signal_type'].unique()
-    selected_types = st.sidebar.multiselect("Signal Type", signal_types, default=signal_types)
-
-    confidence_levels = df_filtered['confidence_level'].unique()
-    selected_confidence = st.sidebar.multiselect("Confidence Level", confidence_levels, default=confidence_levels)
-
-    if 'token' in df_filtered.columns:
-        tokens = df_filtered['token'].dropna().unique()
-        selected_tokens = st.sidebar.multiselect("Token", tokens, default=tokens)
-        df_filtered = df_filtered[
-            df_filtered['signal_type'].isin(selected_types) &
-            df_filtered['confidence_level'].isin(selected_confidence) &
-            df_filtered['token'].isin(selected_tokens)
-        ]
-    else:
-        df_filtered = df_filtered[
-            df_filtered['signal_type'].isin(selected_types) &
-            df_filtered['confidence_level'].isin(selected_confidence)
-        ]
-else:
-    df_filtered = df_raw
+if oldest is None:
+    st.warning("No signals match your criteria or the database is empty.")
+    st.stop()
+
+date_range = st.sidebar.date_input(
+    "Date Range",
+    value=(oldest.date(), newest.date()),
+    min_value=oldest.date(),
+    max_value=newest.date()
+)
+# While a range is being picked the widget briefly holds a single date.
+first_day, last_day = (date_range[0], date_range[-1]) if isinstance(date_range, (tuple, list)) else (date_range, date_range)
+date_filter = SignalFilter.for_dates(first_day, last_day)
+
+signal_types, confidence_levels, tokens = load_filter_options(date_filter)
+selected_types = st.sidebar.multiselect("Signal Type", signal_types, default=signal_types)
+selected_confidence = st.sidebar.multiselect("Confidence Level", confidence_levels, default=confidence_levels)
+selected_tokens = st.sidebar.multiselect("Token", tokens, default=tokens) if tokens else []
+
+signal_filter = SignalFilter(
+    start=date_filter.start,
+    end=date_filter.end,
+    signal_types=selection_or_all(selected_types, signal_types),
+    confidence_levels=selection_or_all(selected_confidence, confidence_levels),
+    # Off-chain signals have no token, so the token filter only applies once narrowed.
+    tokens=selection_or_all(selected_tokens, tokens),
+)
+overview = load_overview(signal_filter)
 
 # --- Dashboard Display ---
-if df_filtered.empty:
+if overview["summary"]["total"] == 0:
     st.warning("No signals match your criteria or the database is empty.")
 else:
     # --- Latest Critical Signal Ticker ---
     st.markdown("### Latest Critical Intel")
-    latest_critical = df_filtered[df_filtered['confidence_level'] == 'CRITICAL'].iloc[0:1]
-    if not latest_critical.empty:
-        signal = latest_critical.iloc[0]
+    signal = overview["latest_critical"]
+    if signal is not None:
         st.warning(
             f"**{signal['signal_type']}**: {signal.get('amount', 'N/A')} {signal.get('token', 'N/A')} "
             f"to wallet `{signal.get('to', 'N/A')}` (Tx Count: {signal.get('receiver_tx_count', 'N/A')}) at {signal['timestamp']}",
@@ -125,31 +198,40 @@ else:
 
     # --- Key Metrics ---
     st.markdown("### High-Level Overview")
-    total_signals = len(df_filtered)
-    critical_signals = len(df_filtered[df_filtered['confidence_level'] == 'CRITICAL'])
-    fresh_wallets = len(df_filtered[df_filtered['signal_type'] == 'Fresh Wallet Accumulation'])
-
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Signals Displayed", total_signals)
-    col2.metric("Critical 'Smart Money' Alerts", critical_signals)
-    col3.metric("Fresh Wallets Detected", fresh_wallets)
+    col1.metric("Total Signals Displayed", overview["summary"]["total"])
+    col2.metric("Critical 'Smart Money' Alerts", overview["summary"]["critical"])
+    col3.metric("Fresh Wallets Detected", overview["summary"]["fresh_wallets"])
 
     # --- Visualizations ---
     st.markdown("### Data Visualization")
     col1_chart, col2_chart = st.columns(2)
     with col1_chart:
         st.subheader("Signal Confidence Breakdown")
-        confidence_counts = df_filtered['confidence_level'].value_counts()
+        confidence_counts = pd.Series(overview["confidence_counts"])
         fig_pie = px.pie(confidence_counts, values=confidence_counts.values, names=confidence_counts.index, hole=.4)
         st.plotly_chart(fig_pie, use_container_width=True)
 
     with col2_chart:
-        if 'token' in df_filtered.columns:
+        if overview["token_counts"]:
             st.subheader("Signal Activity by Token")
-            token_counts = df_filtered['token'].value_counts()
+            token_counts = pd.Series(overview["token_counts"])
             fig_bar = px.bar(token_counts, x=token_counts.index, y=token_counts.values, labels={'x':'Token', 'y':'Signal Count'})
             st.plotly_chart(fig_bar, use_container_width=True)
 
     # --- Data Table ---
     st.markdown("### Full Signal Log (Filtered)")
-    st.dataframe(style_dataframe(df_filtered), use_container_width=True)
\ No newline at end of file
+    # Keyset pagination: a stack of page cursors, reset whenever the filters change.
+    if st.session_state.get('log_filter') != signal_filter:
+        st.session_state.log_filter = signal_filter
+        st.session_state.log_cursors = [None]
+    cursors = st.session_state.log_cursors
+    df_page, next_cursor = load_and_process_data(signal_filter, cursors[-1])
+    # style_dataframe rewrites columns, so hand it a copy rather than the shared cached frame.
+    df_page = df_page.drop(columns=['id']).dropna(axis=1, how='all')
+    st.dataframe(style_dataframe(df_page), use_container_width=True)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    col_prev.button("← Newer", disabled=len(cursors) == 1, on_click=cursors.pop)
+    col_page.caption(f"Page {len(cursors)} · {PAGE_SIZE} signals per page")
+    col_next.button("Older →", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
@@ -1,34 +1,100 @@
 # database.py
-import sqlite3
+import os
 import json
+import atexit
+import threading
+from datetime import datetime, timezone
 
-DB_FILE = "arkheionx.db"
+from signal_sink import SignalSink, open_connection
+from migrations import migrate
+import metrics
+from settings import settings
+
+DB_FILE = settings.arkheionx_db
+
+# One sink (and therefore one writer connection) per process.
+_sink = None
+_sink_lock = threading.Lock()
+# Long-lived per-thread connections for reads and small state writes.
+_local = threading.local()
 
 def initialize_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS alpha_signals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            source TEXT NOT NULL,
-            signal_type TEXT NOT NULL,
-            metadata TEXT,
-            confidence_level TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    conn = open_connection(DB_FILE)
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    if applied:
+        print(f"[DB] Schema upgraded to v{applied[-1]}.")
     print("[DB] Database initialized.")
 
+def get_connection():
+    """Returns this thread's long-lived WAL-mode connection, opening it on first use."""
+    if getattr(_local, 'conn', None) is None or _local.pid != os.getpid():
+        _local.conn = open_connection(DB_FILE)
+        _local.pid = os.getpid()
+    return _local.conn
+
+def get_signal_sink():
+    """Returns this process's signal sink, starting its writer thread on first use."""
+    global _sink
+    with _sink_lock:
+        # A sink inherited through fork() has no writer thread in this process.
+        if _sink is None or _sink.pid != os.getpid():
+            _sink = SignalSink(DB_FILE)
+            _sink.start()
+            metrics.db_queue_depth.set_function(_sink.pending)
+        return _sink
+
 def log_signal(source, signal_type, metadata, confidence):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    # The timestamp is taken now rather than at flush time so batching doesn't skew it.
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
     metadata_json = json.dumps(metadata)
-    cursor.execute('''
-        INSERT INTO alpha_signals (source, signal_type, metadata, confidence_level)
-        VALUES (?, ?, ?, ?)
-    ''', (source, signal_type, metadata_json, confidence))
-    conn.commit()
-    conn.close()
-    print(f"[DB] Signal logged from: {source}")
\ No newline at end of file
+    get_signal_sink().submit((timestamp, source, signal_type, metadata_json, confidence))
+
+def persist_signal(signal):
+    """Signal-bus listener: queues a published Signal for the background writer."""
+    get_signal_sink().submit((
+        signal.timestamp, signal.source, signal.signal_type,
+        json.dumps(signal.metadata), signal.confidence,
+    ))
+
+def load_state(conn, agent, key, default=None):
+    """Reads one persisted value for an agent (watermarks, cursors, ETags...)."""
+    row = conn.execute("SELECT value FROM agent_state WHERE agent = ? AND key = ?", (agent, key)).fetchone()
+    return json.loads(row[0]) if row else default
+
+def save_state(conn, agent, key, value):
+    """Upserts one persisted value for an agent. The caller owns the transaction."""
+    conn.execute('''
+        INSERT INTO agent_state (agent, key, value, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (agent, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    ''', (agent, key, json.dumps(value)))
+
+def read_state(agent, key, default=None):
+    """load_state on this thread's connection."""
+    return load_state(get_connection(), agent, key, default)
+
+def write_state(agent, key, value):
+    """save_state on this thread's connection, committed immediately."""
+    conn = get_connection()
+    with conn:
+        save_state(conn, agent, key, value)
+
+def flush_signals():
+    """Blocks until every signal logged so far has been written to the database."""
+    if _sink is not None and _sink.pid == os.getpid():
+        _sink.flush()
+
+def shutdown_signal_sink(timeout=10.0):
+    """Writes any pending signals and stops the background writer."""
+    global _sink
+    with _sink_lock:
+        if _sink is not None and _sink.pid == os.getpid():
+            pending = _sink.pending()
+            if pending:
+                print(f"[DB] Flushing {pending} pending signal(s) before shutdown...")
+            _sink.close(timeout)
+        _sink = None
+
+atexit.register(shutdown_signal_sink)
@@ -4,43 +4,103 @@ ARKHEION-X: Quant Engine v1.2 (Module Edition)
 This script acts as the on-chain intelligence agent. It has been refactored
 to be importable by a main controller script (main.py). Its primary function
 is to monitor blockchain events and log signals to a shared database.
+
+Scanned blocks are tracked by hash (block_tracker.py): signals of blocks
+orphaned by a chain reorganization are rolled back and the blocks re-scanned,
+and ONCHAIN_CONFIRMATIONS delays (or, with ONCHAIN_PROVISIONAL, finalizes)
+signals until their block is that deep.
 """
 import os
 import time
 import json
+import uuid
 import logging
-from dotenv import load_dotenv
+import threading
 from web3 import Web3
 
-# Import local database utilities
-from database import initialize_db, log_signal
+# Import local database and signal bus utilities
+from database import initialize_db, persist_signal, flush_signals, get_connection, read_state, save_state, write_state
+from signal_bus import Signal, bus
+from wallet_classifier import FreshWalletClassifier
+from price_oracle import PriceOracle
+from multicall import BatchReader
+from anomaly import ANOMALY_AGENT, AnomalyScorer
+from token_registry import CHECKPOINT_AGENT, DEFAULT_TOKENS, EXTRA_TOKEN_ADDRESSES, TOKEN_METADATA_AGENT, token_name
+from block_tracker import (BlockTracker, HISTORY_BLOCKS, FINALITY_PROVISIONAL, REORG_SIGNAL, normalize_hash,
+                           rollback_signals, finalize_signals)
+import metrics
+import numpy as np
+from settings import configure_logging, settings
 
 # --- Configuration ---
-load_dotenv()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
 # A list of RPC URLs provides redundancy.
 RPC_URLS = [
-    os.getenv("ARBITRUM_RPC_URL"),
+    settings.arbitrum_rpc_url,
     "https://arbitrum.public.blockpi.network/v1/rpc/public",
     "https://api.zan.top/node/v1/arb/one/public",
 ]
 
-# A dictionary of target ERC20 tokens to monitor.
-TARGET_TOKENS = {
-    "USDC": {"address": "0xaf88d065e77c8cC2239327C5EDb3A432268e5831", "decimals": 6},
-    "ARB": {"address": "0x912CE59144191C1204E64559FE8253a0e49E6548", "decimals": 18},
-}
+# WebSocket endpoint for streaming newHeads/logs via eth_subscribe. Without it the agent polls.
+WS_RPC_URL = settings.arbitrum_ws_url
+
+# Set ONCHAIN_ASYNC=true to run the asyncio agent (async_engine.py) over a health-scored RPC pool.
+# Subscription mode is only available there, so a WS endpoint implies the async agent.
+USE_ASYNC_PATROL = settings.onchain_async or bool(WS_RPC_URL)
+
+# A dictionary of target ERC20 tokens to monitor (see token_registry.py), completed with
+# their decimals and symbols at startup (see load_token_metadata).
+TARGET_TOKENS = {name: dict(config) for name, config in DEFAULT_TOKENS.items()}
 
 # --- Thresholds ---
+# Transfers are scored against per-token baselines (anomaly.py). This fixed threshold only
+# applies while a token's baseline is still warming up.
 MIN_TRANSFER_VALUE_USD = 10000
+MIN_ANOMALY_VALUE_USD = 1000 # Priced anomalous Transfers below this are ignored
 FRESH_WALLET_TX_COUNT = 5
 POLLING_INTERVAL = 10
+MAX_BLOCK_RANGE = 2000 # Largest range requested in one eth_getLogs call; split further on provider errors
+
+# Blocks a Transfer needs on top of it before its signal counts as final. Without provisional
+# signals the patrol only scans that deep; with them it scans to the head and finalizes later.
+CONFIRMATIONS = settings.onchain_confirmations
+PROVISIONAL_SIGNALS = settings.onchain_provisional and CONFIRMATIONS > 0
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# Fragments of provider error messages meaning "ask for a smaller block range".
+RANGE_ERROR_HINTS = ("block range", "too many results", "returned more than", "-32005", "response size")
+# Fragments meaning "slow down" (HTTP 429 and the like): the endpoint is throttling, whatever
+# the range. These win over RANGE_ERROR_HINTS (some providers answer a rate limit with -32005).
+RATE_LIMIT_HINTS = ("too many requests", "rate limit", "rate exceeded", "request count", "throttl")
+RATE_LIMIT_BASE_DELAY = 5   # Seconds to back off after a throttled call; doubles while it lasts
+RATE_LIMIT_MAX_DELAY = 300
+
+SIGNAL_SOURCE = "On-Chain Agent"
+ERC20_ABI_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "erc20_abi.json")
 
 # --- Global Variables ---
 # These will be initialized by the start_onchain_patrol function
 w3 = None
 erc20_abi = None
+# Lowercased contract address -> (token_name, token_config, Transfer event decoder).
+transfer_decoders = {}
+# Checksummed addresses of every target token, passed to eth_getLogs as one filter.
+transfer_addresses = []
+# Batched, cached receiver nonce lookups.
+fresh_wallets = None
+# Cached, multicall-batched USD prices.
+price_oracle = None
+# Per-token size and frequency baselines; restored from agent_state by load_baselines().
+anomaly_scorer = AnomalyScorer()
+# Token name -> last block fully scanned, persisted in agent_state.
+token_checkpoints = {}
+# Hashes of recently scanned blocks; restored from agent_state by resume_block().
+block_tracker = BlockTracker()
+# Set in shard worker processes (sharding.py): hands checkpoints to the writer process.
+remote_checkpoint = None
+# Set in shard worker processes: hands signal rollbacks and finalizations to the writer process.
+remote_signal_update = None
 
 def connect_to_rpc():
     """Attempts to connect to a list of RPC URLs."""
@@ -55,25 +115,417 @@ def connect_to_rpc():
             logging.warning(f"ON-CHAIN AGENT: Failed to connect to {url}. Trying next...")
     return None
 
-def handle_event(event, token_name, token_config):
-    """Processes a single Transfer event."""
+def load_erc20_abi():
+    """Loads the ERC20 ABI. Returns None if the file is missing."""
+    try:
+        with open(ERC20_ABI_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.critical("ON-CHAIN AGENT: erc20_abi.json not found. Terminating patrol.")
+        return None
+
+def decode_symbol(web3, data):
+    """ERC20 symbol() result; a few old tokens return bytes32 instead of a string."""
+    try:
+        return web3.codec.decode(["string"], data)[0]
+    except Exception:
+        return data[:32].rstrip(b"\0").decode("utf-8", errors="ignore") or None
+
+def load_token_metadata(web3=None):
+    """
+    Fills in decimals and symbol for every target token, adding the EXTRA_TOKEN_ADDRESSES
+    under their symbol. Values are cached in agent_state; only unknown tokens are read,
+    all in one multicall batch. TARGET_TOKENS is updated in place.
+    """
+    web3 = web3 or w3
+    tokens = dict(TARGET_TOKENS)
+    known_addresses = {config['address'].lower() for config in tokens.values()}
+    for address in EXTRA_TOKEN_ADDRESSES:
+        if address.lower() not in known_addresses:
+            tokens[address] = {"address": address}
+            known_addresses.add(address.lower())
+
+    reader = BatchReader(web3)
+    pending = {}
+    for name, config in tokens.items():
+        cached = read_state(TOKEN_METADATA_AGENT, config['address'].lower())
+        if cached is not None:
+            config.setdefault('decimals', cached['decimals'])
+            config.setdefault('symbol', cached['symbol'])
+        elif 'decimals' not in config or 'symbol' not in config:
+            pending[name] = (reader.add(config['address'], "decimals()", output_types=["uint8"]),
+                             reader.add(config['address'], "symbol()"))
+    reader.flush()
+
+    for name, (decimals_future, symbol_future) in pending.items():
+        config = tokens[name]
+        try:
+            config.setdefault('decimals', decimals_future.result())
+        except Exception as e:
+            logging.error(f"ON-CHAIN AGENT: Could not read decimals() of {name} ({config['address']}): {e}. Skipping token.")
+            del tokens[name]
+            continue
+        symbol = decode_symbol(web3, symbol_future.result()) if symbol_future.exception() is None else None
+        config.setdefault('symbol', symbol or name)
+        write_state(TOKEN_METADATA_AGENT, config['address'].lower(), {"decimals": config['decimals'], "symbol": config['symbol']})
+
+    TARGET_TOKENS.clear()
+    for name, config in tokens.items():
+        if name in EXTRA_TOKEN_ADDRESSES:
+            # Tokens given by address are named after their symbol (suffixed if it is taken).
+            name = token_name(config['symbol'], config['address'], TARGET_TOKENS)
+            if 'price' not in config:
+                logging.warning(f"ON-CHAIN AGENT: {name} has no price source; its transfers will be valued at 0.")
+        TARGET_TOKENS[name] = config
+    logging.info(f"ON-CHAIN AGENT: Token metadata ready for {len(TARGET_TOKENS)} token(s) ({len(pending)} read on-chain).")
+    return TARGET_TOKENS
+
+def build_transfer_decoders(web3=None):
+    """Builds one contract and Transfer decoder per target token, keyed by lowercased address."""
+    web3 = web3 or w3
+    decoders = {}
+    for token_name, config in TARGET_TOKENS.items():
+        contract = web3.eth.contract(address=Web3.to_checksum_address(config['address']), abi=erc20_abi)
+        decoders[config['address'].lower()] = (token_name, config, contract.events.Transfer())
+    return decoders
+
+def is_rate_limit_error(error):
+    """True if a provider refused a call because it is throttling us (HTTP 429 and the like)."""
+    message = str(error).lower()
+    return any(hint in message for hint in RATE_LIMIT_HINTS)
+
+def is_range_error(error):
+    """True if a provider rejected a get_logs call because the block range or result was too large."""
+    message = str(error).lower()
+    return any(hint in message for hint in RANGE_ERROR_HINTS) and not is_rate_limit_error(error)
+
+def rate_limit_delay(throttled):
+    """Back-off in seconds after `throttled` consecutive rate-limited attempts."""
+    return min(RATE_LIMIT_BASE_DELAY * 2 ** max(throttled - 1, 0), RATE_LIMIT_MAX_DELAY)
+
+def get_transfer_logs(from_block, to_block, web3=None):
+    """One eth_getLogs call for every target token's Transfers in [from_block, to_block]."""
+    web3 = web3 or w3
+    with metrics.rpc_latency.time(call="eth_getLogs", endpoint=metrics.endpoint_of(web3)):
+        return web3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": transfer_addresses,
+            "topics": [TRANSFER_TOPIC],
+        })
+
+def get_block_number(web3=None):
+    """Head block number, timed like every other RPC call."""
+    web3 = web3 or w3
+    with metrics.rpc_latency.time(call="eth_blockNumber", endpoint=metrics.endpoint_of(web3)):
+        return web3.eth.block_number
+
+def get_block_header(number, web3=None):
+    """One block (hash, parentHash...) without its transactions, timed like every other RPC call."""
+    web3 = web3 or w3
+    with metrics.rpc_latency.time(call="eth_getBlockByNumber", endpoint=metrics.endpoint_of(web3)):
+        return web3.eth.get_block(number)
+
+def fetch_transfer_logs(from_block, to_block):
+    """
+    Fetches raw Transfer logs for every target token with one eth_getLogs call.
+    Halves the range and retries when the provider says it is too large.
+    """
+    try:
+        return get_transfer_logs(from_block, to_block)
+    except Exception as e:
+        if from_block >= to_block or not is_range_error(e):
+            raise
+        middle = (from_block + to_block) // 2
+        logging.info(f"ON-CHAIN AGENT: Provider rejected blocks {from_block}-{to_block}; splitting the range.")
+        return fetch_transfer_logs(from_block, middle) + fetch_transfer_logs(middle + 1, to_block)
+
+def decode_transfer_logs(raw_logs, skip_checkpointed=False):
+    """
+    Decodes raw logs in bulk. Yields (event, token_name, token_config) for known tokens.
+    With skip_checkpointed, logs at or below their token's scan checkpoint are dropped.
+    """
+    for raw_log in raw_logs:
+        decoder = transfer_decoders.get(raw_log['address'].lower())
+        if decoder is None:
+            continue
+        token_name, config, transfer_event = decoder
+        if skip_checkpointed and raw_log['blockNumber'] <= token_checkpoints.get(token_name, -1):
+            continue
+        yield transfer_event.process_log(raw_log), token_name, config
+
+def load_baselines():
+    """Restores every target token's anomaly baseline from agent_state."""
+    anomaly_scorer.load({
+        token_name: read_state(ANOMALY_AGENT, f"baseline:{token_name}") for token_name in TARGET_TOKENS
+    })
+
+def select_significant(events, block_range=None):
+    """
+    Scores decoded Transfers against their token's baseline, one vectorised pass per token.
+    `block_range` is the (first, last) block the events cover completely; without it (a
+    partial stream flush) Transfer frequency is not scored. Returns
+    (significant, spikes): significant is a list of (event, token_name, config, score), where
+    score is None for tokens still warming up (those fall back to MIN_TRANSFER_VALUE_USD);
+    spikes is a list of (token_name, metadata) for anomalous Transfer counts.
+    """
+    price_oracle.prefetch_events(events)
+    by_token = {token_name: [] for token_name in TARGET_TOKENS} if block_range is not None else {}
+    for event, token_name, config in events:
+        by_token.setdefault(token_name, []).append((event, config, *transfer_value(event, token_name, config)))
+
+    significant, spikes = [], []
+    for token_name, scored in by_token.items():
+        amounts = np.array([amount for _, _, amount, _ in scored], dtype=float)
+        values_usd = np.array([value_usd for _, _, _, value_usd in scored], dtype=float)
+        blocks = np.array([event['blockNumber'] for event, _, _, _ in scored], dtype=np.int64)
+        score = anomaly_scorer.score_range(token_name, amounts, blocks, block_range)
+        if score.z_scores is None:
+            selected = values_usd >= MIN_TRANSFER_VALUE_USD
+        else:
+            # Unpriced tokens (valued at 0) are judged on their amounts alone.
+            selected = score.anomalous & ((values_usd == 0) | (values_usd >= MIN_ANOMALY_VALUE_USD))
+        for index in np.flatnonzero(selected):
+            event, config = scored[index][:2]
+            details = None if score.z_scores is None else {
+                "z_score": round(float(score.z_scores[index]), 2),
+                "size_percentile": round(float(score.percentiles[index]) * 100, 3),
+                "median_amount": f"{anomaly_scorer.baseline(token_name).median_amount():,.2f}",
+            }
+            significant.append((event, token_name, config, details))
+        if score.spike:
+            spikes.append((token_name, {
+                "token": token_name, "from_block": block_range[0], "to_block": block_range[1],
+                "block_number": block_range[1], "transfers": score.transfers,
+                "expected_transfers": round(score.expected, 1), "z_score": round(score.rate_z, 2),
+            }))
+    significant.sort(key=lambda item: (item[0]['blockNumber'], item[0]['logIndex']))
+    return significant, spikes
+
+def handle_significant(significant, spikes, block_timestamps=None):
+    """
+    Classifies the output of select_significant, resolving every receiver's nonce in one batch
+    first. `block_timestamps` (block number -> epoch seconds) dates signals by their block
+    instead of now, which matters for backfills.
+    """
+    fresh_wallets.prefetch([event['args']['to'] for event, _, _, _ in significant])
+    for event, token_name, config, score in significant:
+        detected_at = block_timestamps.get(event['blockNumber']) if block_timestamps else None
+        handle_event(event, token_name, config, detected_at, score)
+    for token_name, metadata in spikes:
+        logging.warning(f"ON-CHAIN AGENT: {token_name} Transfer frequency spike: {metadata['transfers']} Transfers "
+                        f"in blocks {metadata['from_block']}-{metadata['to_block']} "
+                        f"(~{metadata['expected_transfers']:,.0f} expected)")
+        detected_at = block_timestamps.get(metadata['to_block']) if block_timestamps else None
+        timing = {"detected_at": detected_at} if detected_at is not None else {}
+        if PROVISIONAL_SIGNALS:
+            metadata["finality"] = FINALITY_PROVISIONAL
+        bus.publish(Signal(SIGNAL_SOURCE, "Transfer Frequency Spike", metadata, "MEDIUM", **timing))
+
+def record_signal_blocks(significant):
+    """Remembers the hash of every block a signal is about to come from, for reorg checks."""
+    for event, _, _, _ in significant:
+        block_tracker.record(event['blockNumber'], event['blockHash'])
+
+def process_events(events, block_timestamps=None, block_range=None):
+    """Scores decoded Transfers (select_significant) and classifies the significant ones."""
+    significant, spikes = select_significant(events, block_range)
+    record_signal_blocks(significant)
+    handle_significant(significant, spikes, block_timestamps)
+
+def record_scan(from_block, to_block, event_count, elapsed):
+    """Exports one scanned chunk: blocks scanned, scan rate and Transfers handled."""
+    blocks = to_block - from_block + 1
+    metrics.blocks_scanned.inc(blocks, agent=CHECKPOINT_AGENT)
+    metrics.scan_rate.set(blocks / elapsed if elapsed > 0 else 0.0, agent=CHECKPOINT_AGENT)
+    metrics.events_per_cycle.observe(event_count, agent=CHECKPOINT_AGENT)
+
+def scan_target(head):
+    """The last block to scan for a given head: the confirmation depth, unless signals are provisional."""
+    return head if PROVISIONAL_SIGNALS else head - CONFIRMATIONS
+
+def tip_is_consistent(events, tip_block, tip):
+    """
+    False if a log of `tip_block` names another block hash than its header `tip` (read before
+    the logs): the chain reorganized during the scan, so the chunk is dropped and re-scanned.
+    """
+    tip_hash = normalize_hash(tip['hash'])
+    for event, _, _ in events:
+        if event['blockNumber'] == tip_block and normalize_hash(event['blockHash']) != tip_hash:
+            logging.warning(f"ON-CHAIN AGENT: Block {tip_block} changed while it was scanned; re-scanning it.")
+            return False
+    return True
+
+def scan_block_range(from_block, to_block, stop_event=None):
+    """
+    Scans [from_block, to_block] in MAX_BLOCK_RANGE chunks and handles every Transfer found.
+    Stops between chunks once `stop_event` is set; returns the last block fully scanned.
+    """
+    scanned = from_block - 1
+    for chunk_start in range(from_block, to_block + 1, MAX_BLOCK_RANGE):
+        if stop_event is not None and stop_event.is_set():
+            break
+        chunk_end = min(chunk_start + MAX_BLOCK_RANGE - 1, to_block)
+        started = time.perf_counter()
+        tip = get_block_header(chunk_end)
+        events = list(decode_transfer_logs(fetch_transfer_logs(chunk_start, chunk_end), skip_checkpointed=True))
+        if not tip_is_consistent(events, chunk_end, tip):
+            break
+        process_events(events, block_range=(chunk_start, chunk_end))
+        block_tracker.record(chunk_end, tip['hash'])
+        commit_checkpoint(chunk_end)
+        record_scan(chunk_start, chunk_end, len(events), time.perf_counter() - started)
+        scanned = chunk_end
+    return scanned
+
+def canonical_hashes(get_header):
+    """number -> current canonical block hash, reading each header at most once."""
+    cache = {}
+    def canonical_hash(number):
+        if number not in cache:
+            cache[number] = normalize_hash(get_header(number)['hash'])
+        return cache[number]
+    return canonical_hash
+
+def check_chain(latest_block, get_header=get_block_header):
+    """
+    Checks that the block after `latest_block` builds on the block hash recorded for it.
+    On a reorg, rolls back to the fork point. Returns the last block still scanned.
+    """
+    header = get_header(latest_block + 1)
+    if header is None or block_tracker.parent_matches(latest_block + 1, header['parentHash']):
+        return latest_block
+    return handle_reorg(latest_block, canonical_hashes(get_header))
+
+def handle_reorg(latest_block, canonical_hash, below=None):
+    """Finds the fork point below `below` (default: anywhere) and rolls back to it. Returns it."""
+    fork_block = block_tracker.find_fork(canonical_hash, below)
+    if fork_block is None:
+        fork_block = (block_tracker.oldest() or latest_block) - 1
+        logging.critical(f"ON-CHAIN AGENT: Reorg deeper than the {block_tracker.history_blocks} tracked blocks; "
+                         f"rolling back to block {fork_block}.")
+    rollback_to(fork_block, latest_block)
+    return fork_block
+
+def rollback_to(fork_block, latest_block):
+    """
+    Deletes this agent's signals of every block above `fork_block`, rewinds the scan checkpoints
+    to it and publishes a Chain Reorganization signal (the correlator drops the orphaned moves).
+    """
+    logging.warning(f"ON-CHAIN AGENT: Chain reorganization: blocks after {fork_block} were replaced "
+                    f"(scanned through {latest_block}). Rolling back their signals and re-scanning them.")
+    metrics.chain_reorgs.inc(agent=CHECKPOINT_AGENT)
+    metrics.reorg_depth.observe(max(latest_block - fork_block, 0), agent=CHECKPOINT_AGENT)
+    block_tracker.rollback(fork_block)
+    # reorg_id lets the correlator apply the signal once, whether it arrives by bus or from the database.
+    metadata = {"tokens": list(TARGET_TOKENS), "fork_block": fork_block, "scanned_through": latest_block,
+                "reorg_id": uuid.uuid4().hex}
+    if remote_signal_update is not None:
+        remote_signal_update("rollback", SIGNAL_SOURCE, list(TARGET_TOKENS), fork_block)
+    else:
+        flush_signals()  # Rows still queued for orphaned blocks must be on disk before the delete
+        conn = get_connection()
+        with conn:
+            metadata["signals_removed"] = rollback_signals(conn, SIGNAL_SOURCE, TARGET_TOKENS, fork_block)
+    # Streamed signals can run ahead of the checkpoint; it never moves forward here.
+    commit_checkpoint(min(fork_block, latest_block))
+    bus.publish(Signal(SIGNAL_SOURCE, REORG_SIGNAL, metadata, "MEDIUM"))
+
+def finalize(head, latest_block, get_header=get_block_header):
+    """
+    Provisional mode: checks the hashes recorded for blocks that reached CONFIRMATIONS since the
+    last call against the canonical chain, then marks their signals final. A mismatch is a reorg
+    and is rolled back instead. Returns the last block still scanned.
+    """
+    through = min(head - CONFIRMATIONS, latest_block)
+    start = block_tracker.finalized_through
+    start = start + 1 if start is not None else (block_tracker.oldest() or through + 1)
+    if through < start:
+        return latest_block
+    canonical_hash = canonical_hashes(get_header)
+    for number, block_hash in block_tracker.between(start, through):
+        if canonical_hash(number) != block_hash:
+            return handle_reorg(latest_block, canonical_hash, below=number)
+    if remote_signal_update is not None:
+        remote_signal_update("finalize", SIGNAL_SOURCE, list(TARGET_TOKENS), start, through)
+    else:
+        flush_signals()  # Queued signals of these blocks must be on disk to be marked final
+        conn = get_connection()
+        with conn:
+            finalized = finalize_signals(conn, SIGNAL_SOURCE, TARGET_TOKENS, start, through)
+        metrics.signals_finalized.inc(finalized, agent=CHECKPOINT_AGENT)
+    block_tracker.finalized_through = through
+    return latest_block
+
+def tracker_key():
+    """agent_state key of the block tracker; shard workers each track their own tokens."""
+    return f"blocks:{','.join(sorted(TARGET_TOKENS))}"
+
+def resume_block(head):
+    """Loads the per-token scan checkpoints and returns the block the patrol has fully scanned."""
+    global token_checkpoints, block_tracker
+    token_checkpoints = {
+        token_name: block for token_name in TARGET_TOKENS
+        if (block := read_state(CHECKPOINT_AGENT, f"checkpoint:{token_name}")) is not None
+    }
+    block_tracker = BlockTracker(read_state(CHECKPOINT_AGENT, tracker_key()), max(HISTORY_BLOCKS, 2 * CONFIRMATIONS))
+    if not token_checkpoints:
+        return head
+    resume_from = min(min(token_checkpoints.values()), head)
+    if resume_from < head:
+        logging.info(f"ON-CHAIN AGENT: Resuming from checkpoint: {head - resume_from} block(s) missed while offline.")
+    return resume_from
+
+def commit_checkpoint(block):
+    """
+    Records that every target token is scanned through `block`, together with the anomaly
+    baselines and the block tracker as of that block. Pending signals are flushed first, so a
+    checkpoint never runs ahead of what is on disk.
+    """
+    baselines = [(ANOMALY_AGENT, f"baseline:{token_name}", state)
+                 for token_name, state in anomaly_scorer.changed_states().items()]
+    baselines.append((CHECKPOINT_AGENT, tracker_key(), block_tracker.to_state()))
+    if remote_checkpoint is not None:
+        # Shard worker: the writer process saves it once the signals queued before it are on disk.
+        remote_checkpoint({token_name: block for token_name in TARGET_TOKENS}, baselines)
+        token_checkpoints.update({token_name: block for token_name in TARGET_TOKENS})
+        return
+    flush_signals()
+    conn = get_connection()
+    with conn:
+        for token_name in TARGET_TOKENS:
+            save_state(conn, CHECKPOINT_AGENT, f"checkpoint:{token_name}", block)
+            token_checkpoints[token_name] = block
+        for agent, key, state in baselines:
+            save_state(conn, agent, key, state)
+
+def transfer_value(event, token_name, token_config):
+    """Returns (amount, estimated USD value) of a Transfer event. Unpriced tokens are valued at 0."""
+    amount = event['args']['value'] / (10**token_config['decimals'])
+    price = price_oracle.price(token_name, event['blockNumber'])
+    value_usd = amount * price if price is not None else 0.0
+    return amount, value_usd
+
+def handle_event(event, token_name, token_config, detected_at=None, score=None):
+    """
+    Processes a single Transfer event. `score` is its anomaly score from select_significant;
+    without one the Transfer only counts if it is worth MIN_TRANSFER_VALUE_USD.
+    """
     args = event['args']
-    amount = args['value'] / (10**token_config['decimals'])
-    value_usd = amount if token_name in ["USDC", "USDT"] else amount * 1 # Placeholder price
-    if value_usd < MIN_TRANSFER_VALUE_USD:
+    amount, value_usd = transfer_value(event, token_name, token_config)
+    if score is None and value_usd < MIN_TRANSFER_VALUE_USD:
         return
 
     tx_hash = event['transactionHash'].hex()
     sender = args['from']
     receiver = args['to']
-    logging.info(f"ON-CHAIN AGENT: Significant Transfer Detected: {amount:,.2f} {token_name}")
+    if score is None:
+        logging.info(f"ON-CHAIN AGENT: Significant Transfer Detected: {amount:,.2f} {token_name}")
+    else:
+        logging.info(f"ON-CHAIN AGENT: Anomalous Transfer Detected: {amount:,.2f} {token_name} "
+                     f"(z {score['z_score']}, typical {score['median_amount']})")
 
-    try:
-        tx_count = w3.eth.get_transaction_count(receiver)
-        is_fresh_wallet = tx_count < FRESH_WALLET_TX_COUNT
-    except Exception:
-        tx_count = 'unknown'
-        is_fresh_wallet = False
+    tx_count, is_fresh_wallet = fresh_wallets.is_fresh(receiver)
 
     confidence = "HIGH"
     signal_type = "Large Token Transfer"
@@ -86,16 +538,23 @@ def handle_event(event, token_name, token_config):
     metadata = {
         "token": token_name, "from": sender, "to": receiver,
         "amount": f"{amount:,.2f}", "value_usd_est": f"${value_usd:,.2f}",
-        "tx_hash": tx_hash, "receiver_tx_count": tx_count
+        "tx_hash": tx_hash, "log_index": event['logIndex'], "receiver_tx_count": tx_count,
+        "block_number": event['blockNumber'],
     }
-    log_signal("On-Chain Agent", signal_type, metadata, confidence)
+    if PROVISIONAL_SIGNALS:
+        metadata["finality"] = FINALITY_PROVISIONAL
+    metadata.update(score or {})
+    # Backfilled Transfers are dated by their block; live ones default to now.
+    timing = {"detected_at": detected_at} if detected_at is not None else {}
+    bus.publish(Signal(SIGNAL_SOURCE, signal_type, metadata, confidence, **timing))
 
-def start_onchain_patrol():
+def start_onchain_patrol(stop_event=None, ready_event=None):
     """
     This is the main function to be called by main.py to start the agent.
-    It handles initialization and the main event loop.
+    It handles initialization and the main event loop, sets `ready_event`
+    once initialized and returns between cycles when `stop_event` is set.
     """
-    global w3, erc20_abi # We need to modify the global variables
+    global w3, erc20_abi, transfer_decoders, transfer_addresses, fresh_wallets, price_oracle # We need to modify the global variables
     
     # --- Initialization Step ---
     w3 = connect_to_rpc()
@@ -103,46 +562,58 @@ def start_onchain_patrol():
         logging.critical("ON-CHAIN AGENT: Could not establish RPC connection. Terminating patrol.")
         return
 
-    try:
-        with open('modules/quant-engine/erc20_abi.json', 'r') as f:
-            erc20_abi = json.load(f)
-    except FileNotFoundError:
-        logging.critical("ON-CHAIN AGENT: erc20_abi.json not found. Terminating patrol.")
+    erc20_abi = load_erc20_abi()
+    if erc20_abi is None:
         return
 
     initialize_db()
+    load_token_metadata()
+    transfer_decoders = build_transfer_decoders()
+    transfer_addresses = [Web3.to_checksum_address(address) for address in transfer_decoders]
+    fresh_wallets = FreshWalletClassifier(w3, FRESH_WALLET_TX_COUNT)
+    price_oracle = PriceOracle(w3, TARGET_TOKENS)
+    load_baselines()
     logging.info(f"ON-CHAIN AGENT: Patrol started. Monitoring {len(TARGET_TOKENS)} tokens...")
-    latest_block = w3.eth.block_number
+    latest_block = resume_block(scan_target(get_block_number()))
+    stop_event = stop_event or threading.Event()
+    if ready_event is not None:
+        ready_event.set()
 
     # --- Main Patrol Loop ---
-    while True:
+    throttled = 0  # Consecutive rate-limited cycles
+    while not stop_event.is_set():
         try:
-            new_block = w3.eth.block_number
-            if new_block > latest_block:
+            new_block = get_block_number()
+            target_block = scan_target(new_block)
+            if target_block > latest_block:
                 # To make logs cleaner, we only log when a scan happens on new blocks
-                # logging.info(f"ON-CHAIN AGENT: Scanning blocks from {latest_block + 1} to {new_block}...")
-                for token_name, config in TARGET_TOKENS.items():
-                    contract = w3.eth.contract(address=config['address'], abi=erc20_abi)
-                    transfer_logs = contract.events.Transfer.get_logs(
-                        from_block=latest_block + 1,
-                        to_block=new_block
-                    )
-                    if transfer_logs:
-                        for event in transfer_logs:
-                            handle_event(event, token_name, config)
-                latest_block = new_block
-            
-            time.sleep(POLLING_INTERVAL)
+                # logging.info(f"ON-CHAIN AGENT: Scanning blocks from {latest_block + 1} to {target_block}...")
+                latest_block = check_chain(latest_block)
+                latest_block = scan_block_range(latest_block + 1, target_block, stop_event)
+            if PROVISIONAL_SIGNALS:
+                latest_block = finalize(new_block, latest_block)
+            throttled = 0
+
+            stop_event.wait(POLLING_INTERVAL)
 
         except KeyboardInterrupt:
             logging.info("ON-CHAIN AGENT: Shutdown signal received. Terminating patrol.")
             break
         except Exception as e:
+            if is_rate_limit_error(e):
+                throttled += 1
+                logging.warning(f"ON-CHAIN AGENT: RPC provider is rate limiting ({e}); "
+                                f"backing off {rate_limit_delay(throttled)}s.")
+                stop_event.wait(rate_limit_delay(throttled))
+                continue
             logging.error(f"ON-CHAIN AGENT: An unexpected error occurred: {e}", exc_info=True)
-            time.sleep(POLLING_INTERVAL * 2)
+            stop_event.wait(POLLING_INTERVAL * 2)
+    logging.info("ON-CHAIN AGENT: Patrol stopped.")
 
 if __name__ == "__main__":
     # This block allows the script to be run standalone for testing purposes.
     # The main application will import and call start_onchain_patrol() directly.
     print("--- Running On-Chain Agent in standalone test mode ---")
+    configure_logging()
+    bus.add_listener(persist_signal)
     start_onchain_patrol()
\ No newline at end of file
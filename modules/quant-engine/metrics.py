@@ -0,0 +1,210 @@
+"""
+ARKHEION-X: Metrics v1.0 (Module Edition)
+
+A small, dependency-free metrics registry in the Prometheus text exposition
+format, plus the local HTTP endpoint that serves it:
+
+    GET /metrics   Prometheus text format (scrape this)
+    GET /healthz   200 while the process is up
+    GET /ready     200 once every supervised agent reported ready, else 503
+
+Agents record into the module-level metrics below; nothing is exported
+unless main.py starts the server (METRICS_PORT).
+"""
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from settings import settings
+
+# --- Configuration ---
+METRICS_HOST = settings.metrics_host
+METRICS_PORT = settings.metrics_port  # 0 disables the endpoint
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function, **labels):
+        """Samples `function()` at scrape time (e.g. a queue depth)."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def samples(self):
+        samples = super().samples()
+        with self._lock:
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                samples.append((self.name, key, function()))
+            except Exception:
+                continue
+        return samples
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the `with` block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (("le", bound),), bucket_count))
+                samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, count))
+        return samples
+
+def render():
+    """The whole registry in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+def endpoint_of(web3):
+    """Provider URL of a Web3 client, used as the `endpoint` label of RPC timings."""
+    return getattr(getattr(web3, "provider", None), "endpoint_uri", None) or "unknown"
+
+# --- Agent Metrics ---
+agent_up = Gauge("arkheion_agent_up", "1 while the agent is running, 0 while it is down or restarting.", ["agent"])
+agent_ready = Gauge("arkheion_agent_ready", "1 once the agent finished initializing.", ["agent"])
+agent_restarts = Counter("arkheion_agent_restarts_total", "Times the agent was restarted after exiting.", ["agent"])
+blocks_scanned = Counter("arkheion_blocks_scanned_total", "Blocks scanned for Transfers (rate() gives blocks/s).", ["agent"])
+scan_rate = Gauge("arkheion_scan_blocks_per_second", "Blocks per second of the most recent scan.", ["agent"])
+events_per_cycle = Histogram("arkheion_events_per_cycle", "Events (Transfers, commits) handled per scan cycle.",
+                             ["agent"], buckets=COUNT_BUCKETS)
+rpc_latency = Histogram("arkheion_rpc_latency_seconds", "Latency of RPC calls.", ["call", "endpoint"])
+db_write_latency = Histogram("arkheion_db_write_seconds", "Duration of one batched signal write transaction.")
+db_rows_written = Counter("arkheion_db_rows_written_total", "Signal rows written by the batch writer.")
+db_queue_depth = Gauge("arkheion_db_queue_depth", "Signals queued for the batch writer.")
+signals_published = Counter("arkheion_signals_published_total", "Signals published on the signal bus.", ["source"])
+chain_reorgs = Counter("arkheion_chain_reorgs_total", "Chain reorganizations that orphaned scanned blocks.", ["agent"])
+reorg_depth = Histogram("arkheion_reorg_depth_blocks", "Scanned blocks rolled back per reorganization.",
+                        ["agent"], buckets=COUNT_BUCKETS)
+signals_finalized = Counter("arkheion_signals_finalized_total", "Provisional signals marked final at the confirmation depth.", ["agent"])
+correlator_lag = Gauge("arkheion_correlator_lag_seconds", "Age of the newest signal when the correlator evaluated it.")
+correlator_watermark = Gauge("arkheion_correlator_watermark", "Last signal id the correlator caught up to.")
+alerts_delivered = Counter("arkheion_alerts_delivered_total", "Alerts delivered (several may share one message).", ["channel"])
+alert_messages = Counter("arkheion_alert_messages_total", "Alert messages sent, after coalescing.", ["channel"])
+alert_failures = Counter("arkheion_alert_failures_total", "Failed alert delivery attempts.", ["channel"])
+alert_outbox_pending = Gauge("arkheion_alert_outbox_pending", "Alerts waiting in the outbox.")
+
+# --- HTTP Endpoint ---
+class MetricsHandler(BaseHTTPRequestHandler):
+    readiness = None  # Callable returning {agent: ready}; set by start_metrics_server
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._reply(200, render(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/healthz":
+            self._reply(200, "ok\n", "text/plain; charset=utf-8")
+        elif path == "/ready":
+            agents = self.readiness() if self.readiness else {}
+            status = 200 if all(agents.values()) else 503
+            self._reply(status, json.dumps(agents) + "\n", "application/json")
+        else:
+            self._reply(404, "not found\n", "text/plain; charset=utf-8")
+
+    def _reply(self, status, body, content_type):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would drown the agent logs
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST, readiness=None):
+    """Serves the endpoints from a background thread. Returns the server (call .shutdown() to stop)."""
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {"readiness": staticmethod(readiness) if readiness else None})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Metrics-Server", daemon=True).start()
+    logging.info(f"METRICS: Serving http://{host}:{server.server_address[1]}/metrics")
+    return server
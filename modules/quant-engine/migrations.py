@@ -0,0 +1,194 @@
+"""
+ARKHEION-X: Schema Migrations v1.0 (Module Edition)
+
+Versioned schema management for the signals database. The schema version is
+stored in SQLite's `PRAGMA user_version`; each migration runs inside its own
+transaction and only ever issues SQL statements, so upgrading a large
+`arkheionx.db` in place never loads its rows into Python memory.
+
+Usage (from the repository root):
+    python modules/quant-engine/migrations.py                 # upgrade arkheionx.db
+    python modules/quant-engine/migrations.py --db path.db    # upgrade another file
+    python modules/quant-engine/migrations.py --status        # show the current version
+"""
+import sys
+import sqlite3
+import argparse
+
+# --- Migrations ---
+# Each entry upgrades the schema from version N-1 to version N.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS = {
+    # v1: The original untyped table.
+    1: [
+        '''
+        CREATE TABLE IF NOT EXISTS alpha_signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            source TEXT NOT NULL,
+            signal_type TEXT NOT NULL,
+            metadata TEXT,
+            confidence_level TEXT
+        )
+        ''',
+    ],
+    # v2: Typed columns for the hot metadata fields, query indexes and a dedupe key.
+    # Generated VIRTUAL columns can be added with ALTER TABLE without rewriting rows,
+    # and indexing them materialises the values inside the index only.
+    2: [
+        "ALTER TABLE alpha_signals ADD COLUMN token TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.token')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN repository TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.repository')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN sender TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.from')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN receiver TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.to')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN tx_hash TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.tx_hash')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN log_index INTEGER GENERATED ALWAYS AS (json_extract(metadata, '$.log_index')) VIRTUAL",
+        "ALTER TABLE alpha_signals ADD COLUMN commit_sha TEXT GENERATED ALWAYS AS (json_extract(metadata, '$.commit_sha')) VIRTUAL",
+        # A transfer is identified by tx_hash + log index and a commit by its SHA. Rows
+        # written before log_index was recorded get no key: one transaction can move a token
+        # to the same receiver twice, so nothing else in them tells a duplicate from a
+        # second Transfer, and they are neither deduplicated nor deleted below.
+        '''
+        ALTER TABLE alpha_signals ADD COLUMN dedupe_key TEXT GENERATED ALWAYS AS (
+            CASE WHEN tx_hash IS NOT NULL THEN tx_hash || ':' || log_index ELSE commit_sha END
+        ) VIRTUAL
+        ''',
+        # Rows duplicated by re-scanned blocks must go before the unique index can exist.
+        '''
+        DELETE FROM alpha_signals
+        WHERE dedupe_key IS NOT NULL
+        AND id NOT IN (
+            SELECT MIN(id) FROM alpha_signals
+            WHERE dedupe_key IS NOT NULL
+            GROUP BY source, dedupe_key
+        )
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_signals_dedupe ON alpha_signals (source, dedupe_key)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_source_conf_ts ON alpha_signals (source, confidence_level, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_source_ts ON alpha_signals (source, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_ts ON alpha_signals (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_token_ts ON alpha_signals (token, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_repository ON alpha_signals (repository)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_receiver ON alpha_signals (receiver)",
+    ],
+    # v3: Durable agent state (watermarks, cursors) and the correlator's dedupe ledger.
+    3: [
+        '''
+        CREATE TABLE IF NOT EXISTS agent_state (
+            agent TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (agent, key)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS correlation_alerts (
+            commit_key TEXT PRIMARY KEY,
+            repository TEXT,
+            move_count INTEGER,
+            alerted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_correlation_alerts_at ON correlation_alerts (alerted_at)",
+    ],
+    # v4: Covering index for the dashboard's filtered aggregates (signal_queries.py), so
+    # counts and breakdowns over a date range are answered from the index alone.
+    4: [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_signals_ts_cover
+        ON alpha_signals (timestamp, signal_type, confidence_level, token)
+        ''',
+    ],
+    # v5: Outbox of alerts waiting for delivery (alerts.py). Rows are written in the same
+    # transaction as the correlation that raised them, so a crash never loses one.
+    5: [
+        '''
+        CREATE TABLE IF NOT EXISTS alert_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            group_key TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_alert_outbox_due ON alert_outbox (status, next_attempt_at)",
+        "CREATE INDEX IF NOT EXISTS idx_alert_outbox_group ON alert_outbox (channel, group_key, status)",
+    ],
+    # v6: The block an on-chain signal came from, so signals of blocks orphaned by a reorg
+    # can be rolled back and provisional ones finalized by block range (block_tracker.py).
+    6: [
+        "ALTER TABLE alpha_signals ADD COLUMN block_number INTEGER GENERATED ALWAYS AS (json_extract(metadata, '$.block_number')) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_signals_source_block ON alpha_signals (source, block_number)",
+    ],
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target_version=SCHEMA_VERSION):
+    """Applies every pending migration up to target_version. Returns the list of versions applied."""
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{current} is newer than this code supports (v{SCHEMA_VERSION}).")
+
+    applied = []
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # Manage transactions explicitly so DDL is transactional too
+    try:
+        while True:
+            # Re-read the version under the write lock: another agent may have migrated meanwhile.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = get_schema_version(conn) + 1
+                if version > target_version:
+                    conn.execute("COMMIT")
+                    break
+                for statement in MIGRATIONS[version]:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+    finally:
+        conn.isolation_level = previous_isolation
+    return applied
+
+def main(argv=None):
+    from database import DB_FILE
+    from signal_sink import open_connection
+
+    parser = argparse.ArgumentParser(description="Upgrade the ARKHEION-X signals database schema in place.")
+    parser.add_argument("--db", default=DB_FILE, help=f"Path to the SQLite database (default: {DB_FILE})")
+    parser.add_argument("--status", action="store_true", help="Only print the current schema version")
+    args = parser.parse_args(argv)
+
+    conn = open_connection(args.db)
+    try:
+        current = get_schema_version(conn)
+        if args.status:
+            print(f"[DB] {args.db}: schema v{current} (latest v{SCHEMA_VERSION}).")
+            return 0
+        applied = migrate(conn)
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"[DB] Migration failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+
+    if applied:
+        print(f"[DB] {args.db}: upgraded schema v{current} -> v{applied[-1]}.")
+    else:
+        print(f"[DB] {args.db}: already at schema v{current}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
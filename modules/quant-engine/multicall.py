@@ -0,0 +1,140 @@
+"""
+ARKHEION-X: Multicall v2.0 (Module Edition)
+
+Batched contract reads over the Multicall3 contract, which is deployed at the
+same address on Arbitrum and most EVM chains. Callers queue reads on a
+BatchReader while a block range is processed and get a Future back for each;
+on flush the queued reads are grouped by block, packed into aggregate3 calls of
+at most MAX_CALLS_PER_BATCH sub-calls each, and decoded in bulk. Every sub-call
+may fail on its own without reverting the batch: its Future then raises
+ContractCallError.
+
+    reader = BatchReader(w3)
+    decimals = reader.add(token, "decimals()", output_types=["uint8"])
+    balance = reader.add(token, "balanceOf(address)", [holder], ["uint256"])
+    reader.flush()
+    decimals.result(), balance.result()
+
+Nonces are account state rather than contract calls, so they stay on
+JSON-RPC batching (wallet_classifier.py).
+"""
+from concurrent.futures import Future
+
+from web3 import Web3
+
+import metrics
+
+# --- Configuration ---
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MAX_CALLS_PER_BATCH = 500  # Sub-calls per aggregate3; keeps each eth_call under provider gas/size caps
+
+MULTICALL3_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{
+        "name": "calls", "type": "tuple[]",
+        "components": [
+            {"name": "target", "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData", "type": "bytes"},
+        ],
+    }],
+    "outputs": [{
+        "name": "returnData", "type": "tuple[]",
+        "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"},
+        ],
+    }],
+}]
+
+class ContractCallError(Exception):
+    """A sub-call reverted, returned nothing, or could not be decoded."""
+
+def selector(signature):
+    """4-byte function selector, e.g. selector("decimals()")."""
+    return bytes(Web3.keccak(text=signature)[:4])
+
+def input_types(signature):
+    """["address", "uint256"] for "transfer(address,uint256)"."""
+    arguments = signature[signature.index("(") + 1:signature.rindex(")")]
+    return [argument.strip() for argument in arguments.split(",") if argument.strip()]
+
+def aggregate3(w3, calls, block_identifier="latest"):
+    """
+    Executes [(target, call_data), ...] in one eth_call.
+    Returns [(success, return_data), ...] in the same order.
+    """
+    if not calls:
+        return []
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    packed = [(Web3.to_checksum_address(target), True, call_data) for target, call_data in calls]
+    with metrics.rpc_latency.time(call="aggregate3", endpoint=metrics.endpoint_of(w3)):
+        results = multicall.functions.aggregate3(packed).call(block_identifier=block_identifier)
+    return [(success, bytes(data)) for success, data in results]
+
+class BatchReader:
+    """Collects contract reads and executes them in size-capped Multicall3 batches."""
+
+    def __init__(self, w3, max_batch=MAX_CALLS_PER_BATCH, block_identifier="latest"):
+        self.w3 = w3
+        self.max_batch = max_batch
+        self.block_identifier = block_identifier
+        self.pending = []        # (block, target, call_data, output_types, future)
+        self.round_trips = 0
+
+    def add(self, target, signature, args=(), output_types=None, block=None):
+        """
+        Queues `signature(*args)` on `target`. The Future resolves to the decoded
+        value (a tuple for several outputs) or to the raw bytes without output_types.
+        """
+        call_data = selector(signature) + (self.w3.codec.encode(input_types(signature), list(args)) if args else b"")
+        future = Future()
+        self.pending.append((block if block is not None else self.block_identifier,
+                             target, call_data, output_types, future))
+        return future
+
+    def flush(self):
+        """Executes every queued read. Returns the number of aggregate3 round-trips made."""
+        pending, self.pending = self.pending, []
+        by_block = {}
+        for item in pending:
+            by_block.setdefault(item[0], []).append(item)
+        round_trips = 0
+        for block, items in by_block.items():
+            for start in range(0, len(items), self.max_batch):
+                batch = items[start:start + self.max_batch]
+                try:
+                    results = aggregate3(self.w3, [(target, call_data) for _, target, call_data, _, _ in batch], block)
+                except Exception as e:
+                    for *_, future in batch:
+                        future.set_exception(e)
+                    continue
+                finally:
+                    round_trips += 1
+                for (_, target, _, output_types, future), (success, data) in zip(batch, results):
+                    self._resolve(future, target, output_types, success, data)
+        self.round_trips += round_trips
+        return round_trips
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    # --- Internals ---
+    def _resolve(self, future, target, output_types, success, data):
+        if not success or (output_types and not data):
+            future.set_exception(ContractCallError(f"Call to {target} reverted or returned no data."))
+            return
+        if not output_types:
+            future.set_result(data)
+            return
+        try:
+            decoded = self.w3.codec.decode(output_types, data)
+        except Exception as e:
+            future.set_exception(ContractCallError(f"Could not decode the result of {target}: {e}"))
+            return
+        future.set_result(decoded[0] if len(output_types) == 1 else tuple(decoded))
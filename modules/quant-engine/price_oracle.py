@@ -0,0 +1,175 @@
+"""
+ARKHEION-X: Price Oracle v1.1 (Module Edition)
+
+USD prices for the monitored tokens, read from on-chain sources instead of a
+placeholder. Each token declares its source in TARGET_TOKENS under "price":
+
+    {"type": "chainlink", "feed": <aggregator>, "decimals": 8}
+        latestRoundData() of a Chainlink USD feed.
+    {"type": "uniswap_v3", "pool": <pool>, "token0_decimals": 18,
+     "token1_decimals": 6, "base_is_token0": True}
+        slot0() of a Uniswap v3 pool quoted in a USD stablecoin.
+    {"type": "fixed", "price": 1.0}
+        A pegged stablecoin.
+
+Prices are cached per token per block window (PRICE_TTL_BLOCKS blocks). The
+reads for every token missing from the cache are queued on a multicall
+BatchReader, so a scanned range costs one aggregate3 eth_call per window
+touched rather than one call per Transfer. When a read fails, the last known price
+is used until a fresh one can be read.
+
+Usage (from the repository root; point --rpc at a local fork to test):
+    python modules/quant-engine/price_oracle.py --rpc http://127.0.0.1:8545
+"""
+import sys
+import time
+import logging
+import argparse
+
+from web3 import Web3
+
+from multicall import BatchReader, ContractCallError
+
+# --- Configuration ---
+PRICE_TTL_BLOCKS = 1200       # ~5 minutes of Arbitrum blocks share one price
+MAX_FEED_AGE = 24 * 3600      # Seconds after which a Chainlink answer is reported as stale
+
+LATEST_ROUND_DATA_TYPES = ["uint80", "int256", "uint256", "uint256", "uint80"]
+SLOT0_TYPES = ["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"]
+
+def sqrt_price_to_price(sqrt_price_x96, token0_decimals, token1_decimals, base_is_token0=True):
+    """Converts a Uniswap v3 sqrtPriceX96 into the base token's price in the quote token."""
+    token1_per_token0 = (sqrt_price_x96 / 2**96) ** 2 * 10 ** (token0_decimals - token1_decimals)
+    if base_is_token0:
+        return token1_per_token0
+    return 1 / token1_per_token0 if token1_per_token0 else None
+
+class PriceOracle:
+    """Cached, multicall-batched USD prices for the tokens in a TARGET_TOKENS-style dict."""
+
+    def __init__(self, w3, tokens, ttl_blocks=PRICE_TTL_BLOCKS):
+        self.w3 = w3
+        self.sources = {name: config["price"] for name, config in tokens.items() if "price" in config}
+        self.ttl_blocks = ttl_blocks
+        self.cache = {}        # (token_name, window) -> price (None if the read failed)
+        self.last_known = {}   # token_name -> price, used when a read fails
+        self.reads = 0         # Multicall round-trips made
+
+    def window(self, block):
+        return block // self.ttl_blocks
+
+    def price(self, token_name, block):
+        """USD price of one token at `block` (None if it has no usable source)."""
+        source = self.sources.get(token_name)
+        if source is None:
+            return None
+        if source["type"] == "fixed":
+            return source["price"]
+        key = (token_name, self.window(block))
+        if key not in self.cache:
+            self.prefetch([token_name], block)
+        price = self.cache.get(key)
+        return price if price is not None else self.last_known.get(token_name)
+
+    def prefetch_events(self, events):
+        """
+        Warms the cache for every (token, block window) in decoded (event, token_name, config)
+        tuples. All reads are queued on one BatchReader: one aggregate3 per window touched.
+        """
+        windows = {}
+        for event, token_name, _ in events:
+            block = event['blockNumber']
+            # The newest block of each window is read, so a window is priced once.
+            token_names, newest = windows.get(self.window(block), (set(), block))
+            token_names.add(token_name)
+            windows[self.window(block)] = (token_names, max(newest, block))
+        reader = BatchReader(self.w3)
+        queued = [read for token_names, block in windows.values() for read in self._queue(reader, token_names, block)]
+        self._execute(reader, queued)
+
+    def prefetch(self, token_names, block):
+        """Reads every uncached price of `token_names` at `block` in one multicall."""
+        reader = BatchReader(self.w3)
+        self._execute(reader, self._queue(reader, token_names, block))
+
+    # --- Internals ---
+    def _queue(self, reader, token_names, block):
+        window = self.window(block)
+        return [
+            (name, window, block, self._add_read(reader, name, block)) for name in dict.fromkeys(token_names)
+            if name in self.sources and self.sources[name]["type"] != "fixed" and (name, window) not in self.cache
+        ]
+
+    def _add_read(self, reader, name, block):
+        source = self.sources[name]
+        if source["type"] == "chainlink":
+            return reader.add(source["feed"], "latestRoundData()", output_types=LATEST_ROUND_DATA_TYPES, block=block)
+        if source["type"] == "uniswap_v3":
+            return reader.add(source["pool"], "slot0()", output_types=SLOT0_TYPES, block=block)
+        raise ValueError(f"Unknown price source type: {source['type']}")
+
+    def _execute(self, reader, queued):
+        if not queued:
+            return
+        self.reads += reader.flush()
+        # A whole batch failing (rather than one reverted sub-call) is usually a provider
+        # without archive state rejecting a historical block: retry those reads at the head.
+        failed = {future for *_, future in queued
+                  if future.exception() is not None and not isinstance(future.exception(), ContractCallError)}
+        if failed:
+            logging.info(f"PRICE ORACLE: Historical read rejected ({next(iter(failed)).exception()}); reading latest.")
+            latest_reader = BatchReader(self.w3)
+            latest = {name: self._add_read(latest_reader, name, None)
+                      for name, _, _, future in queued if future in failed}
+            self.reads += latest_reader.flush()
+            queued = [(name, window, block, latest[name] if future in failed else future)
+                      for name, window, block, future in queued]
+        for name, window, block, future in queued:
+            price = None
+            if future.exception() is None:
+                price = self._price_from(name, self.sources[name], future.result())
+            # A failed read is cached as None too, so it is not retried until the next window.
+            self.cache[(name, window)] = price
+            if price is None:
+                logging.warning(f"PRICE ORACLE: No price for {name} at block {block}; using the last known price.")
+                continue
+            self.last_known[name] = price
+        self._evict(max(window for _, window, _, _ in queued))
+
+    def _price_from(self, name, source, values):
+        if source["type"] == "chainlink":
+            _, answer, _, updated_at, _ = values
+            if answer <= 0:
+                return None
+            if time.time() - updated_at > MAX_FEED_AGE:
+                logging.warning(f"PRICE ORACLE: Chainlink answer for {name} is older than {MAX_FEED_AGE}s.")
+            return answer / 10 ** source.get("decimals", 8)
+        sqrt_price_x96 = values[0]
+        return sqrt_price_to_price(sqrt_price_x96, source["token0_decimals"], source["token1_decimals"],
+                                   source.get("base_is_token0", True))
+
+    def _evict(self, window):
+        # Scans move forward; keep only the recent windows (backfills revisit each window once).
+        stale = [key for key in self.cache if key[1] < window - 2]
+        for key in stale:
+            del self.cache[key]
+
+def main(argv=None):
+    from engine import RPC_URLS, TARGET_TOKENS
+
+    parser = argparse.ArgumentParser(description="Print the current USD price of every target token.")
+    parser.add_argument("--rpc", default=RPC_URLS[0] or RPC_URLS[1], help="RPC endpoint (e.g. a local fork)")
+    parser.add_argument("--block", type=int, help="Block to price at (default: latest)")
+    args = parser.parse_args(argv)
+
+    w3 = Web3(Web3.HTTPProvider(args.rpc))
+    oracle = PriceOracle(w3, TARGET_TOKENS)
+    block = args.block if args.block is not None else w3.eth.block_number
+    oracle.prefetch(list(TARGET_TOKENS), block)
+    for token_name in TARGET_TOKENS:
+        print(f"{token_name}: {oracle.price(token_name, block)}")
+    print(f"({oracle.reads} multicall read(s) at block {block})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+ARKHEION-X: RPC Provider Pool v1.0 (Module Edition)
+
+Health-scored pool of AsyncWeb3 endpoints for the asyncio on-chain agent.
+Every call is timed and its outcome recorded; each endpoint keeps an EWMA of
+latency and error rate. Calls go to the healthiest endpoint and fail over to
+the next one on error, latency-critical calls can be raced across the top
+endpoints, and endpoints that keep failing are ejected. Only a successful
+health probe readmits an ejected endpoint; probes start once its cool-down
+expires, and every failed probe doubles the cool-down.
+"""
+import time
+import asyncio
+import logging
+
+from web3 import AsyncWeb3, AsyncHTTPProvider
+
+import metrics
+
+# --- Configuration ---
+EWMA_ALPHA = 0.2             # Weight of the newest sample in latency/error averages
+EJECT_AFTER_FAILURES = 3     # Consecutive failures before an endpoint is ejected
+EJECT_BASE_SECONDS = 15      # First cool-down; doubles on every re-ejection
+EJECT_MAX_SECONDS = 600
+ERROR_RATE_PENALTY = 10      # Score multiplier per unit of error rate
+RACE_WIDTH = 2               # Endpoints a raced call is sent to
+HEALTH_CHECK_INTERVAL = 10   # Seconds between checks for ejected endpoints due a probe
+REQUEST_TIMEOUT = 10
+
+class Endpoint:
+    """One RPC URL with its rolling health statistics."""
+
+    def __init__(self, url):
+        self.url = url
+        self.w3 = AsyncWeb3(AsyncHTTPProvider(url, request_kwargs={"timeout": REQUEST_TIMEOUT}))
+        self.latency = None           # EWMA seconds; None until the first success
+        self.error_rate = 0.0         # EWMA of failures (0..1)
+        self.consecutive_failures = 0
+        self.ejected = False
+        self.ejections = 0            # Ejections since the last readmission; sets the cool-down
+        self.ejected_until = 0.0      # No probe before this
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def available(self):
+        return not self.ejected
+
+    @property
+    def probe_due(self):
+        return self.ejected and time.monotonic() >= self.ejected_until
+
+    def score(self):
+        """Lower is better. Unmeasured endpoints score as if moderately slow so they still get tried."""
+        latency = self.latency if self.latency is not None else 1.0
+        return latency * (1 + ERROR_RATE_PENALTY * self.error_rate)
+
+    def record_success(self, elapsed):
+        self.calls += 1
+        self.latency = elapsed if self.latency is None else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * elapsed
+        self.error_rate *= (1 - EWMA_ALPHA)
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.calls += 1
+        self.errors += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= EJECT_AFTER_FAILURES and not self.ejected:
+            self.eject()
+
+    def eject(self):
+        """Takes the endpoint out of rotation; the next probe is due after a cool-down that doubles per ejection."""
+        cool_down = min(EJECT_BASE_SECONDS * 2 ** self.ejections, EJECT_MAX_SECONDS)
+        self.ejected = True
+        self.ejections += 1
+        self.ejected_until = time.monotonic() + cool_down
+        logging.warning(f"RPC POOL: Ejected {self.url} for {cool_down}s after {self.consecutive_failures} consecutive failures.")
+
+    def readmit(self):
+        self.ejected = False
+        self.ejections = 0
+        self.consecutive_failures = 0
+        logging.info(f"RPC POOL: Readmitted {self.url}.")
+
+    def snapshot(self):
+        return {
+            "url": self.url,
+            "available": self.available,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+        }
+
+class NoHealthyEndpointError(Exception):
+    """Raised when every endpoint in the pool is ejected or failed the call."""
+
+class ProviderPool:
+    """Routes AsyncWeb3 calls to the healthiest endpoint."""
+
+    def __init__(self, urls, is_request_error=None):
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(url for url in urls if url)]
+        if not self.endpoints:
+            raise ValueError("ProviderPool needs at least one RPC URL.")
+        # Errors caused by the request itself (e.g. "block range too large") are raised
+        # straight to the caller: retrying elsewhere won't help and the endpoint isn't unhealthy.
+        # Rate limits are not request errors: they count against the endpoint, so a throttling
+        # endpoint is failed over and ejected with a growing cool-down.
+        self.is_request_error = is_request_error or (lambda error: False)
+
+    def ranked(self):
+        """Available endpoints, healthiest first. Falls back to all endpoints if every one is ejected."""
+        candidates = [e for e in self.endpoints if e.available] or list(self.endpoints)
+        return sorted(candidates, key=Endpoint.score)
+
+    def best_url(self):
+        return self.ranked()[0].url
+
+    async def call(self, fn, race=False):
+        """
+        Runs `fn(w3)` (which must return an awaitable) on the healthiest endpoint,
+        failing over to the next one on error. With race=True the call is sent to
+        the top RACE_WIDTH endpoints at once and the first success wins.
+        """
+        candidates = self.ranked()
+        last_error = None
+        if race and len(candidates) > 1:
+            try:
+                return await self._race(fn, candidates[:RACE_WIDTH])
+            except NoHealthyEndpointError as e:
+                # Keep the cause, so callers can still tell a rate limit from an outage.
+                last_error = e.__cause__
+                candidates = candidates[RACE_WIDTH:]
+        for endpoint in candidates:
+            try:
+                return await self._timed(endpoint, fn)
+            except Exception as e:
+                if self.is_request_error(e):
+                    raise
+                last_error = e
+                logging.warning(f"RPC POOL: Call failed on {endpoint.url}: {e}. Failing over...")
+        raise NoHealthyEndpointError(f"All RPC endpoints failed: {last_error}") from last_error
+
+    async def probe(self, endpoint):
+        """
+        Health probe of an ejected endpoint, the only way it rejoins the rotation: a success
+        readmits it, a failure re-ejects it with a doubled cool-down.
+        """
+        try:
+            await self._timed(endpoint, lambda w3: w3.eth.block_number)
+        except Exception:
+            endpoint.eject()
+            return False
+        endpoint.readmit()
+        return True
+
+    async def run_health_checks(self, interval=HEALTH_CHECK_INTERVAL):
+        """Background task: probes the ejected endpoints whose cool-down expired."""
+        while True:
+            await asyncio.sleep(interval)
+            for endpoint in self.endpoints:
+                if endpoint.probe_due:
+                    await self.probe(endpoint)
+
+    def snapshot(self):
+        return [endpoint.snapshot() for endpoint in self.endpoints]
+
+    # --- Internals ---
+    async def _timed(self, endpoint, fn):
+        started = time.perf_counter()
+        try:
+            result = await fn(endpoint.w3)
+        except asyncio.CancelledError:
+            raise  # A lost race is not the endpoint's fault
+        except Exception as e:
+            if self.is_request_error(e):
+                endpoint.record_success(time.perf_counter() - started)
+            else:
+                endpoint.record_failure()
+            metrics.rpc_latency.observe(time.perf_counter() - started, call="pool", endpoint=endpoint.url)
+            raise
+        endpoint.record_success(time.perf_counter() - started)
+        metrics.rpc_latency.observe(time.perf_counter() - started, call="pool", endpoint=endpoint.url)
+        return result
+
+    async def _race(self, fn, endpoints):
+        tasks = [asyncio.ensure_future(self._timed(endpoint, fn)) for endpoint in endpoints]
+        last_error = None
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    return await finished
+                except Exception as e:
+                    if self.is_request_error(e):
+                        raise
+                    last_error = e
+            raise NoHealthyEndpointError(f"Every raced endpoint failed: {last_error}") from last_error
+        finally:
+            for task in tasks:
+                task.cancel()
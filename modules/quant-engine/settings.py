@@ -0,0 +1,89 @@
+"""
+ARKHEION-X: Settings v1.0 (Module Edition)
+
+Every environment variable the agents read, parsed once into one frozen,
+typed `Settings` object. The `.env` file is loaded here and nowhere else
+(python-dotenv is optional: without it only the real environment is used),
+so importing an agent module no longer re-reads it.
+
+Modules take their configuration from the shared instance:
+
+    from settings import settings
+    WS_RPC_URL = settings.arbitrum_ws_url
+
+Logging is configured by the entry point (the CLI, or a module's `__main__`
+block) through configure_logging(), never as an import side effect.
+"""
+import os
+import logging
+from dataclasses import dataclass
+
+# --- Configuration ---
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def _addresses(value):
+    return tuple(address.strip() for address in (value or "").split(",") if address.strip())
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed view of the environment. Field names are the variables' names in lower case."""
+    arbitrum_rpc_url: str = None     # Preferred HTTP RPC endpoint (public fallbacks follow it)
+    arbitrum_ws_url: str = None      # WebSocket endpoint; implies the async on-chain agent
+    onchain_async: bool = False      # Run the asyncio on-chain agent over the RPC pool
+    target_token_addresses: tuple = ()  # Extra ERC20s to monitor, by contract address
+    onchain_confirmations: int = 0   # Blocks a Transfer needs on top of it before its signal is final
+    onchain_provisional: bool = False  # Signal at the head as provisional, finalize at the depth above
+    github_pat: str = None           # GitHub token for the off-chain agent
+    onchain_shards: int = 0          # Worker processes for the on-chain agent (0: in-process)
+    offchain_shards: int = 0         # Worker processes for the off-chain agent (0: in-process)
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9108         # 0 disables the metrics endpoint
+    arkheionx_db: str = "arkheionx.db"  # SQLite database file
+    telegram_bot_token: str = None   # Alerts go to Telegram when this and the chat id are set
+    telegram_chat_id: str = None
+    alert_webhook_url: str = None    # Alerts are POSTed as JSON to this URL
+    alert_file: str = None           # Alerts are appended as JSON lines to this file
+    log_level: str = "INFO"
+
+    @classmethod
+    def from_env(cls, environ=None):
+        env = os.environ if environ is None else environ
+        return cls(
+            arbitrum_rpc_url=env.get("ARBITRUM_RPC_URL") or None,
+            arbitrum_ws_url=env.get("ARBITRUM_WS_URL") or None,
+            onchain_async=_flag(env.get("ONCHAIN_ASYNC", "false")),
+            target_token_addresses=_addresses(env.get("TARGET_TOKEN_ADDRESSES")),
+            onchain_confirmations=int(env.get("ONCHAIN_CONFIRMATIONS", "0")),
+            onchain_provisional=_flag(env.get("ONCHAIN_PROVISIONAL", "false")),
+            github_pat=env.get("GITHUB_PAT") or None,
+            onchain_shards=int(env.get("ONCHAIN_SHARDS", "0")),
+            offchain_shards=int(env.get("OFFCHAIN_SHARDS", "0")),
+            metrics_host=env.get("METRICS_HOST", cls.metrics_host),
+            metrics_port=int(env.get("METRICS_PORT", str(cls.metrics_port))),
+            arkheionx_db=env.get("ARKHEIONX_DB", cls.arkheionx_db),
+            telegram_bot_token=env.get("TELEGRAM_BOT_TOKEN") or None,
+            telegram_chat_id=env.get("TELEGRAM_CHAT_ID") or None,
+            alert_webhook_url=env.get("ALERT_WEBHOOK_URL") or None,
+            alert_file=env.get("ALERT_FILE") or None,
+            log_level=env.get("LOG_LEVEL", cls.log_level).upper(),
+        )
+
+def load_settings():
+    """Loads `.env` into the environment, then parses it. Variables already set are kept."""
+    try:
+        from dotenv import find_dotenv, load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()  # Searched from this module's directory upwards, as the agents always did
+        load_dotenv(find_dotenv(usecwd=True))  # ...then from the working directory
+    return Settings.from_env()
+
+def configure_logging(format=LOG_FORMAT):
+    """Configures the root logger once, at the level from LOG_LEVEL."""
+    logging.basicConfig(level=getattr(logging, settings.log_level, logging.INFO), format=format)
+
+settings = load_settings()
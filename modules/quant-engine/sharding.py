@@ -0,0 +1,283 @@
+"""
+ARKHEION-X: Shard Supervisor v1.0 (Module Edition)
+
+Multi-process mode for the agents. Decoding and classifying logs is CPU-bound
+Python, so with every agent in one process the GIL makes each extra token
+slow the whole poll cycle down. In sharded mode TARGET_TOKENS (and optionally
+TARGET_REPOS) are split across worker processes that scan and classify on
+their own cores.
+
+Workers never write to SQLite themselves. Every signal they publish is sent
+back over one multiprocessing queue as a compact record, and the supervisor
+process acts as the single writer: it republishes the records on its own
+signal bus (persistence and the correlator are listeners there). Scan
+checkpoints (and the anomaly baselines as of each checkpoint) travel through
+the same queue, behind the signals they cover, and are only saved after those
+signals are flushed to disk. So do the rollbacks and finalizations of the
+on-chain agent's reorg handling (block_tracker.py): the writer applies them to
+the database in order with the signals they update. Agent state written with
+write_state (the off-chain agent's ETag/last-SHA cursors, cached token
+metadata) is queued the same way; the worker's own reads see it at once.
+
+The supervisor restarts workers that exit, with exponential backoff, and logs
+per-shard throughput (blocks scanned, signals produced) every REPORT_INTERVAL.
+Worker metrics stay in their processes; the supervisor exports liveness,
+restarts and blocks scanned per shard (metrics.py).
+
+Enable it with ONCHAIN_SHARDS=<processes> (and OFFCHAIN_SHARDS=<processes>).
+"""
+import json
+import time
+import queue
+import logging
+import threading
+import multiprocessing as mp
+
+from database import flush_signals, get_connection, save_state
+from block_tracker import SIGNAL_UPDATES
+from signal_bus import Signal, bus
+import metrics
+from settings import configure_logging, settings
+
+# --- Configuration ---
+ONCHAIN_SHARDS = settings.onchain_shards    # 0 keeps the on-chain agent in-process
+OFFCHAIN_SHARDS = settings.offchain_shards  # 0 keeps the off-chain agent in-process
+RECORD_QUEUE_SIZE = 10000   # Workers block (backpressure) when the writer falls this far behind
+RESTART_BASE_DELAY = 5      # Seconds; doubles per consecutive crash
+RESTART_MAX_DELAY = 300
+STABLE_AFTER = 60           # A worker alive this long has its backoff reset
+MONITOR_INTERVAL = 2
+REPORT_INTERVAL = 60
+
+def split_shards(items, shard_count):
+    """Round-robin split of `items` into at most `shard_count` non-empty shards."""
+    items = list(items)
+    shard_count = max(1, min(shard_count, len(items)))
+    return [items[index::shard_count] for index in range(shard_count)]
+
+# --- Worker entry points (run in child processes) ---
+def _route_state(shard_name, records, module):
+    """Sends `module`'s write_state calls to the writer; its read_state sees them at once."""
+    written = {}
+    read_state = module.read_state
+
+    def write(agent, key, value):
+        written[(agent, key)] = value
+        records.put(("state", shard_name, agent, key, value))
+
+    def read(agent, key, default=None):
+        if (agent, key) in written:
+            return written[(agent, key)]
+        return read_state(agent, key, default)
+
+    module.write_state, module.read_state = write, read
+
+def _forward_signals(shard_name, records):
+    def forward(signal):
+        records.put(("signal", shard_name, signal.source, signal.signal_type,
+                     json.dumps(signal.metadata), signal.confidence, signal.detected_at))
+    bus.add_listener(forward)
+
+def run_onchain_shard(shard_name, token_names, records, stop_event):
+    """Runs the on-chain agent over a subset of the target tokens."""
+    mp.current_process().name = shard_name
+    configure_logging()
+    import engine
+    from async_engine import start_onchain_patrol_async
+
+    engine.TARGET_TOKENS = {name: config for name, config in engine.TARGET_TOKENS.items() if name in token_names}
+    engine.EXTRA_TOKEN_ADDRESSES = [address for address in engine.EXTRA_TOKEN_ADDRESSES if address in token_names]
+    engine.remote_checkpoint = lambda checkpoints, state=(): records.put(
+        ("checkpoint", shard_name, engine.CHECKPOINT_AGENT, checkpoints, list(state)))
+    engine.remote_signal_update = lambda kind, *args: records.put((kind, shard_name, *args))
+    _route_state(shard_name, records, engine)
+    _forward_signals(shard_name, records)
+    logging.info(f"SHARD {shard_name}: Scanning {', '.join(token_names)}.")
+    if engine.USE_ASYNC_PATROL:
+        start_onchain_patrol_async(stop_event=stop_event)
+    else:
+        engine.start_onchain_patrol(stop_event=stop_event)
+
+def run_offchain_shard(shard_name, repos, records, stop_event):
+    """Runs the off-chain agent over a subset of the target repositories."""
+    mp.current_process().name = shard_name
+    configure_logging()
+    import code_intel
+
+    code_intel.TARGET_REPOS = list(repos)
+    _route_state(shard_name, records, code_intel)
+    _forward_signals(shard_name, records)
+    logging.info(f"SHARD {shard_name}: Polling {', '.join(repos)}.")
+    code_intel.start_offchain_patrol(stop_event=stop_event)
+
+# --- Supervisor (runs in the main process) ---
+class Shard:
+    def __init__(self, name, target, items):
+        self.name = name
+        self.target = target
+        self.items = items
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.restart_at = 0.0
+        self.signals = 0
+        self.blocks = 0
+        self.last_block = None
+
+class ShardSupervisor:
+    """Starts shard workers, writes their records, restarts them when they exit."""
+
+    def __init__(self):
+        self.context = mp.get_context("spawn")  # Workers must not inherit the parent's threads and connections
+        self.records = self.context.Queue(maxsize=RECORD_QUEUE_SIZE)
+        self.stop_event = self.context.Event()  # Set to ask every worker to return from its patrol
+        self.shards = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def add_shards(self, kind, target, items, shard_count):
+        for index, shard_items in enumerate(split_shards(items, shard_count)):
+            self.shards.append(Shard(f"{kind}-{index}", target, shard_items))
+
+    def start(self):
+        for shard in self.shards:
+            self._spawn(shard)
+        self._threads = [
+            threading.Thread(target=self._write_records, name="Shard-Writer", daemon=True),
+            threading.Thread(target=self._monitor, name="Shard-Monitor", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logging.info(f"SHARD SUPERVISOR: Started {len(self.shards)} worker process(es).")
+
+    def stop(self, timeout=10.0):
+        """
+        Asks the workers to stop and waits up to `timeout` for them to return from their
+        patrols; only workers still running then are terminated. Then writes every record
+        they sent.
+        """
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join(max(0.0, deadline - time.monotonic()))
+        for shard in self.shards:
+            if shard.process is not None and shard.process.is_alive():
+                logging.warning(f"SHARD SUPERVISOR: {shard.name} did not stop within {timeout}s; terminating it.")
+                shard.process.terminate()
+                shard.process.join(timeout)
+        # The writer drains the queue before it returns.
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        flush_signals()
+
+    def snapshot(self):
+        return [{
+            "shard": shard.name,
+            "items": shard.items,
+            "alive": shard.process is not None and shard.process.is_alive(),
+            "restarts": shard.restarts,
+            "signals": shard.signals,
+            "blocks": shard.blocks,
+            "last_block": shard.last_block,
+        } for shard in self.shards]
+
+    # --- Internals ---
+    def _spawn(self, shard):
+        shard.process = self.context.Process(
+            target=shard.target, args=(shard.name, shard.items, self.records, self.stop_event),
+            name=shard.name, daemon=True)
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        metrics.agent_up.set(1, agent=shard.name)
+
+    def _monitor(self):
+        next_report = time.monotonic() + REPORT_INTERVAL
+        previous = {shard.name: (0, 0) for shard in self.shards}
+        while not self.stop_event.wait(MONITOR_INTERVAL):  # No restarts once the workers are stopping
+            now = time.monotonic()
+            for shard in self.shards:
+                if shard.process.is_alive():
+                    if shard.consecutive_failures and now - shard.started_at >= STABLE_AFTER:
+                        shard.consecutive_failures = 0
+                    continue
+                if shard.restart_at == 0.0:
+                    metrics.agent_up.set(0, agent=shard.name)
+                    delay = min(RESTART_BASE_DELAY * 2 ** shard.consecutive_failures, RESTART_MAX_DELAY)
+                    shard.consecutive_failures += 1
+                    shard.restart_at = now + delay
+                    logging.error(f"SHARD SUPERVISOR: {shard.name} exited (code {shard.process.exitcode}). "
+                                  f"Restarting in {delay}s.")
+                elif now >= shard.restart_at:
+                    shard.restart_at = 0.0
+                    shard.restarts += 1
+                    metrics.agent_restarts.inc(agent=shard.name)
+                    self._spawn(shard)
+                    logging.info(f"SHARD SUPERVISOR: Restarted {shard.name} (restart #{shard.restarts}).")
+            if now >= next_report:
+                elapsed = now - next_report + REPORT_INTERVAL
+                for shard in self.shards:
+                    blocks, signals = previous[shard.name]
+                    logging.info(
+                        f"SHARD SUPERVISOR: {shard.name} [{', '.join(shard.items)}] "
+                        f"{'alive' if shard.process.is_alive() else 'down'}, "
+                        f"{(shard.blocks - blocks) / elapsed:,.1f} blocks/s, "
+                        f"{(shard.signals - signals) / elapsed * 60:,.1f} signals/min, {shard.restarts} restart(s).")
+                    previous[shard.name] = (shard.blocks, shard.signals)
+                next_report = now + REPORT_INTERVAL
+
+    def _write_records(self):
+        shards = {shard.name: shard for shard in self.shards}
+        while True:
+            try:
+                record = self.records.get(timeout=1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            try:
+                kind, shard = record[0], shards.get(record[1])
+                if kind == "signal":
+                    _, _, source, signal_type, metadata, confidence, detected_at = record
+                    bus.publish(Signal(source, signal_type, json.loads(metadata), confidence, detected_at))
+                    if shard is not None:
+                        shard.signals += 1
+                elif kind == "checkpoint":
+                    _, _, agent, checkpoints, state = record
+                    # The signals this checkpoint covers were queued before it: put them on disk first.
+                    flush_signals()
+                    conn = get_connection()
+                    with conn:
+                        for token_name, block in checkpoints.items():
+                            save_state(conn, agent, f"checkpoint:{token_name}", block)
+                        # State saved with the checkpoint (anomaly baselines) as (agent, key, value).
+                        for state_agent, key, value in state:
+                            save_state(conn, state_agent, key, value)
+                    if shard is not None and checkpoints:
+                        block = max(checkpoints.values())
+                        if shard.last_block is not None and block > shard.last_block:
+                            shard.blocks += block - shard.last_block
+                            metrics.blocks_scanned.inc(block - shard.last_block, agent=shard.name)
+                        shard.last_block = block
+                elif kind == "state":
+                    _, _, agent, key, value = record
+                    # Cursors may only pass what is on disk.
+                    flush_signals()
+                    conn = get_connection()
+                    with conn:
+                        save_state(conn, agent, key, value)
+                elif kind in SIGNAL_UPDATES:
+                    # A reorg rollback or a finalization, of signals queued before it.
+                    flush_signals()
+                    conn = get_connection()
+                    with conn:
+                        count = SIGNAL_UPDATES[kind](conn, *record[2:])
+                    if kind == "finalize":
+                        metrics.signals_finalized.inc(count, agent=record[1])
+                    else:
+                        logging.warning(f"SHARD SUPERVISOR: Rolled back {count} signal(s) of {record[1]} "
+                                        f"after a chain reorganization.")
+            except Exception as e:
+                logging.error(f"SHARD SUPERVISOR: Could not write a record from {record[1]}: {e}", exc_info=True)
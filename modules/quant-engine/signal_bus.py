@@ -0,0 +1,110 @@
+"""
+ARKHEION-X: Signal Bus v1.0 (Module Edition)
+
+An in-process publish/subscribe bus that carries typed signals from the agents
+to whoever needs them. Two kinds of consumers are supported:
+
+- Listeners are called synchronously in the publisher's thread. They must be
+  fast and non-blocking (e.g. handing the signal to the SQLite write queue).
+- Subscriptions get their own bounded queue, drained by the consumer's thread
+  (e.g. the correlator). When a subscription falls behind, new signals are
+  dropped for it rather than stalling the publishing agent; consumers are
+  expected to recover them from the database.
+"""
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import metrics
+
+SUBSCRIPTION_QUEUE_SIZE = 10000
+
+@dataclass(frozen=True)
+class Signal:
+    """One alpha signal as produced by an agent."""
+    source: str
+    signal_type: str
+    metadata: dict
+    confidence: str
+    detected_at: float = field(default_factory=time.time)  # Epoch seconds at detection
+
+    @property
+    def timestamp(self):
+        """Detection time in SQLite's CURRENT_TIMESTAMP format (UTC)."""
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.detected_at))
+
+    @property
+    def dedupe_key(self):
+        """Mirrors the `dedupe_key` generated column of alpha_signals."""
+        tx_hash = self.metadata.get('tx_hash')
+        if tx_hash is not None:
+            log_index = self.metadata.get('log_index')
+            return f"{tx_hash}:{log_index}" if log_index is not None else None
+        return self.metadata.get('commit_sha')
+
+class Subscription:
+    """A bounded queue of signals for one consumer."""
+
+    def __init__(self, name, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        self.name = name
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout=None):
+        """Returns the next signal, or None if none arrived within `timeout` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _offer(self, signal):
+        try:
+            self._queue.put_nowait(signal)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logging.warning(f"SIGNAL BUS: Subscriber '{self.name}' is falling behind; {self.dropped} signal(s) dropped so far.")
+
+class SignalBus:
+    """Fans published signals out to listeners and subscriptions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._subscriptions = []
+        self.published = 0
+
+    def add_listener(self, handler):
+        """Registers a fast, non-blocking callable invoked with every published signal."""
+        with self._lock:
+            self._listeners = self._listeners + [handler]
+
+    def subscribe(self, name, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        """Creates a queue-backed subscription that receives every signal published from now on."""
+        subscription = Subscription(name, maxsize)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def publish(self, signal):
+        # Copy-on-write lists mean publishers never contend on the lock.
+        self.published += 1
+        metrics.signals_published.inc(source=signal.source)
+        for handler in self._listeners:
+            try:
+                handler(signal)
+            except Exception as e:
+                logging.error(f"SIGNAL BUS: Listener {getattr(handler, '__name__', handler)} failed: {e}", exc_info=True)
+        for subscription in self._subscriptions:
+            subscription._offer(signal)
+
+# --- Global Variables ---
+# The process-wide bus. main.py wires the persistence listener and the correlator to it.
+bus = SignalBus()
+
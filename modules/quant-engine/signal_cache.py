@@ -0,0 +1,217 @@
+"""
+ARKHEION-X: Incremental Signal Cache v1.0 (Module Edition)
+
+A process-wide, append-only DataFrame of recent signals for the dashboard.
+Instead of rebuilding everything on a timer, each refresh reads only the rows
+with an id above the last one seen, parses just their metadata, and appends
+them with stable dtypes (categoricals for the low-cardinality columns, floats
+for amounts). Rows older than the retention window are evicted on every
+refresh, so memory stays bounded and a refresh only reads and parses the
+rows that are new.
+
+Cached rows can still change in the database: a chain reorganization deletes
+the on-chain signals of orphaned blocks, and provisional signals are marked
+final in place (block_tracker.py). A Chain Reorganization signal drops the
+cached rows it rolled back, and every refresh re-reads the finality of the
+cached provisional rows (dropping those that no longer exist).
+
+Views reaching further back than the retention window are served by the SQL
+queries in signal_queries.py instead.
+"""
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from signal_queries import (
+    PAGE_SIZE, SIGNAL_COLUMNS, TIMESTAMP_FORMAT, expand_metadata, open_readonly,
+)
+from block_tracker import FINALITY_PROVISIONAL, REORG_SIGNAL
+
+# --- Configuration ---
+RETENTION_DAYS = 7
+FETCH_BATCH_SIZE = 50000        # Rows parsed per step, so the first load never holds the whole window twice
+CATEGORICAL_COLUMNS = ["source", "signal_type", "confidence_level", "token"]
+FLOAT_COLUMNS = ["amount", "value_usd_est", "severity_score"]
+RECHECK_BATCH_SIZE = 500        # Provisional row ids re-read per query
+
+class SignalFrameCache:
+    """Holds the recent signals in one DataFrame and keeps it up to date incrementally."""
+
+    def __init__(self, db_file, retention_days=RETENTION_DAYS):
+        self.db_file = db_file
+        self.retention = timedelta(days=retention_days)
+        self.last_id = 0
+        self.df = pd.DataFrame()
+        self.rows_fetched = 0
+        self._lock = threading.Lock()  # Streamlit sessions share this object across threads
+
+    @property
+    def cutoff(self):
+        # Stored timestamps are naive UTC (see database.log_signal).
+        return datetime.now(timezone.utc).replace(tzinfo=None) - self.retention
+
+    def covers(self, signal_filter):
+        """Whether every row the filter can match is still held in memory."""
+        return signal_filter.start is not None and signal_filter.start >= self.cutoff
+
+    def refresh(self):
+        """Appends rows added since the last refresh and evicts expired ones. Returns the new row count."""
+        with self._lock:
+            added = 0
+            with closing(open_readonly(self.db_file)) as conn:
+                newest_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alpha_signals").fetchone()[0]
+                if newest_id < self.last_id:
+                    # The database was replaced or rebuilt: start over.
+                    self.last_id, self.df = 0, pd.DataFrame()
+                cutoff = self.cutoff.strftime(TIMESTAMP_FORMAT)
+                while True:
+                    chunk = pd.read_sql_query(
+                        f"SELECT {SIGNAL_COLUMNS} FROM alpha_signals WHERE id > ? AND timestamp >= ? ORDER BY id LIMIT ?",
+                        conn, params=(self.last_id, cutoff, FETCH_BATCH_SIZE),
+                    )
+                    if chunk.empty:
+                        break
+                    self.last_id = int(chunk['id'].iloc[-1])
+                    chunk = self._normalize(chunk)
+                    self._append(chunk)
+                    self._apply_reorgs(chunk)
+                    added += len(chunk)
+                    if len(chunk) < FETCH_BATCH_SIZE:
+                        break
+                self._recheck_provisional(conn)
+            self._evict()
+            self.rows_fetched += added
+            return added
+
+    def select(self, signal_filter):
+        """The cached rows matching a SignalFilter (same semantics as its SQL WHERE clause)."""
+        df = self.df
+        if df.empty:
+            return df
+        mask = pd.Series(True, index=df.index)
+        if signal_filter.start is not None:
+            mask &= df['timestamp'] >= signal_filter.start
+        if signal_filter.end is not None:
+            mask &= df['timestamp'] < signal_filter.end
+        for column, values in (("signal_type", signal_filter.signal_types),
+                               ("confidence_level", signal_filter.confidence_levels),
+                               ("token", signal_filter.tokens)):
+            if values is not None:
+                mask &= df[column].isin(values) if column in df.columns else False
+        return df[mask]
+
+    # --- Internals ---
+    def _normalize(self, chunk):
+        chunk = expand_metadata(chunk)
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        for column in FLOAT_COLUMNS:
+            if column in chunk.columns:
+                # Amounts are logged formatted ("1,234.56", "$1,234.56").
+                cleaned = chunk[column].astype(str).str.replace(r'[$,]', '', regex=True)
+                chunk[column] = pd.to_numeric(cleaned, errors='coerce')
+        for column in CATEGORICAL_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = None
+        return chunk
+
+    def _append(self, chunk):
+        # Readers hold on to self.df without the lock, so it is replaced, never modified.
+        if self.df.empty:
+            combined = chunk
+        else:
+            existing = self.df
+            # Columns first seen in this chunk (or missing from it) are added to the other
+            # side with the same dtype, so concat never falls back to object dtype for them.
+            existing = existing.assign(**{column: pd.Series(dtype=chunk[column].dtype, index=existing.index)
+                                          for column in chunk.columns.difference(existing.columns)})
+            for column in existing.columns.difference(chunk.columns):
+                chunk[column] = pd.Series(dtype=existing[column].dtype, index=chunk.index)
+            for column in CATEGORICAL_COLUMNS:
+                # Union the categories so both sides share one CategoricalDtype.
+                categories = existing[column].astype('category').cat.categories.union(
+                    pd.Index(chunk[column].dropna().unique()))
+                dtype = pd.CategoricalDtype(categories)
+                existing[column] = existing[column].astype(dtype)
+                chunk[column] = chunk[column].astype(dtype)
+            combined = pd.concat([existing, chunk[existing.columns]], ignore_index=True)
+        for column in CATEGORICAL_COLUMNS:
+            combined[column] = combined[column].astype('category')
+        self.df = combined
+
+    def _apply_reorgs(self, chunk):
+        """Drops the cached rows rolled back by the Chain Reorganization signals in `chunk`."""
+        reorgs = chunk[chunk['signal_type'] == REORG_SIGNAL]
+        if reorgs.empty or 'block_number' not in self.df.columns:
+            return
+        df = self.df
+        orphaned = pd.Series(False, index=df.index)
+        for reorg in reorgs.itertuples():
+            orphaned |= ((df['id'] < reorg.id) & df['token'].isin(list(getattr(reorg, 'tokens', None) or []))
+                         & (df['block_number'] > getattr(reorg, 'fork_block', float('inf'))))
+        self._drop(orphaned)
+
+    def _recheck_provisional(self, conn):
+        """Re-reads the finality of cached provisional rows; rows no longer stored were rolled back."""
+        df = self.df
+        if df.empty or 'finality' not in df.columns:
+            return
+        provisional = df.loc[df['finality'] == FINALITY_PROVISIONAL, 'id'].tolist()
+        finality = {}
+        for start in range(0, len(provisional), RECHECK_BATCH_SIZE):
+            ids = [int(row_id) for row_id in provisional[start:start + RECHECK_BATCH_SIZE]]
+            finality.update(conn.execute(
+                f"SELECT id, json_extract(metadata, '$.finality') FROM alpha_signals "
+                f"WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall())
+        changed = {row_id: value for row_id, value in finality.items() if value != FINALITY_PROVISIONAL}
+        if changed:
+            df = df.copy()
+            rows = df['id'].isin(list(changed))
+            df.loc[rows, 'finality'] = df.loc[rows, 'id'].map(changed)
+            self.df = df
+        self._drop(df['id'].isin(provisional) & ~df['id'].isin(list(finality)))
+
+    def _drop(self, rows):
+        if rows.any():
+            df = self.df[~rows].reset_index(drop=True)
+            for column in CATEGORICAL_COLUMNS:
+                df[column] = df[column].cat.remove_unused_categories()
+            self.df = df
+
+    def _evict(self):
+        if self.df.empty:
+            return
+        self._drop(self.df['timestamp'] < self.cutoff)
+
+# --- In-memory counterparts of the signal_queries aggregates ---
+def summary_of(df):
+    return {
+        "total": len(df),
+        "critical": int((df['confidence_level'] == 'CRITICAL').sum()) if not df.empty else 0,
+        "fresh_wallets": int((df['signal_type'] == 'Fresh Wallet Accumulation').sum()) if not df.empty else 0,
+    }
+
+def counts_of(df, column):
+    if df.empty or column not in df.columns:
+        return {}
+    counts = df[column].value_counts()
+    return {value: int(count) for value, count in counts.items() if count}
+
+def page_of(df, cursor=None, page_size=PAGE_SIZE):
+    """Keyset page over a filtered frame, with the same (timestamp, id) cursor as signal_queries.fetch_page."""
+    ordered = df.sort_values(['timestamp', 'id'], ascending=False)
+    if cursor is not None:
+        cursor_ts = pd.Timestamp(cursor[0])
+        ordered = ordered[(ordered['timestamp'] < cursor_ts) |
+                          ((ordered['timestamp'] == cursor_ts) & (ordered['id'] < cursor[1]))]
+    page = ordered.iloc[:page_size]
+    has_more = len(ordered) > page_size
+    next_cursor = (page['timestamp'].iloc[-1].strftime(TIMESTAMP_FORMAT), int(page['id'].iloc[-1])) if has_more else None
+    return page, next_cursor
+
+def latest_of(df, confidence_level='CRITICAL'):
+    matches = df[df['confidence_level'] == confidence_level] if not df.empty else df
+    if matches.empty:
+        return None
+    return page_of(matches, page_size=1)[0].iloc[0].to_dict()
@@ -0,0 +1,139 @@
+"""
+ARKHEION-X: Signal Queries v1.0 (Module Edition)
+
+Read-side query layer for the dashboard. Filters are turned into one
+parameterized WHERE clause over the indexed columns (timestamp, signal_type,
+confidence_level and the generated `token` column), counts and breakdowns are
+computed with GROUP BY inside SQLite, and the signal log is read one page at
+a time with keyset pagination on (timestamp, id). Only the rows of the page
+being displayed ever have their JSON metadata parsed.
+"""
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# --- Configuration ---
+PAGE_SIZE = 100
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # How database.log_signal stores timestamps
+SIGNAL_COLUMNS = "id, timestamp, source, signal_type, metadata, confidence_level"
+
+def open_readonly(db_file):
+    """A read-only connection, so the dashboard can never lock out the agents' writer."""
+    return sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+
+@dataclass(frozen=True)
+class SignalFilter:
+    """The dashboard's sidebar selection. None means "no restriction" for that field."""
+    start: datetime = None           # Inclusive
+    end: datetime = None             # Exclusive
+    signal_types: tuple = None
+    confidence_levels: tuple = None
+    tokens: tuple = None
+
+    @classmethod
+    def for_dates(cls, first_day, last_day, **kwargs):
+        """Builds a filter covering whole days, last_day included."""
+        start = datetime.combine(first_day, datetime.min.time())
+        end = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+        return cls(start=start, end=end, **kwargs)
+
+    def where(self):
+        """Returns (sql, params) for a WHERE clause; sql is empty when nothing is filtered."""
+        clauses, params = [], []
+        if self.start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(self.start.strftime(TIMESTAMP_FORMAT))
+        if self.end is not None:
+            clauses.append("timestamp < ?")
+            params.append(self.end.strftime(TIMESTAMP_FORMAT))
+        for column, values in (("signal_type", self.signal_types),
+                               ("confidence_level", self.confidence_levels),
+                               ("token", self.tokens)):
+            if values is not None:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def timestamp_bounds(conn):
+    """(oldest, newest) signal timestamps as datetimes, or (None, None) for an empty table."""
+    oldest, newest = conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM alpha_signals").fetchone()
+    if oldest is None:
+        return None, None
+    return pd.to_datetime(oldest).to_pydatetime(), pd.to_datetime(newest).to_pydatetime()
+
+def distinct_values(conn, column, signal_filter=None):
+    """Distinct non-null values of a filterable column, most frequent first."""
+    if column not in ("signal_type", "confidence_level", "token", "source"):
+        raise ValueError(f"Unsupported column: {column}")
+    where, params = (signal_filter or SignalFilter()).where()
+    where += (" AND " if where else " WHERE ") + f"{column} IS NOT NULL"
+    rows = conn.execute(
+        f"SELECT {column} FROM alpha_signals{where} GROUP BY {column} ORDER BY COUNT(*) DESC", params
+    ).fetchall()
+    return [row[0] for row in rows]
+
+def count_by(conn, column, signal_filter=None):
+    """{value: signal count} for the filtered signals, largest first. NULL values are left out."""
+    if column not in ("signal_type", "confidence_level", "token", "source"):
+        raise ValueError(f"Unsupported column: {column}")
+    where, params = (signal_filter or SignalFilter()).where()
+    rows = conn.execute(
+        f"SELECT {column}, COUNT(*) FROM alpha_signals{where} GROUP BY {column} ORDER BY COUNT(*) DESC", params
+    ).fetchall()
+    return {value: count for value, count in rows if value is not None}
+
+def summary(conn, signal_filter=None):
+    """Headline metrics for the filtered signals in a single aggregate pass."""
+    where, params = (signal_filter or SignalFilter()).where()
+    total, critical, fresh_wallets = conn.execute(f'''
+        SELECT COUNT(*),
+               COALESCE(SUM(confidence_level = 'CRITICAL'), 0),
+               COALESCE(SUM(signal_type = 'Fresh Wallet Accumulation'), 0)
+        FROM alpha_signals{where}
+    ''', params).fetchone()
+    return {"total": total, "critical": critical, "fresh_wallets": fresh_wallets}
+
+def expand_metadata(df):
+    """Parses the JSON metadata of the given rows into columns."""
+    if df.empty or 'metadata' not in df.columns:
+        return df
+    meta_df = pd.json_normalize([json.loads(value) if value else {} for value in df['metadata']])
+    meta_df.index = df.index
+    # Generated columns (e.g. token) may already be selected; metadata is the same value.
+    meta_df = meta_df.drop(columns=[c for c in meta_df.columns if c in df.columns], errors='ignore')
+    return pd.concat([df.drop('metadata', axis=1), meta_df], axis=1)
+
+def fetch_page(conn, signal_filter=None, cursor=None, page_size=PAGE_SIZE):
+    """
+    One page of signals, newest first. `cursor` is the (timestamp, id) of the last
+    row of the previous page; seeking past it uses the timestamp index, so every
+    page costs the same however deep into the log it is.
+    Returns (DataFrame, next_cursor or None when this is the last page).
+    """
+    where, params = (signal_filter or SignalFilter()).where()
+    if cursor is not None:
+        where += (" AND " if where else " WHERE ") + "(timestamp, id) < (?, ?)"
+        params = params + list(cursor)
+    df = pd.read_sql_query(
+        f"SELECT {SIGNAL_COLUMNS} FROM alpha_signals{where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+        conn, params=params + [page_size + 1],
+    )
+    has_more = len(df) > page_size
+    df = df.iloc[:page_size]
+    next_cursor = (df['timestamp'].iloc[-1], int(df['id'].iloc[-1])) if has_more else None
+    df = expand_metadata(df)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df, next_cursor
+
+def latest_signal(conn, signal_filter=None, confidence_level='CRITICAL'):
+    """The newest filtered signal at the given confidence level, as a dict (or None)."""
+    base = signal_filter or SignalFilter()
+    levels = base.confidence_levels
+    if levels is not None and confidence_level not in levels:
+        return None
+    narrowed = SignalFilter(base.start, base.end, base.signal_types, (confidence_level,), base.tokens)
+    df, _ = fetch_page(conn, narrowed, page_size=1)
+    return df.iloc[0].to_dict() if not df.empty else None
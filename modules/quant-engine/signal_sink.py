@@ -0,0 +1,185 @@
+"""
+ARKHEION-X: Signal Sink v1.0 (Module Edition)
+
+A batched, single-writer persistence layer for alpha signals. Agents hand
+their signals to an in-memory queue; one background writer thread per process
+owns a long-lived WAL-mode SQLite connection and flushes the queue with
+`executemany`, one transaction per batch. A batch is flushed when it reaches
+BATCH_SIZE rows or when FLUSH_INTERVAL seconds have passed since its first row.
+
+A batch that cannot be written (after WRITE_RETRIES, or on any unexpected
+error) is dropped and logged, never left unaccounted for, so `flush()` always
+returns once the queue is drained. If the writer thread is gone anyway,
+`flush()` raises instead of waiting forever.
+"""
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+import metrics
+
+# --- Configuration ---
+BATCH_SIZE = 500          # Max rows per transaction
+FLUSH_INTERVAL = 1.0      # Max seconds a signal may wait in the queue before being flushed
+MAX_QUEUE_SIZE = 10000    # Producers block (backpressure) when this many signals are pending
+BACKPRESSURE_WARN_AFTER = 5.0  # Seconds a producer may be blocked before we start warning
+WRITE_RETRIES = 3         # Attempts per batch before it is dropped
+FLUSH_CHECK_INTERVAL = 1.0  # Seconds between checks that the writer is alive while flushing
+
+# Re-scanned blocks produce rows the unique dedupe index already holds; skip them.
+INSERT_SQL = '''
+    INSERT OR IGNORE INTO alpha_signals (timestamp, source, signal_type, metadata, confidence_level)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+_STOP = object()  # Sentinel telling the writer thread to drain and exit
+
+class SinkStoppedError(Exception):
+    """Raised by flush() when signals are pending but no writer thread is left to write them."""
+
+
+def open_connection(db_file, timeout=30.0):
+    """Opens a SQLite connection tuned for one writer plus concurrent readers."""
+    conn = sqlite3.connect(db_file, timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # Safe under WAL; fsync happens at checkpoints
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+class SignalSink:
+    """Queues signal rows and writes them to SQLite in batches from a background thread."""
+
+    def __init__(self, db_file, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queue_size=MAX_QUEUE_SIZE, insert_sql=INSERT_SQL):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.insert_sql = insert_sql
+        self.pid = os.getpid()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+
+    def start(self):
+        """Starts the writer thread if it is not already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="Signal-Writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """
+        Enqueues one row for writing. Blocks while the queue is full so that a
+        burst of signals slows producers down instead of exhausting memory.
+        """
+        blocked_since = None
+        while True:
+            try:
+                self._queue.put(row, timeout=BACKPRESSURE_WARN_AFTER)
+                return
+            except queue.Full:
+                blocked_since = blocked_since or time.monotonic() - BACKPRESSURE_WARN_AFTER
+                logging.warning(
+                    f"SIGNAL SINK: Write queue full ({self._queue.maxsize} pending). "
+                    f"Producer blocked for {time.monotonic() - blocked_since:.0f}s."
+                )
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every signal submitted so far has been written (or dropped).
+        Raises SinkStoppedError if the writer thread died, or TimeoutError after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if self._thread is None or not self._thread.is_alive():
+                    raise SinkStoppedError(f"Signal writer is not running; {self._queue.unfinished_tasks} "
+                                           f"signal(s) cannot be flushed.")
+                wait = FLUSH_CHECK_INTERVAL
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise TimeoutError(f"{self._queue.unfinished_tasks} signal(s) still pending "
+                                           f"after {timeout}s.")
+                self._queue.all_tasks_done.wait(wait)
+
+    def close(self, timeout=10.0):
+        """Flushes all pending signals and stops the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.error(f"SIGNAL SINK: Writer did not finish within {timeout}s; "
+                          f"{self._queue.qsize()} signals may be lost.")
+
+    def pending(self):
+        """Returns the approximate number of queued, unwritten signals."""
+        return self._queue.qsize()
+
+    # --- Writer Thread ---
+    def _run(self):
+        conn = None
+        stopping = False
+        try:
+            while not stopping:
+                batch, stopping = self._collect_batch()
+                if not batch:
+                    continue
+                try:
+                    if conn is None:
+                        conn = open_connection(self.db_file)  # Retried with the next batch if it fails
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    self.rows_dropped += len(batch)
+                    logging.critical(f"SIGNAL SINK: Dropped a batch of {len(batch)} signals: {e}", exc_info=True)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            if conn is not None:
+                conn.close()
+            if stopping:
+                self._queue.task_done()  # Account for the stop sentinel
+
+    def _collect_batch(self):
+        """Waits for the first row, then gathers more until the batch is full or its deadline passes."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, conn, batch):
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                with metrics.db_write_latency.time():
+                    with conn:  # One transaction per batch
+                        conn.executemany(self.insert_sql, batch)
+                self.rows_written += len(batch)
+                metrics.db_rows_written.inc(len(batch))
+                self.batches_written += 1
+                logging.debug(f"SIGNAL SINK: Flushed {len(batch)} signal(s).")
+                return
+            except sqlite3.Error as e:
+                logging.error(f"SIGNAL SINK: Batch write failed (attempt {attempt}/{WRITE_RETRIES}): {e}")
+                time.sleep(0.5 * attempt)
+        self.rows_dropped += len(batch)
+        logging.critical(f"SIGNAL SINK: Dropped a batch of {len(batch)} signals after {WRITE_RETRIES} attempts.")
@@ -0,0 +1,119 @@
+"""
+ARKHEION-X: Agent Supervisor v1.0 (Module Edition)
+
+Runs the in-process agents (on-chain, off-chain, correlator, archiver) and
+keeps them running:
+
+- Every agent starts at once on its own thread; the supervisor then waits
+  (up to READY_TIMEOUT) for each to report that its initialization finished.
+- An agent that exits without being asked to (missing GITHUB_PAT, no RPC
+  endpoint reachable, an unhandled exception) is logged and restarted with
+  exponential backoff, reset once it has stayed up for STABLE_AFTER seconds.
+- Shutdown is cooperative: each agent gets a stop event that its loop waits
+  on instead of sleeping, so it returns between cycles rather than mid-write.
+
+Agent entry points take two keyword arguments for this:
+
+    def start_some_patrol(stop_event=None, ready_event=None): ...
+
+Both default to None so the agents still run standalone. Worker processes of
+sharded mode are supervised separately (sharding.py).
+"""
+import time
+import logging
+import threading
+
+import metrics
+
+# --- Configuration ---
+READY_TIMEOUT = 60          # Seconds start() waits for every agent to report ready
+RESTART_BASE_DELAY = 5      # Seconds; doubles per consecutive exit
+RESTART_MAX_DELAY = 300
+STABLE_AFTER = 60           # An agent up this long has its backoff reset
+STOP_TIMEOUT = 15           # Seconds stop() waits for each agent to return
+
+class Agent:
+    def __init__(self, name, target):
+        self.name = name
+        self.target = target
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.ready_event = threading.Event()
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+
+class AgentSupervisor:
+    """Starts agent threads in parallel, restarts the ones that exit, stops them cooperatively."""
+
+    def __init__(self):
+        self.agents = {}
+
+    def add(self, name, target):
+        self.agents[name] = Agent(name, target)
+
+    def start(self, ready_timeout=READY_TIMEOUT):
+        """Launches every agent, then blocks until all are ready or `ready_timeout` passes."""
+        for agent in self.agents.values():
+            agent.thread = threading.Thread(target=self._run, args=(agent,), name=agent.name, daemon=True)
+            agent.thread.start()
+            logging.info(f"SUPERVISOR: Launched agent {agent.name}.")
+        deadline = time.monotonic() + ready_timeout
+        for agent in self.agents.values():
+            agent.ready_event.wait(max(0.0, deadline - time.monotonic()))
+        waiting = [name for name, ready in self.readiness().items() if not ready]
+        if waiting:
+            logging.warning(f"SUPERVISOR: Not ready after {ready_timeout}s: {', '.join(waiting)}.")
+        return not waiting
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Signals every agent to stop, then waits for each to return."""
+        for agent in self.agents.values():
+            agent.stop_event.set()
+        for agent in self.agents.values():
+            if agent.thread is not None:
+                agent.thread.join(timeout)
+                if agent.thread.is_alive():
+                    logging.error(f"SUPERVISOR: {agent.name} did not stop within {timeout}s.")
+
+    def readiness(self):
+        return {name: agent.ready_event.is_set() for name, agent in self.agents.items()}
+
+    def snapshot(self):
+        return [{
+            "agent": agent.name,
+            "alive": agent.thread is not None and agent.thread.is_alive(),
+            "ready": agent.ready_event.is_set(),
+            "restarts": agent.restarts,
+            "last_error": agent.last_error,
+        } for agent in self.agents.values()]
+
+    # --- Internals ---
+    def _run(self, agent):
+        while not agent.stop_event.is_set():
+            agent.ready_event.clear()
+            metrics.agent_ready.set_function(agent.ready_event.is_set, agent=agent.name)
+            metrics.agent_up.set(1, agent=agent.name)
+            started = time.monotonic()
+            try:
+                agent.target(stop_event=agent.stop_event, ready_event=agent.ready_event)
+                if not agent.stop_event.is_set():
+                    agent.last_error = "returned without being stopped"
+            except Exception as e:
+                agent.last_error = str(e)
+                logging.error(f"SUPERVISOR: {agent.name} crashed: {e}", exc_info=True)
+            finally:
+                metrics.agent_up.set(0, agent=agent.name)
+            if agent.stop_event.is_set():
+                break
+            if time.monotonic() - started >= STABLE_AFTER:
+                agent.consecutive_failures = 0
+            delay = min(RESTART_BASE_DELAY * 2 ** agent.consecutive_failures, RESTART_MAX_DELAY)
+            agent.consecutive_failures += 1
+            logging.error(f"SUPERVISOR: {agent.name} exited ({agent.last_error}). Restarting in {delay}s.")
+            if agent.stop_event.wait(delay):
+                break
+            agent.restarts += 1
+            metrics.agent_restarts.inc(agent=agent.name)
+            logging.info(f"SUPERVISOR: Restarting {agent.name} (restart #{agent.restarts}).")
+        agent.ready_event.clear()
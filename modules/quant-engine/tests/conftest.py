@@ -0,0 +1,42 @@
+"""
+Shared setup for the quant-engine tests.
+
+The modules live flat in modules/quant-engine, so that directory (and the
+benchmarks' fake servers) is put on sys.path. They read their configuration
+once, at import (settings.py), so the database is pointed at a throwaway
+file before any of them is imported. Tests that need a database of their own
+use the `db_file` / `conn` fixtures.
+
+Run from the repository root:
+    python -m pytest modules/quant-engine/tests
+"""
+import os
+import sys
+import tempfile
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(os.path.dirname(MODULE_DIR))  # For the arkheionx package
+sys.path.insert(0, os.path.join(MODULE_DIR, "benchmarks"))
+sys.path.insert(0, MODULE_DIR)
+sys.path.insert(0, REPO_ROOT)
+os.environ["ARKHEIONX_DB"] = os.path.join(tempfile.mkdtemp(prefix="arkheionx-tests-"), "arkheionx.db")
+
+import pytest
+
+from migrations import migrate
+from signal_sink import open_connection
+
+@pytest.fixture
+def db_file(tmp_path):
+    """A migrated, empty signals database."""
+    path = str(tmp_path / "signals.db")
+    conn = open_connection(path)
+    migrate(conn)
+    conn.close()
+    return path
+
+@pytest.fixture
+def conn(db_file):
+    connection = open_connection(db_file)
+    yield connection
+    connection.close()
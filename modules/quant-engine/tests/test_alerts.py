@@ -0,0 +1,98 @@
+import json
+import time
+
+import pytest
+
+import alerts
+from alerts import AlertDispatcher, DeliveryError, WebhookSink, enqueue_alert, parse_retry_after
+from fake_alerts import FakeAlertReceiver, serve
+
+class FlakySink:
+    """Fails the next `fail` sends; records the coalesced alerts of every successful one."""
+    name = "file"
+    rate_per_minute = None
+
+    def __init__(self):
+        self.fail = 0
+        self.messages = []
+
+    def send(self, group_key, alerts, text):
+        if self.fail:
+            self.fail -= 1
+            raise DeliveryError("unavailable", retry_after=0)
+        self.messages.append([alert["commit_sha"] for alert in alerts])
+
+def outbox(dispatcher):
+    return dispatcher.conn.execute("""
+        SELECT json_extract(payload, '$.commit_sha'), status, attempts FROM alert_outbox ORDER BY id
+    """).fetchall()
+
+def queue(dispatcher, sha, delay=0):
+    with dispatcher.conn:
+        enqueue_alert(dispatcher.conn, "org/repo", {"commit_sha": sha}, ["file"], delay=delay)
+
+@pytest.fixture
+def dispatcher(db_file):
+    sink = FlakySink()
+    dispatcher = AlertDispatcher({"file": sink}, db_file)
+    dispatcher.sink = sink
+    yield dispatcher
+    dispatcher.close()
+
+def test_pending_alerts_of_a_group_are_coalesced(dispatcher):
+    queue(dispatcher, "a")
+    queue(dispatcher, "b", delay=30)  # Not due yet, but joins the message
+    queue(dispatcher, "c", delay=30)
+    assert dispatcher.run_cycle() == 1
+    assert dispatcher.sink.messages == [["a", "b", "c"]]
+    assert [status for _, status, _ in outbox(dispatcher)] == ["sent"] * 3
+
+def test_new_alerts_do_not_join_a_retrying_message(dispatcher, monkeypatch):
+    monkeypatch.setattr(alerts, "MAX_ATTEMPTS", 2)
+    queue(dispatcher, "a")
+    dispatcher.sink.fail = 1
+    dispatcher.run_cycle()
+    queue(dispatcher, "b")
+    dispatcher.sink.fail = 1
+    dispatcher.run_cycle()  # "a" is retried alone and gives up
+    assert outbox(dispatcher) == [("a", "failed", 2), ("b", "pending", 0)]
+    dispatcher.run_cycle()
+    assert outbox(dispatcher) == [("a", "failed", 2), ("b", "sent", 1)]
+    assert dispatcher.sink.messages == [["b"]]
+
+def test_unconfigured_channel_backs_off(dispatcher):
+    with dispatcher.conn:
+        enqueue_alert(dispatcher.conn, "org/repo", {"commit_sha": "a"}, ["telegram"], delay=0)
+    assert dispatcher.run_cycle() == 0
+    next_attempt_at, attempts = dispatcher.conn.execute(
+        "SELECT next_attempt_at, attempts FROM alert_outbox").fetchone()
+    assert attempts == 1 and next_attempt_at > time.time()
+
+def test_webhook_retries_after_429(db_file, monkeypatch):
+    receiver = FakeAlertReceiver()
+    server, url = serve(receiver)
+    try:
+        dispatcher = AlertDispatcher({"webhook": WebhookSink(url + "/webhook")}, db_file)
+        with dispatcher.conn:
+            enqueue_alert(dispatcher.conn, "org/repo", {"commit_sha": "a"}, ["webhook"], delay=0)
+        receiver.fail_next(1, status=429)
+        assert dispatcher.run_cycle() == 0
+        retry_at = dispatcher.conn.execute("SELECT next_attempt_at FROM alert_outbox").fetchone()[0]
+        monkeypatch.setattr(time, "time", lambda: retry_at + 0.1)
+        assert dispatcher.run_cycle() == 1
+        dispatcher.close()
+    finally:
+        server.shutdown()
+    (path, body), = receiver.messages
+    assert path == "/webhook" and [alert["commit_sha"] for alert in body["alerts"]] == ["a"]
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0), (3, 3.0), ("", None), (None, None), ("soon", None),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),  # In the past
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+def test_parse_retry_after_http_date():
+    future = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 120))
+    assert 110 <= parse_retry_after(future) <= 120
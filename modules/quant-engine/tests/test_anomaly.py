@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+import anomaly
+from anomaly import WARMUP_BLOCKS, WARMUP_TRANSFERS, AnomalyScorer, TokenBaseline
+
+def warmed_up(seed=7, blocks=WARMUP_BLOCKS, per_block=0.1):
+    """A baseline fed ~1,000-unit Transfers at `per_block` Transfers per block."""
+    rng = np.random.default_rng(seed)
+    baseline = TokenBaseline()
+    transfers = int(blocks * per_block)
+    amounts = 10 ** rng.normal(3, 0.3, transfers)
+    block_numbers = np.sort(rng.integers(0, blocks, transfers))
+    baseline.score_range(amounts, block_numbers, (0, blocks - 1))
+    assert baseline.transfers >= WARMUP_TRANSFERS and baseline.blocks == blocks
+    return baseline
+
+def test_nothing_is_scored_during_warmup():
+    baseline = TokenBaseline()
+    score = baseline.score_range([1e12], [5], (0, 9))
+    assert score.z_scores is None and score.rate_z is None and not score.anomalous.any() and not score.spike
+    assert baseline.transfers == 1 and baseline.blocks == 10 and baseline.last_block == 9
+
+def test_outliers_need_both_the_z_score_and_the_percentile():
+    baseline = warmed_up()
+    score = baseline.score_range([1000.0, 1e7, 0.0], [WARMUP_BLOCKS] * 3)
+    assert score.anomalous.tolist() == [False, True, False]
+    assert score.z_scores[1] >= anomaly.Z_THRESHOLD and score.percentiles[1] >= anomaly.PERCENTILE_THRESHOLD
+    assert baseline.transfers == WARMUP_BLOCKS // 10 + 2  # Zero amounts are not folded in
+    assert 800 < baseline.median_amount() < 1250
+
+def test_the_percentile_gate_alone_can_hold_back_an_outlier(monkeypatch):
+    monkeypatch.setattr(anomaly, "PERCENTILE_THRESHOLD", 1.01)
+    assert not warmed_up().score_range([1e7], [WARMUP_BLOCKS]).anomalous.any()
+
+def test_frequency_spikes_and_rescans():
+    baseline = warmed_up()
+    quiet = baseline.score_range([1000.0], [WARMUP_BLOCKS + 5], (WARMUP_BLOCKS, WARMUP_BLOCKS + 9))
+    assert quiet.transfers == 1 and not quiet.spike
+    start = WARMUP_BLOCKS + 10
+    spike = baseline.score_range([1000.0] * 50, [start] * 50, (start, start + 9))
+    assert spike.spike and spike.rate_z >= anomaly.RATE_Z_THRESHOLD and spike.expected == pytest.approx(1, rel=0.3)
+    blocks = baseline.blocks
+    rescan = baseline.score_range([1000.0] * 50, [start] * 50, (start, start + 9))  # Already folded in
+    assert rescan.transfers == 0 and rescan.rate_z is None and baseline.blocks == blocks
+
+def test_baselines_round_trip_through_json():
+    baseline = warmed_up()
+    restored = TokenBaseline(json.loads(json.dumps(baseline.to_state())))
+    assert restored.to_state() == baseline.to_state()
+    amounts, blocks = [900.0, 5e6], [WARMUP_BLOCKS + 1] * 2
+    expected = baseline.score_range(amounts, blocks, (WARMUP_BLOCKS, WARMUP_BLOCKS + 1))
+    actual = restored.score_range(amounts, blocks, (WARMUP_BLOCKS, WARMUP_BLOCKS + 1))
+    assert actual.z_scores == pytest.approx(expected.z_scores) and actual.rate_z == pytest.approx(expected.rate_z)
+    assert actual.percentiles == pytest.approx(expected.percentiles, abs=1e-4)
+
+def test_scorer_reports_each_changed_baseline_once():
+    scorer = AnomalyScorer()
+    scorer.load({"USDC": warmed_up().to_state()})
+    scorer.score_range("ARB", [1.0], [1], (1, 1))
+    assert set(scorer.changed_states()) == {"ARB"}
+    assert scorer.changed_states() == {}
+    assert scorer.baseline("USDC").transfers == WARMUP_BLOCKS // 10
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("web3")
+import async_engine
+
+def buffered(*blocks):
+    return [({"blockNumber": block, "logIndex": index}, "USDC", {}) for index, block in enumerate(blocks)]
+
+@pytest.fixture
+def handled(monkeypatch):
+    calls = []
+    async def handle_events(pool, events, block_range=None):
+        calls.append(([event["blockNumber"] for event, _, _ in events], block_range))
+    monkeypatch.setattr(async_engine, "handle_events", handle_events)
+    return calls
+
+def test_a_full_buffer_flushes_whole_blocks_with_their_range(handled):
+    latest_block, rest = asyncio.run(async_engine.flush_whole_blocks(None, buffered(101, 101, 102, 103, 103), 100))
+    # Block 103 may still be receiving logs, so it waits for the next head.
+    assert handled == [([101, 101, 102], (101, 102))]
+    assert latest_block == 102 and [event["blockNumber"] for event, _, _ in rest] == [103, 103]
+
+def test_a_buffer_of_one_block_waits_for_the_next_head(handled):
+    items = buffered(101, 101)
+    assert asyncio.run(async_engine.flush_whole_blocks(None, items, 100)) == (100, items)
+    assert handled == []
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("web3")
+import backfill
+import engine
+from backfill import GROWTH_FACTOR, MAX_CHUNK_SIZE, MAX_RANGE_ATTEMPTS, QUIET_CHUNK_LOGS, AdaptiveChunker
+
+def test_chunks_cover_the_range_and_grow_when_quiet():
+    chunker = AdaptiveChunker(0, 9999, chunk_size=1000)
+    assert chunker.next_range() == (0, 999)
+    chunker.on_success(QUIET_CHUNK_LOGS - 1)
+    assert chunker.next_range() == (1000, 1000 + int(1000 * GROWTH_FACTOR) - 1)
+    chunker.on_success(QUIET_CHUNK_LOGS)  # A busy chunk keeps the size
+    assert chunker.chunk_size == 1000 * GROWTH_FACTOR
+
+def test_growth_is_capped():
+    chunker = AdaptiveChunker(0, 10 ** 9, chunk_size=MAX_CHUNK_SIZE)
+    chunker.on_success(0)
+    assert chunker.chunk_size == MAX_CHUNK_SIZE
+
+def test_rejected_ranges_are_retried_in_halves_first():
+    chunker = AdaptiveChunker(0, 9999, chunk_size=2000)
+    start, end = chunker.next_range()
+    chunker.on_too_large(start, end)
+    assert chunker.chunk_size == 1000
+    assert [chunker.next_range() for _ in range(3)] == [(0, 999), (1000, 1999), (2000, 2999)]
+    chunker.on_too_large(0, 0)  # Never below one block
+    assert chunker.chunk_size == backfill.MIN_CHUNK_SIZE
+
+class Provider:
+    """get_transfer_logs stand-in: rejects ranges above `max_blocks`, throttles the first `throttle` calls."""
+
+    def __init__(self, max_blocks, throttle=0, fail=()):
+        self.max_blocks = max_blocks
+        self.throttle = throttle
+        self.fail = set(fail)
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        if self.throttle:
+            self.throttle -= 1
+            raise ValueError("429 Client Error: Too Many Requests")
+        if (start, end) in self.fail:
+            raise ConnectionError("connection reset")
+        if end - start + 1 > self.max_blocks:
+            raise ValueError("query returned more than 10000 results")
+        return [{"blockNumber": block} for block in range(start, end + 1)]
+
+@pytest.fixture
+def scanned(monkeypatch):
+    """Blocks handed to handle_chunk, with sleeps and the final flush stubbed out."""
+    blocks = []
+    monkeypatch.setattr(backfill, "handle_chunk", lambda raw_logs, start, end: blocks.extend(range(start, end + 1)) or 0)
+    monkeypatch.setattr(backfill, "flush_signals", lambda: None)
+    monkeypatch.setattr(backfill.time, "sleep", lambda seconds: None)
+    return blocks
+
+def test_backfill_adapts_to_the_provider(monkeypatch, scanned):
+    provider = Provider(max_blocks=300)
+    monkeypatch.setattr(engine, "get_transfer_logs", provider)
+    assert backfill.run_backfill(1000, 4999, workers=3, chunk_size=1000) == (4000, 0)
+    assert sorted(scanned) == list(range(1000, 5000))  # Every block exactly once
+    assert provider.calls[0] == (1000, 1999) and (1000, 1499) in provider.calls
+
+def test_throttled_ranges_are_retried_without_using_up_attempts(monkeypatch, scanned):
+    monkeypatch.setattr(engine, "get_transfer_logs", Provider(max_blocks=1000, throttle=MAX_RANGE_ATTEMPTS + 2))
+    assert backfill.run_backfill(0, 999, workers=1, chunk_size=1000) == (1000, 0)
+
+def test_a_range_failing_repeatedly_aborts(monkeypatch, scanned):
+    monkeypatch.setattr(engine, "get_transfer_logs", Provider(max_blocks=1000, fail=[(0, 999)]))
+    with pytest.raises(RuntimeError):
+        backfill.run_backfill(0, 999, workers=1, chunk_size=1000)
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from arkheionx import cli
+
+@pytest.fixture
+def started(monkeypatch):
+    """Agent names cli.main would run; nothing is started."""
+    runs = []
+    monkeypatch.setattr(cli, "run", lambda names: runs.append(names) or 0)
+    return runs
+
+def test_run_all_starts_every_agent(started):
+    assert cli.main(["run", "all"]) == 0
+    assert started == [list(cli.AGENTS)]
+
+def test_agents_are_run_once_in_the_order_given(started):
+    cli.main(["run", "correlator", "onchain", "correlator"])
+    assert started == [["correlator", "onchain"]]
+
+def test_unknown_agents_are_rejected(started, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["run", "trader"])
+    assert exit_info.value.code == 2 and "invalid choice" in capsys.readouterr().err
+    assert started == []
+
+def test_tool_arguments_are_passed_through(monkeypatch):
+    calls = []
+    monkeypatch.setitem(cli.TOOLS, "backfill", ("", lambda argv: calls.append(argv) or 3))
+    assert cli.main(["backfill", "--days", "7", "--help"]) == 3
+    assert calls == [["--days", "7", "--help"]]
+
+def test_help_imports_no_agent():
+    code = ("import sys\n"
+            "from arkheionx import cli\n"
+            "try:\n"
+            "    cli.main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "loaded = {'engine', 'web3', 'requests', 'pandas', 'correlator', 'settings'} & set(sys.modules)\n"
+            "sys.exit(', '.join(sorted(loaded)) or None)\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "backfill" in result.stdout
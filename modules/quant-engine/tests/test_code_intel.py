@@ -0,0 +1,65 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+import code_intel
+from fake_github import FakeGitHub, serve
+
+REPO = "org/repo"
+
+@pytest.fixture
+def github(monkeypatch):
+    github = FakeGitHub([REPO], initial_commits=5)
+    server, url = serve(github)
+    monkeypatch.setattr(code_intel, "GITHUB_API", url)
+    monkeypatch.setattr(code_intel, "session", requests.Session())
+    monkeypatch.setattr(code_intel, "COMMITS_PER_PAGE", 3)
+    monkeypatch.setattr(code_intel, "rate_limit", code_intel.RateLimitTracker())
+    yield github
+    server.shutdown()
+
+def shas(commits):
+    return [commit["sha"] for commit in commits]
+
+def test_first_poll_only_takes_the_newest_commit(github):
+    commits, etag = code_intel.fetch_new_commits(REPO, {})
+    assert len(commits) == 1 and etag
+    assert github.shas[commits[0]["sha"]] == (REPO, 4)
+
+def test_unchanged_repos_cost_a_304(github):
+    commits, etag = code_intel.fetch_new_commits(REPO, {})
+    state = {"etag": etag, "last_sha": commits[-1]["sha"]}
+    assert code_intel.fetch_new_commits(REPO, state) == ([], etag)
+    assert github.not_modified == 1
+    # 304s do not count against the rate limit.
+    assert code_intel.rate_limit.requests_last_cycle == 1
+
+def test_bursts_are_paged_back_to_the_last_seen_commit(github):
+    commits, etag = code_intel.fetch_new_commits(REPO, {})
+    github.add_commits(7)
+    new_commits, new_etag = code_intel.fetch_new_commits(REPO, {"etag": etag, "last_sha": commits[-1]["sha"]})
+    assert [github.shas[sha][1] for sha in shas(new_commits)] == list(range(5, 12))  # Oldest first
+    assert new_etag != etag
+    assert code_intel.rate_limit.requests_last_cycle == 1 + 3  # The 7 new commits plus the last seen one span 3 pages
+
+def test_long_bursts_are_paged_to_the_end(github):
+    commits, etag = code_intel.fetch_new_commits(REPO, {})
+    github.add_commits(40)  # 14 pages
+    new_commits, _ = code_intel.fetch_new_commits(REPO, {"etag": etag, "last_sha": commits[-1]["sha"]})
+    assert [github.shas[sha][1] for sha in shas(new_commits)] == list(range(5, 45))
+
+def test_rewritten_history_resumes_from_the_newest_commit(github):
+    new_commits, _ = code_intel.fetch_new_commits(REPO, {"last_sha": "0" * 40})
+    assert [github.shas[sha][1] for sha in shas(new_commits)] == [4]
+    assert code_intel.rate_limit.requests_last_cycle == 2  # Every page of the history was read
+
+def test_poll_repo_saves_the_cursor(github, monkeypatch):
+    store, analyzed = {}, []
+    monkeypatch.setattr(code_intel, "read_state", lambda agent, key, default=None: store.get(key, default))
+    monkeypatch.setattr(code_intel, "write_state", lambda agent, key, value: store.__setitem__(key, value))
+    monkeypatch.setattr(code_intel, "analyze_commit", lambda repo, commit: analyzed.append(commit["sha"]))
+    assert code_intel.poll_repo(REPO) == 1
+    github.add_commits(2)
+    assert code_intel.poll_repo(REPO) == 2
+    assert code_intel.poll_repo(REPO) == 0
+    assert store[f"repo:{REPO}"]["last_sha"] == analyzed[-1]
+    assert [github.shas[sha][1] for sha in analyzed] == [4, 5, 6]
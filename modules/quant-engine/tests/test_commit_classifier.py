@@ -0,0 +1,27 @@
+import pytest
+
+from commit_classifier import CommitClassifier
+
+@pytest.fixture(scope="module")
+def classifier():
+    return CommitClassifier()
+
+@pytest.mark.parametrize("message, keywords", [
+    ("\u017fecurity review", ["security"]),        # Long s folds to "s"
+    ("\u212aernel: fix reentrancy", ["fix", "reentran*"]),  # Kelvin sign folds to "k"
+    ("SECURITY hotfixes", ["security", "hotfix*"]),
+    ("Emergency\n  pause", ["emergency", "pause"]),
+    ("prefix the dispatch table", []),
+    ("Straße ß", []),
+])
+def test_keywords(classifier, message, keywords):
+    assert classifier.classify(message).keywords == keywords
+
+def test_each_rule_counts_once(classifier):
+    assert classifier.score_message("fix fix fix") == (2.0, ["fix"])
+
+def test_paths_scale_the_score(classifier):
+    assert classifier.classify("security fix", ["contracts/Vault.sol"]).score == pytest.approx(9.0)
+    assert classifier.classify("security fix", ["contracts/test/Vault.t.sol"]).score == pytest.approx(3.0)
+    assert classifier.classify("security fix", ["docs/a.md", "README.md"]).score == pytest.approx(1.5)
+    assert classifier.classify("typo", ["contracts/Vault.sol"]).severity is None
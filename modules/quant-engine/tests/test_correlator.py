@@ -0,0 +1,102 @@
+import json
+
+import correlator
+from correlator import STATE_AGENT, CorrelationEngine, SlidingWindowIndex
+from database import load_state
+
+def test_window_index_keeps_events_in_time_order():
+    index = SlidingWindowIndex(window_seconds=100)
+    for ts, key in ((10, "a"), (30, "c"), (20, "b"), (30, "d")):
+        assert index.add(ts, key, ts)
+    assert not index.add(40, "a", 40)  # Already indexed
+    assert [key for key, _ in index.between(20, 30)] == ["b", "c", "d"]
+    assert index.between(31, 50) == []
+
+def test_window_index_evicts_the_expired_prefix():
+    index = SlidingWindowIndex(window_seconds=100)
+    for ts in range(0, 200, 10):
+        index.add(ts, f"k{ts}", ts)
+    index.evict(now=250)
+    assert len(index) == 5 and [key for key, _ in index.between(0, 1000)][0] == "k150"
+    assert "k140" not in index and "k150" in index
+    assert index.add(140, "k140", 140)  # An evicted key may be indexed again
+
+def test_window_index_merges_late_arrivals():
+    index = SlidingWindowIndex(window_seconds=100)
+    for ts in (100, 130, 160, 190):
+        index.add(ts, f"k{ts}", ts)
+    for ts in (115, 145):  # Arrive after newer events
+        index.add(ts, f"late{ts}", ts)
+    assert [key for key, _ in index.between(110, 160)] == ["late115", "k130", "late145", "k160"]
+    index.evict(now=240)  # Expires k100, late115 and k130
+    assert len(index) == 3 and "late115" not in index and "k130" not in index
+    assert [key for key, _ in index.between(0, 1000)] == ["late145", "k160", "k190"]
+    assert index.remove_if(lambda key, event: event < 170) == 2
+    assert [key for key, _ in index.between(0, 1000)] == ["k190"]
+
+def add_signal(conn, source, metadata, confidence):
+    with conn:
+        conn.execute("INSERT INTO alpha_signals (source, signal_type, metadata, confidence_level) VALUES (?, 'x', ?, ?)",
+                     (source, json.dumps(metadata), confidence))
+
+def add_commit(conn, sha, repo="org/repo"):
+    add_signal(conn, "Off-Chain Agent", {"repository": repo, "commit_sha": sha}, "HIGH")
+
+def add_move(conn, tx_hash, confidence="CRITICAL", token="ARB"):
+    add_signal(conn, "On-Chain Agent", {"token": token, "from": "0xf", "to": "0xa", "tx_hash": tx_hash,
+                                        "log_index": 0, "amount": "1.00"}, confidence)
+
+def alerts(conn):
+    return [key for (key,) in conn.execute("SELECT commit_key FROM correlation_alerts ORDER BY commit_key")]
+
+def test_cycles_only_read_past_the_watermark(db_file, conn):
+    add_commit(conn, "c1")
+    add_move(conn, "0x1", confidence="HIGH")
+    engine = CorrelationEngine(db_file, alert_channels=[])
+    engine.start()
+    assert engine.run_cycle() == 2 and alerts(conn) == []
+    assert load_state(conn, STATE_AGENT, "watermark") == 2
+    add_move(conn, "0x2")
+    assert engine.run_cycle() == 1 and alerts(conn) == ["c1"]
+    assert engine.run_cycle() == 0
+    engine.close()
+
+def test_restart_resumes_from_the_watermark(db_file, conn):
+    add_commit(conn, "c1")
+    add_move(conn, "0x1")
+    first = CorrelationEngine(db_file, alert_channels=[])
+    first.start()
+    first.run_cycle()
+    first.close()
+    assert alerts(conn) == ["c1"]
+
+    add_commit(conn, "c2")
+    restarted = CorrelationEngine(db_file, alert_channels=[])
+    restarted.start()
+    # Signals at or below the watermark are re-indexed, not re-evaluated: c1 is not raised again.
+    assert restarted.watermark == 2 and len(restarted.off_chain) == 1 and restarted.move_count() == 1
+    assert restarted.run_cycle() == 1
+    assert alerts(conn) == ["c1", "c2"]
+    restarted.close()
+
+def test_commits_are_linked_to_their_protocols_tokens(db_file, conn):
+    add_commit(conn, "c1", repo="Uniswap/v3-core")
+    add_commit(conn, "c2")  # Not in REPO_TOKENS: any token
+    add_move(conn, "0x1", token="ARB")
+    engine = CorrelationEngine(db_file, alert_channels=[])
+    engine.start()
+    engine.run_cycle()
+    assert alerts(conn) == ["c2"]
+    add_move(conn, "0x2", token="UNI")
+    engine.run_cycle()
+    assert alerts(conn) == ["c1", "c2"]
+    engine.close()
+
+def test_agent_unsubscribes_once_on_interrupt(monkeypatch, db_file):
+    unsubscribed = []
+    monkeypatch.setattr(correlator.bus, "unsubscribe", unsubscribed.append)
+    def interrupt():
+        raise KeyboardInterrupt
+    monkeypatch.setattr(correlator, "find_correlations", interrupt)
+    correlator.start_correlation_analysis()
+    assert len(unsubscribed) == 1
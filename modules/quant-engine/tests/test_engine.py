@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("web3")
+import engine
+
+class RangeLimitedProvider:
+    """eth_getLogs stand-in that rejects ranges wider than `max_blocks`."""
+
+    def __init__(self, max_blocks, error="query returned more than 10000 results"):
+        self.max_blocks = max_blocks
+        self.error = error
+        self.calls = []
+
+    def __call__(self, params):
+        from_block, to_block = params["fromBlock"], params["toBlock"]
+        self.calls.append((from_block, to_block))
+        if to_block - from_block + 1 > self.max_blocks:
+            raise ValueError({"code": -32005, "message": self.error})
+        return [{"blockNumber": block} for block in range(from_block, to_block + 1)]
+
+def use_provider(monkeypatch, provider):
+    monkeypatch.setattr(engine, "w3", SimpleNamespace(eth=SimpleNamespace(get_logs=provider)))
+    monkeypatch.setattr(engine, "transfer_addresses", [])
+    return provider
+
+@pytest.mark.parametrize("error", ["query returned more than 10000 results", "Too many results, max 10000",
+                                   "block range is too wide", "Log response size exceeded"])
+def test_rejected_ranges_are_split_until_they_fit(monkeypatch, error):
+    provider = use_provider(monkeypatch, RangeLimitedProvider(max_blocks=3, error=error))
+    logs = engine.fetch_transfer_logs(100, 109)
+    assert [log["blockNumber"] for log in logs] == list(range(100, 110))
+    assert provider.calls == [(100, 109), (100, 104), (100, 102), (103, 104), (105, 109), (105, 107), (108, 109)]
+
+def test_a_single_block_is_never_split(monkeypatch):
+    use_provider(monkeypatch, RangeLimitedProvider(max_blocks=0))
+    with pytest.raises(ValueError):
+        engine.fetch_transfer_logs(100, 100)
+
+@pytest.mark.parametrize("error", ["429 Client Error: Too Many Requests", "rate limit exceeded",
+                                   "{'code': -32005, 'message': 'daily request count exceeded, request rate limited'}"])
+def test_rate_limits_are_not_range_errors(monkeypatch, error):
+    provider = use_provider(monkeypatch, RangeLimitedProvider(max_blocks=0, error=error))
+    assert engine.is_rate_limit_error(error) and not engine.is_range_error(error)
+    with pytest.raises(ValueError):
+        engine.fetch_transfer_logs(100, 109)
+    assert provider.calls == [(100, 109)]
+
+def test_rate_limit_backoff_grows_to_a_cap():
+    delays = [engine.rate_limit_delay(throttled) for throttled in range(1, 10)]
+    assert delays[:3] == [engine.RATE_LIMIT_BASE_DELAY, 2 * engine.RATE_LIMIT_BASE_DELAY, 4 * engine.RATE_LIMIT_BASE_DELAY]
+    assert delays[-1] == engine.RATE_LIMIT_MAX_DELAY
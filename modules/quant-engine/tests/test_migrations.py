@@ -0,0 +1,46 @@
+import json
+
+from migrations import SCHEMA_VERSION, get_schema_version, migrate
+from signal_sink import open_connection
+
+def insert(conn, source, metadata):
+    conn.execute("INSERT INTO alpha_signals (source, signal_type, metadata, confidence_level) VALUES (?, 'x', ?, 'HIGH')",
+                 (source, json.dumps(metadata)))
+
+def test_upgrade_from_v1_removes_duplicates(tmp_path):
+    conn = open_connection(str(tmp_path / "old.db"))
+    assert migrate(conn, target_version=1) == [1]
+    transfer = {"token": "ARB", "tx_hash": "0xabc", "log_index": 3, "to": "0xb"}
+    commit = {"repository": "a/b", "commit_sha": "f00"}
+    with conn:
+        insert(conn, "On-Chain Agent", transfer)
+        insert(conn, "On-Chain Agent", transfer)        # A re-scanned block
+        insert(conn, "On-Chain Agent", {"token": "ARB", "tx_hash": "0xabc", "log_index": 4})
+        # Two Transfers of one transaction to the same receiver, from before log_index was recorded.
+        insert(conn, "On-Chain Agent", {"token": "ARB", "tx_hash": "0xdef", "to": "0xb", "amount": 5})
+        insert(conn, "On-Chain Agent", {"token": "ARB", "tx_hash": "0xdef", "to": "0xb", "amount": 7})
+        insert(conn, "Off-Chain Agent", commit)
+        insert(conn, "Off-Chain Agent", commit)
+        insert(conn, "Off-Chain Agent", {"repository": "a/b"})  # No dedupe key: always kept
+        insert(conn, "Off-Chain Agent", {"repository": "a/b"})
+
+    assert migrate(conn) == list(range(2, SCHEMA_VERSION + 1))
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    rows = conn.execute("SELECT id, dedupe_key FROM alpha_signals ORDER BY id").fetchall()
+    assert rows == [(1, "0xabc:3"), (3, "0xabc:4"), (4, None), (5, None), (6, "f00"), (8, None), (9, None)]
+    assert migrate(conn) == []
+    conn.close()
+
+def test_unique_index_ignores_repeated_inserts(conn):
+    with conn:
+        for _ in range(2):
+            conn.execute("INSERT OR IGNORE INTO alpha_signals (source, signal_type, metadata) VALUES (?, 'x', ?)",
+                         ("On-Chain Agent", json.dumps({"tx_hash": "0x1", "log_index": 0, "block_number": 7})))
+    assert conn.execute("SELECT COUNT(*), MAX(block_number) FROM alpha_signals").fetchone() == (1, 7)
+
+def test_fresh_database_upgrades_from_v0(tmp_path):
+    conn = open_connection(str(tmp_path / "new.db"))
+    assert get_schema_version(conn) == 0
+    assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    conn.close()
@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("web3")
+from web3 import Web3
+
+import multicall
+from multicall import BatchReader, ContractCallError, selector
+
+TOKEN = "0x" + "11" * 20
+
+class Multicall3:
+    """aggregate3 stand-in: answers `balanceOf(holder)` with the holder's last byte, reverts on `fail`."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.batches = []
+
+    def __call__(self, w3, calls, block_identifier="latest"):
+        self.batches.append((block_identifier, len(calls)))
+        if block_identifier in self.fail:
+            raise ConnectionError("eth_call failed")
+        results = []
+        for target, call_data in calls:
+            if call_data[:4] == selector("decimals()"):
+                results.append((True, w3.codec.encode(["uint8"], [6])))
+            elif call_data[:4] == selector("balanceOf(address)"):
+                holder, = w3.codec.decode(["address"], call_data[4:])
+                results.append((True, w3.codec.encode(["uint256"], [int(holder[-2:], 16)])))
+            else:
+                results.append((False, b""))
+        return results
+
+@pytest.fixture
+def aggregate3(monkeypatch):
+    fake = Multicall3(fail={99})
+    monkeypatch.setattr(multicall, "aggregate3", fake)
+    return fake
+
+def test_reads_are_chunked_per_block(aggregate3):
+    reader = BatchReader(Web3(), max_batch=4)
+    futures = [reader.add(TOKEN, "balanceOf(address)", ["0x" + "00" * 19 + f"{index:02x}"], ["uint256"], block=block)
+               for block in (1, 2) for index in range(6)]
+    assert reader.flush() == 4
+    assert aggregate3.batches == [(1, 4), (1, 2), (2, 4), (2, 2)]
+    assert [future.result() for future in futures] == list(range(6)) * 2
+    assert reader.round_trips == 4 and reader.flush() == 0
+
+def test_results_are_decoded_per_call(aggregate3):
+    with BatchReader(Web3()) as reader:
+        decimals = reader.add(TOKEN, "decimals()", output_types=["uint8"])
+        raw = reader.add(TOKEN, "decimals()")
+        reverted = reader.add(TOKEN, "symbol()", output_types=["string"])
+        undecodable = reader.add(TOKEN, "decimals()", output_types=["string"])
+    assert decimals.result() == 6
+    assert raw.result() == Web3().codec.encode(["uint8"], [6])
+    for future in (reverted, undecodable):
+        with pytest.raises(ContractCallError):
+            future.result()
+    assert aggregate3.batches == [("latest", 4)]
+
+def test_a_failed_batch_fails_only_its_own_calls(aggregate3):
+    reader = BatchReader(Web3())
+    lost = reader.add(TOKEN, "decimals()", output_types=["uint8"], block=99)
+    kept = reader.add(TOKEN, "decimals()", output_types=["uint8"], block=100)
+    assert reader.flush() == 2
+    with pytest.raises(ConnectionError):
+        lost.result()
+    assert kept.result() == 6
+
+def test_selector_and_input_types():
+    assert selector("transfer(address,uint256)").hex() == "a9059cbb"
+    assert multicall.input_types("transfer(address, uint256)") == ["address", "uint256"]
+    assert multicall.input_types("decimals()") == []
+
+def test_extra_tokens_sharing_a_symbol_keep_distinct_names(monkeypatch):
+    import engine
+    usdc, weth_a, weth_b = ("0x" + byte * 20 for byte in ("aa", "bb", "cc"))
+    symbols = {usdc: "USDC", weth_a: "WETH", weth_b: "WETH"}
+    monkeypatch.setattr(engine, "TARGET_TOKENS", {"USDC": {"address": "0x" + "dd" * 20, "price": {}}})
+    monkeypatch.setattr(engine, "EXTRA_TOKEN_ADDRESSES", [usdc, weth_a, weth_b])
+    monkeypatch.setattr(engine, "read_state", lambda agent, key, default=None: {"decimals": 18, "symbol": symbols[key]}
+                        if key in symbols else {"decimals": 6, "symbol": "USDC"})
+    engine.load_token_metadata(Web3())
+    assert sorted(engine.TARGET_TOKENS) == ["USDC", "USDC-aaaaaa", "WETH", "WETH-cccccc"]
+    assert engine.TARGET_TOKENS["WETH"]["address"] == weth_a
@@ -0,0 +1,120 @@
+import json
+import time
+
+import pytest
+
+from block_tracker import (BlockTracker, FINALITY_PROVISIONAL, REORG_SIGNAL, finalize_signals, normalize_hash,
+                           rollback_signals)
+from fake_rpc import FakeChain
+from signal_bus import Signal
+
+SOURCE = "On-Chain Agent"
+
+def tracked(chain, first, last, history_blocks=512):
+    tracker = BlockTracker(history_blocks=history_blocks)
+    for number in range(first, last + 1):
+        tracker.record(number, chain.block_hash(number))
+    return tracker
+
+def test_fake_chain_reorg_replaces_only_blocks_above_the_fork():
+    chain, original = FakeChain(head=1000), FakeChain(head=1000)
+    chain.reorg(10)
+    assert chain.block_hash(990) == original.block_hash(990)
+    assert chain.block_hash(991) != original.block_hash(991)
+    assert chain.block_logs(991) != original.block_logs(991)
+
+def test_tracker_finds_the_fork_point():
+    chain = FakeChain(head=1000)
+    tracker = tracked(chain, 980, 1000)
+    chain.reorg(7)
+    assert not tracker.parent_matches(1001, chain.block_hash(1000))
+    assert tracker.find_fork(chain.block_hash) == 993
+    tracker.finalized_through = 998
+    tracker.rollback(993)
+    assert tracker.between(990, 1000)[-1] == (993, normalize_hash(chain.block_hash(993)))
+    assert tracker.finalized_through == 993
+
+def test_tracker_history_is_bounded_and_survives_a_restart():
+    tracker = tracked(FakeChain(), 0, 99, history_blocks=10)
+    assert tracker.oldest() == 89 and len(tracker) == 11
+    tracker.record(5, "0x05")  # Older than the history kept
+    assert tracker.hash_of(5) is None
+    restored = BlockTracker(json.loads(json.dumps(tracker.to_state())), history_blocks=10)
+    assert restored.to_state() == tracker.to_state()
+
+def test_deeper_reorg_than_history_has_no_fork():
+    chain = FakeChain(head=100)
+    tracker = tracked(chain, 95, 100)
+    chain.reorg(20)
+    assert tracker.find_fork(chain.block_hash) is None
+
+def add_signal(conn, token, block, finality=FINALITY_PROVISIONAL):
+    metadata = {"token": token, "tx_hash": f"0x{token}{block}", "log_index": 0, "block_number": block}
+    if finality:
+        metadata["finality"] = finality
+    conn.execute("INSERT INTO alpha_signals (source, signal_type, metadata, confidence_level) VALUES (?, 'x', ?, 'HIGH')",
+                 (SOURCE, json.dumps(metadata)))
+
+def test_rollback_and_finalize_signals(conn):
+    with conn:
+        for block in (10, 20, 30):
+            add_signal(conn, "ARB", block)
+        add_signal(conn, "USDC", 30)
+        add_signal(conn, "ARB", 5, finality=None)
+    with conn:
+        assert rollback_signals(conn, SOURCE, ["ARB"], 15) == 2
+    with conn:
+        assert finalize_signals(conn, SOURCE, ["ARB", "USDC"], 0, 25) == 1
+    rows = conn.execute("""
+        SELECT token, block_number, json_extract(metadata, '$.finality') FROM alpha_signals ORDER BY id
+    """).fetchall()
+    assert rows == [("ARB", 10, "final"), ("USDC", 30, FINALITY_PROVISIONAL), ("ARB", 5, None)]
+
+def test_correlator_drops_orphaned_moves_once(db_file):
+    from correlator import CorrelationEngine
+    engine = CorrelationEngine(db_file, alert_channels=[])
+    engine.start()
+    now = time.time()
+    def move(index, block, token="ARB"):
+        return Signal(SOURCE, "Fresh Wallet Accumulation",
+                      {"token": token, "from": f"0xa{index}", "to": f"0xb{index}", "tx_hash": f"0x{index}",
+                       "log_index": 0, "block_number": block}, "CRITICAL", now)
+    for index, block in enumerate((10, 20, 30)):
+        engine.on_signal(move(index, block))
+    engine.on_signal(move(9, 30, token="USDC"))
+    reorg = Signal(SOURCE, REORG_SIGNAL, {"tokens": ["ARB"], "fork_block": 15, "reorg_id": "r1"}, "MEDIUM", now)
+    engine.on_signal(reorg)
+    assert engine.move_count() == 2
+    engine.on_signal(move(5, 25))  # Re-scanned block
+    # The same reorg read back from the database must not drop the re-scanned move.
+    engine._ingest(now, "row:1", SOURCE, dict(reorg.metadata), "MEDIUM", now)
+    assert engine.move_count() == 3
+    engine.close()
+
+def test_engine_rolls_back_to_the_fork(db_file, monkeypatch):
+    pytest.importorskip("web3")
+    pytest.importorskip("requests")
+    import database
+    import engine
+    from signal_bus import bus
+
+    monkeypatch.setattr(database, "DB_FILE", db_file)
+    monkeypatch.setattr(engine, "block_tracker", BlockTracker())
+    monkeypatch.setattr(engine, "token_checkpoints", {})
+    chain = FakeChain(head=130)
+    def get_header(number):
+        if number > chain.head():
+            return None
+        return {"number": number, "hash": chain.block_hash(number), "parentHash": chain.block_hash(number - 1)}
+    subscription = bus.subscribe("test-reorg")
+    try:
+        for block in range(100, 126):
+            engine.block_tracker.record(block, chain.block_hash(block))
+        assert engine.check_chain(125, get_header) == 125
+        chain.reorg(12)
+        assert engine.check_chain(125, get_header) == 118
+        published = subscription.get(timeout=1)
+    finally:
+        bus.unsubscribe(subscription)
+    assert published.signal_type == REORG_SIGNAL and published.metadata["fork_block"] == 118
+    assert engine.token_checkpoints == {token: 118 for token in engine.TARGET_TOKENS}
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("web3")
+import rpc_pool
+from rpc_pool import EJECT_AFTER_FAILURES, EJECT_BASE_SECONDS, NoHealthyEndpointError, ProviderPool
+
+URLS = ["http://rpc-a.invalid", "http://rpc-b.invalid", "http://rpc-c.invalid"]
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rpc_pool.time, "monotonic", clock)
+    return clock
+
+def answer(failing=(), request_error=None):
+    """A pool call returning the endpoint's URL; endpoints in `failing` raise instead."""
+    async def call(w3):
+        url = w3.provider.endpoint_uri
+        if request_error is not None:
+            raise ValueError(request_error)
+        if url in failing:
+            raise ConnectionError(f"{url} is down")
+        return url
+    return call
+
+def run(pool, fn, race=False):
+    return asyncio.run(pool.call(fn, race=race))
+
+def test_calls_fail_over_to_the_next_endpoint(clock):
+    pool = ProviderPool(URLS)
+    assert run(pool, answer(failing={URLS[0]})) == URLS[1]
+    first = pool.endpoints[0]
+    assert first.consecutive_failures == 1 and first.available
+    # The failure raised the first endpoint's error rate, so it now ranks last.
+    assert pool.ranked()[-1] is first
+
+def test_every_endpoint_failing_raises(clock):
+    pool = ProviderPool(URLS)
+    with pytest.raises(NoHealthyEndpointError):
+        run(pool, answer(failing=set(URLS)))
+
+class ProbedWeb3:
+    """AsyncWeb3 stand-in for health probes: block_number answers or raises."""
+
+    def __init__(self, healthy):
+        self.healthy = healthy
+        self.eth = self
+
+    @property
+    def block_number(self):
+        async def block_number():
+            if not self.healthy:
+                raise ConnectionError("still down")
+            return 1
+        return block_number()
+
+def test_only_a_probe_readmits_an_ejected_endpoint(clock):
+    pool = ProviderPool(URLS[:2])
+    flaky = pool.endpoints[0]
+    for _ in range(EJECT_AFTER_FAILURES):
+        flaky.record_failure()
+    assert not flaky.available and pool.ranked() == [pool.endpoints[1]]
+    assert not flaky.probe_due
+    clock.now += EJECT_BASE_SECONDS
+    flaky.record_success(0.01)  # E.g. a fallback call: does not readmit it
+    assert not flaky.available and flaky.probe_due
+    flaky.w3 = ProbedWeb3(healthy=False)
+    assert not asyncio.run(pool.probe(flaky))  # Re-ejected for twice as long
+    assert not flaky.available and flaky.ejected_until == clock.now + 2 * EJECT_BASE_SECONDS
+    clock.now += 2 * EJECT_BASE_SECONDS
+    flaky.w3 = ProbedWeb3(healthy=True)
+    assert asyncio.run(pool.probe(flaky))
+    assert flaky.available and flaky.ejections == 0 and len(pool.ranked()) == 2
+
+def test_all_endpoints_ejected_falls_back_to_all(clock):
+    pool = ProviderPool(URLS[:2])
+    for endpoint in pool.endpoints:
+        for _ in range(EJECT_AFTER_FAILURES):
+            endpoint.record_failure()
+    assert len(pool.ranked()) == 2
+
+def test_request_errors_are_raised_without_penalty(clock):
+    pool = ProviderPool(URLS, is_request_error=lambda error: "block range" in str(error))
+    with pytest.raises(ValueError):
+        run(pool, answer(request_error="block range too large"))
+    assert all(endpoint.consecutive_failures == 0 for endpoint in pool.endpoints)
+    assert pool.endpoints[0].calls == 1 and pool.endpoints[1].calls == 0
+
+def test_raced_calls_take_the_first_success(clock):
+    pool = ProviderPool(URLS)
+    assert run(pool, answer(failing={URLS[0]}), race=True) == URLS[1]
+    assert run(pool, answer(failing=set(URLS[:2])), race=True) == URLS[2]
+
+def test_a_failed_race_keeps_its_cause(clock):
+    pool = ProviderPool(URLS[:2])
+    with pytest.raises(NoHealthyEndpointError, match="Too Many Requests"):
+        run(pool, answer(request_error="429 Client Error: Too Many Requests"), race=True)
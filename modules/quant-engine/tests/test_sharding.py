@@ -0,0 +1,51 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import database
+import sharding
+from database import load_state
+from sharding import ShardSupervisor, split_shards
+
+def test_split_shards_round_robin():
+    assert split_shards("abcde", 2) == [["a", "c", "e"], ["b", "d"]]
+    assert split_shards("ab", 5) == [["a"], ["b"]]
+
+class Records(list):
+    put = list.append
+
+def test_worker_state_goes_to_the_writer_and_is_read_back_at_once(db_file, conn, monkeypatch):
+    module, records = SimpleNamespace(read_state=lambda agent, key, default=None: default), Records()
+    sharding._route_state("offchain-0", records, module)
+    module.write_state("offchain", "repo:a/b", {"last_sha": "f00"})
+    assert module.read_state("offchain", "repo:a/b") == {"last_sha": "f00"}
+    assert module.read_state("offchain", "repo:c/d", {}) == {}
+    assert records == [("state", "offchain-0", "offchain", "repo:a/b", {"last_sha": "f00"})]
+
+    monkeypatch.setattr(database, "DB_FILE", db_file)
+    supervisor = ShardSupervisor()
+    for record in records:
+        supervisor.records.put(record)
+    supervisor._stop.set()  # The writer returns once the queue is drained
+    writer = threading.Thread(target=supervisor._write_records)  # With a connection of its own
+    writer.start()
+    writer.join()
+    assert load_state(conn, "offchain", "repo:a/b") == {"last_sha": "f00"}
+
+def obedient(name, items, records, stop_event):
+    stop_event.wait(30)
+
+def stubborn(name, items, records, stop_event):
+    time.sleep(30)
+
+def test_stop_asks_workers_first_and_terminates_only_stragglers():
+    supervisor = ShardSupervisor()
+    supervisor.add_shards("obedient", obedient, ["a"], 1)
+    supervisor.add_shards("stubborn", stubborn, ["b"], 1)
+    supervisor.start()
+    started = time.monotonic()
+    supervisor.stop(timeout=3)
+    assert time.monotonic() - started < 10
+    obedient_shard, stubborn_shard = supervisor.shards
+    assert obedient_shard.process.exitcode == 0
+    assert stubborn_shard.process.exitcode < 0  # Terminated by a signal
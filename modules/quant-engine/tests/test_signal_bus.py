@@ -0,0 +1,53 @@
+from signal_bus import Signal, SignalBus
+
+def signal(index=0, **metadata):
+    return Signal("On-Chain Agent", "x", {"index": index, **metadata}, "HIGH")
+
+def test_every_listener_and_subscription_gets_every_signal():
+    bus = SignalBus()
+    first, second = [], []
+    bus.add_listener(first.append)
+    bus.add_listener(second.append)
+    subscriptions = [bus.subscribe("a"), bus.subscribe("b")]
+    published = [signal(index) for index in range(3)]
+    for item in published:
+        bus.publish(item)
+    assert first == second == published
+    for subscription in subscriptions:
+        assert [subscription.get(timeout=0) for _ in range(3)] == published
+        assert subscription.get(timeout=0) is None
+    assert bus.published == 3
+
+def test_unsubscribed_consumers_get_nothing_more():
+    bus = SignalBus()
+    kept, dropped = bus.subscribe("kept"), bus.subscribe("dropped")
+    bus.publish(signal(0))
+    bus.unsubscribe(dropped)
+    bus.unsubscribe(dropped)  # Unknown subscriptions are ignored
+    bus.publish(signal(1))
+    assert dropped.get(timeout=0).metadata["index"] == 0 and dropped.get(timeout=0) is None
+    assert [kept.get(timeout=0).metadata["index"] for _ in range(2)] == [0, 1]
+
+def test_a_full_subscription_drops_instead_of_blocking():
+    bus = SignalBus()
+    slow = bus.subscribe("slow", maxsize=2)
+    for index in range(5):
+        bus.publish(signal(index))
+    assert slow.dropped == 3
+    assert [slow.get(timeout=0).metadata["index"] for _ in range(2)] == [0, 1]
+
+def test_a_failing_listener_does_not_stop_delivery():
+    bus = SignalBus()
+    received = []
+    def broken(item):
+        raise RuntimeError("listener bug")
+    bus.add_listener(broken)
+    bus.add_listener(received.append)
+    subscription = bus.subscribe("after")
+    bus.publish(signal(0))
+    assert len(received) == 1 and subscription.get(timeout=0) is not None
+
+def test_dedupe_key_mirrors_the_generated_column():
+    assert signal(tx_hash="0xab", log_index=3).dedupe_key == "0xab:3"
+    assert signal(tx_hash="0xab", to="0xc").dedupe_key is None  # Written before log_index was recorded
+    assert Signal("Off-Chain Agent", "x", {"commit_sha": "f00"}, "HIGH").dedupe_key == "f00"
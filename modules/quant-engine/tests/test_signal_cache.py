@@ -0,0 +1,76 @@
+import json
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pandas")
+from signal_cache import SignalFrameCache, counts_of, page_of, summary_of
+from signal_queries import TIMESTAMP_FORMAT, SignalFilter, fetch_page, open_readonly
+
+def hours_ago(hours):
+    return (datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours)).strftime(TIMESTAMP_FORMAT)
+
+def add_signal(conn, hours, token="USDC", level="HIGH", signal_type="Whale Transfer", **metadata):
+    metadata = {"token": token, "amount": "1,234.5", **metadata}
+    cursor = conn.execute(
+        "INSERT INTO alpha_signals (timestamp, source, signal_type, metadata, confidence_level) VALUES (?, ?, ?, ?, ?)",
+        (hours_ago(hours), "On-Chain Agent", signal_type, json.dumps(metadata), level),
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+def test_refresh_only_reads_new_rows(db_file, conn):
+    for hours in range(10):
+        add_signal(conn, hours)
+    cache = SignalFrameCache(db_file)
+    assert cache.refresh() == 10
+    assert cache.refresh() == 0
+    add_signal(conn, 0, token="ARB", level="CRITICAL")
+    assert cache.refresh() == 1 and cache.rows_fetched == 11
+    assert cache.df['amount'].tolist() == [1234.5] * 11
+    assert cache.df['token'].dtype == "category" and set(cache.df['token']) == {"USDC", "ARB"}
+
+def test_expired_rows_are_evicted_and_never_loaded(db_file, conn):
+    add_signal(conn, 24 * 10)  # Older than the retention window
+    for hours in (1, 30, 60):
+        add_signal(conn, hours)
+    cache = SignalFrameCache(db_file, retention_days=3)
+    assert cache.refresh() == 3
+    cache.retention = timedelta(days=2)
+    assert cache.refresh() == 0 and len(cache.df) == 2
+    assert not cache.covers(SignalFilter(start=datetime(2000, 1, 1)))
+
+def test_in_memory_aggregates_match_the_sql_ones(db_file, conn):
+    for hours in range(12):
+        add_signal(conn, hours // 3, token="ARB" if hours % 2 else "USDC", level="CRITICAL" if hours % 5 == 0 else "HIGH")
+    cache = SignalFrameCache(db_file)
+    cache.refresh()
+    df = cache.select(SignalFilter(tokens=("ARB",)))
+    assert summary_of(df) == {"total": 6, "critical": 1, "fresh_wallets": 0}
+    assert counts_of(cache.df, "token") == {"USDC": 6, "ARB": 6}
+    ids, cursor = [], None
+    while True:
+        page, cursor = page_of(cache.df, cursor, page_size=5)
+        ids.extend(page['id'].tolist())
+        if cursor is None:
+            break
+    with closing(open_readonly(db_file)) as readonly:
+        assert ids == fetch_page(readonly, page_size=100)[0]['id'].tolist()
+
+def test_reorgs_and_finality_reach_the_cache(db_file, conn):
+    kept = add_signal(conn, 1, block_number=10, finality="provisional")
+    orphaned = add_signal(conn, 1, block_number=20, finality="provisional")
+    cache = SignalFrameCache(db_file)
+    cache.refresh()
+    conn.execute("DELETE FROM alpha_signals WHERE id = ?", (orphaned,))
+    conn.execute("UPDATE alpha_signals SET metadata = json_set(metadata, '$.finality', 'final') WHERE id = ?", (kept,))
+    conn.commit()
+    cache.refresh()
+    assert cache.df[['id', 'finality']].values.tolist() == [[kept, "final"]]
+    # A reorg signal drops the rolled back rows still cached, without waiting for the recheck.
+    rolled_back = add_signal(conn, 1, block_number=30)
+    cache.refresh()
+    add_signal(conn, 0, token=None, signal_type="Chain Reorganization", level="MEDIUM", tokens=["USDC"], fork_block=25)
+    cache.refresh()
+    assert rolled_back not in cache.df['id'].tolist() and kept in cache.df['id'].tolist()
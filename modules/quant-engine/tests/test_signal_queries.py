@@ -0,0 +1,70 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("pandas")
+import signal_queries
+from signal_queries import SignalFilter
+
+def add_signals(conn, rows):
+    """rows: (timestamp, signal_type, confidence_level, token) tuples; ids follow the list order."""
+    conn.executemany(
+        "INSERT INTO alpha_signals (timestamp, source, signal_type, metadata, confidence_level) VALUES (?, ?, ?, ?, ?)",
+        [(timestamp, "On-Chain Agent", signal_type, json.dumps({"token": token, "tx_hash": f"0x{index}"}), level)
+         for index, (timestamp, signal_type, level, token) in enumerate(rows)],
+    )
+    conn.commit()
+
+@pytest.fixture
+def signals(conn):
+    rows = [(f"2024-01-0{1 + index % 3} 12:00:00", "Whale Transfer" if index % 2 else "Fresh Wallet Accumulation",
+             "CRITICAL" if index % 5 == 0 else "HIGH", "USDC" if index % 4 else "ARB") for index in range(30)]
+    add_signals(conn, rows)
+    return conn
+
+def all_pages(conn, signal_filter=None, page_size=7):
+    ids, cursor = [], None
+    while True:
+        df, cursor = signal_queries.fetch_page(conn, signal_filter, cursor=cursor, page_size=page_size)
+        ids.extend(df['id'].tolist())
+        if cursor is None:
+            return ids
+
+def newest_first(conn, where="", params=()):
+    return [row_id for (row_id,) in conn.execute(
+        f"SELECT id FROM alpha_signals{where} ORDER BY timestamp DESC, id DESC", params)]
+
+def test_keyset_pages_walk_the_whole_log_across_timestamp_ties(signals):
+    # Ten rows share each timestamp, so pages end in the middle of a tie.
+    assert all_pages(signals) == newest_first(signals)
+
+def test_pages_parse_only_their_own_metadata(signals):
+    df, cursor = signal_queries.fetch_page(signals, page_size=5)
+    assert len(df) == 5 and cursor == ("2024-01-03 12:00:00", int(df['id'].iloc[-1]))
+    assert "metadata" not in df.columns and set(df['tx_hash']) <= {f"0x{index}" for index in range(30)}
+
+def test_filters_apply_to_pages_and_aggregates(signals):
+    signal_filter = SignalFilter.for_dates(date(2024, 1, 2), date(2024, 1, 3), tokens=("USDC",))
+    where = " WHERE timestamp >= '2024-01-02' AND token = 'USDC'"
+    assert all_pages(signals, signal_filter, page_size=3) == newest_first(signals, where)
+    counts = signal_queries.count_by(signals, "signal_type", signal_filter)
+    assert sum(counts.values()) == len(newest_first(signals, where))
+    critical = signals.execute(f"SELECT COUNT(*) FROM alpha_signals{where} AND confidence_level = 'CRITICAL'").fetchone()[0]
+    assert signal_queries.summary(signals, signal_filter)["critical"] == critical
+
+def test_an_empty_selection_matches_nothing(signals):
+    assert signal_queries.summary(signals, SignalFilter(signal_types=()))["total"] == 0
+
+def test_count_by_leaves_out_nulls_and_unknown_columns(signals):
+    add_signals(signals, [("2024-01-04 00:00:00", "Code Commit", "LOW", None)])
+    assert signal_queries.count_by(signals, "token") == {"USDC": 22, "ARB": 8}
+    with pytest.raises(ValueError):
+        signal_queries.count_by(signals, "metadata")
+
+def test_summary_and_latest_signal(signals):
+    assert signal_queries.summary(signals) == {"total": 30, "critical": 6, "fresh_wallets": 15}
+    latest = signal_queries.latest_signal(signals)
+    assert latest["id"] == newest_first(signals, " WHERE confidence_level = 'CRITICAL'")[0]
+    assert latest["timestamp"] == datetime(2024, 1, 3, 12)
+    assert signal_queries.latest_signal(signals, SignalFilter(confidence_levels=("HIGH",))) is None
@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from signal_sink import SignalSink, SinkStoppedError
+
+def row(index, tx_hash=None):
+    metadata = {"tx_hash": tx_hash or f"0x{index}", "log_index": 0}
+    return ("2024-01-01 00:00:00", "On-Chain Agent", "x", json.dumps(metadata), "HIGH")
+
+def test_flush_writes_every_row_in_submission_order(db_file, conn):
+    sink = SignalSink(db_file, batch_size=100, flush_interval=0.05)
+    sink.start()
+    for index in range(450):
+        sink.submit(row(index))
+    sink.flush(timeout=10)
+    tx_hashes = [value for (value,) in conn.execute("SELECT tx_hash FROM alpha_signals ORDER BY id")]
+    assert tx_hashes == [f"0x{index}" for index in range(450)]
+    assert sink.rows_written == 450 and sink.batches_written >= 5
+    sink.close()
+
+def test_duplicates_are_ignored(db_file, conn):
+    sink = SignalSink(db_file, flush_interval=0.05)
+    sink.start()
+    for _ in range(3):
+        sink.submit(row(0, tx_hash="0xdup"))
+    sink.flush(timeout=10)
+    assert conn.execute("SELECT COUNT(*) FROM alpha_signals").fetchone()[0] == 1
+    sink.close()
+
+def test_unwritable_batch_is_dropped_and_flush_returns(tmp_path):
+    sink = SignalSink(os.path.join(str(tmp_path), "missing", "signals.db"), flush_interval=0.05)
+    sink.start()
+    sink.submit(row(0))
+    sink.flush(timeout=10)
+    assert sink.rows_dropped == 1
+    assert sink._thread.is_alive()
+    sink.close()
+
+def test_flush_without_a_writer_raises(db_file):
+    sink = SignalSink(db_file)
+    sink.submit(row(0))
+    with pytest.raises(SinkStoppedError):
+        sink.flush(timeout=1)
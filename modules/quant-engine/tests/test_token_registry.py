@@ -0,0 +1,17 @@
+from correlator import REPO_TOKENS
+from token_registry import DEFAULT_TOKENS, monitored_tokens
+
+WETH = "0x" + "aa" * 20
+OTHER_WETH = "0x" + "cc" * 20
+UNKNOWN = "0x" + "ee" * 20
+
+def test_every_repositorys_tokens_are_monitored_by_default():
+    for repo, tokens in REPO_TOKENS.items():
+        assert set(tokens) <= set(DEFAULT_TOKENS), repo
+
+def test_extra_tokens_count_once_their_symbol_is_cached():
+    cached = {WETH.lower(): {"symbol": "WETH"}, OTHER_WETH.lower(): {"symbol": "WETH"}}
+    usdc = DEFAULT_TOKENS["USDC"]["address"]
+    names = monitored_tokens(cached.get, extra_addresses=[usdc, WETH, OTHER_WETH, UNKNOWN])
+    # USDC is already a default token; the second WETH is suffixed, as the on-chain agent names it.
+    assert names == set(DEFAULT_TOKENS) | {"WETH", "WETH-cccccc"}
@@ -0,0 +1,82 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+import wallet_classifier
+from wallet_classifier import FRESH_CACHE_TTL, RPC_BATCH_SIZE, FreshWalletClassifier, LRUCache
+from fake_rpc import FakeChain, serve
+
+FRESH_TX_COUNT = 5
+
+class SingleCallWeb3:
+    """The per-address fallback: w3.eth.get_transaction_count, counted."""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.calls = 0
+        self.provider = SimpleNamespace(endpoint_uri=None)
+        self.eth = SimpleNamespace(get_transaction_count=self.get_transaction_count)
+
+    def get_transaction_count(self, address):
+        self.calls += 1
+        return self.chain.nonce(address)
+
+@pytest.fixture
+def chain():
+    chain = FakeChain()
+    server, chain.url = serve(chain)
+    yield chain
+    server.shutdown()
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 0)
+
+def test_lru_cache_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(wallet_classifier.time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.put("a", 1)
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None and len(cache) == 0
+
+def test_receivers_are_resolved_in_batches_and_cached(chain):
+    w3 = SingleCallWeb3(chain)
+    classifier = FreshWalletClassifier(w3, FRESH_TX_COUNT, rpc_url=chain.url)
+    receivers = chain.wallets[:250]
+    classifier.prefetch(receivers + receivers[:10])  # Repeats are looked up once
+    assert classifier.rpc_batches == -(-250 // RPC_BATCH_SIZE) and classifier.rpc_lookups == 250
+    requests_made = chain.requests
+    results = [classifier.is_fresh(address) for address in receivers]
+    assert results == [(chain.nonce(a), chain.nonce(a) < FRESH_TX_COUNT) for a in receivers]
+    assert chain.requests == requests_made and w3.calls == 0
+    assert classifier.unknown(receivers) == []
+
+def test_only_fresh_wallets_are_looked_up_again(chain, monkeypatch):
+    classifier = FreshWalletClassifier(SingleCallWeb3(chain), FRESH_TX_COUNT, rpc_url=chain.url)
+    receivers = chain.wallets[:200]
+    classifier.prefetch(receivers)
+    fresh = [address for address in receivers if chain.nonce(address) < FRESH_TX_COUNT]
+    assert fresh and len(fresh) < len(receivers)
+    later = time.monotonic() + FRESH_CACHE_TTL + 1
+    monkeypatch.setattr(wallet_classifier.time, "monotonic", lambda: later)
+    # A fresh wallet's nonce can grow; a non-fresh one can never become fresh again.
+    assert classifier.unknown(receivers) == fresh
+
+def test_failed_batches_fall_back_to_single_calls(chain):
+    w3 = SingleCallWeb3(chain)
+    # Nothing listens on the discard port, so the batch request fails.
+    classifier = FreshWalletClassifier(w3, FRESH_TX_COUNT, rpc_url="http://127.0.0.1:9")
+    classifier.prefetch(chain.wallets[:3])
+    assert w3.calls == 3
+    assert classifier.is_fresh(chain.wallets[0]) == (chain.nonce(chain.wallets[0]),
+                                                      chain.nonce(chain.wallets[0]) < FRESH_TX_COUNT)
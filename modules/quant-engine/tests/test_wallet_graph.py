@@ -0,0 +1,35 @@
+from wallet_graph import WalletGraph
+
+def graph_of(*transfers, ts=1000):
+    graph = WalletGraph(retention_seconds=100)
+    for sender, receiver in transfers:
+        graph.add_transfer(sender, receiver, ts)
+    return graph
+
+def test_transfers_join_wallets_into_clusters():
+    graph = graph_of(("a", "b"), ("b", "c"), ("d", "e"), ("c", "a"))
+    assert graph.cluster_id("a") == graph.cluster_id("c") != graph.cluster_id("d")
+    assert graph.cluster_size("b") == 3 and graph.cluster_size("unknown") == 0
+    assert [sorted(cluster) for cluster in graph.clusters()] == [["a", "b", "c"], ["d", "e"]]
+    assert graph.clusters(min_size=3) == [graph.clusters()[0]]
+
+def test_addresses_are_case_insensitive_and_edges_stored_once():
+    graph = graph_of(("0xAB", "0xcd"), ("0xab", "0xCD"), ("0xab", "0xab"), ("", "0xcd"))
+    assert len(graph) == 2 and graph.edge_count == 1
+    assert graph.funding_wallets(["0xCd"]) == {"0xab": 1}
+
+def test_k_hop_follows_the_requested_direction():
+    graph = graph_of(("funder", "mixer"), ("mixer", "fresh"), ("fresh", "exchange"), ("other", "mixer"))
+    assert graph.funding_wallets(["fresh"]) == {"mixer": 1, "funder": 2, "other": 2}
+    assert graph.funding_wallets(["fresh"], k=1) == {"mixer": 1}
+    assert graph.k_hop(["funder"], 3, direction="out") == {"mixer": 1, "fresh": 2, "exchange": 3}
+    assert graph.k_hop(["fresh"], 1, direction="both") == {"mixer": 1, "exchange": 1}
+    assert len(graph.funding_wallets(["fresh"], limit=2)) == 2
+    assert graph.k_hop(["unknown"], 2) == {}
+
+def test_prune_drops_old_edges_and_splits_their_clusters():
+    graph = graph_of(("a", "b"), ("b", "c"))
+    graph.add_transfer("a", "b", 1100)  # Seen again: the edge stays
+    assert graph.prune(now=1150) == 1
+    assert graph.edge_count == 1 and graph.cluster_size("a") == 2 and graph.cluster_size("c") == 0
+    assert graph.prune(now=1150) == 0
@@ -0,0 +1,61 @@
+"""
+ARKHEION-X: Token Registry v1.0 (Module Edition)
+
+The ERC20 tokens the on-chain agent monitors, and the agent_state namespaces
+it keeps per token. Kept apart from engine.py so that agents which only need
+the tokens' names (the correlator) never import web3.
+
+The tokens given by contract address (TARGET_TOKEN_ADDRESSES) are named after
+their on-chain symbol, which the on-chain agent reads once and caches under
+TOKEN_METADATA_AGENT; monitored_tokens() names them the same way.
+"""
+from settings import settings
+
+# --- Configuration ---
+# The ERC20 tokens monitored by default, on Arbitrum One.
+# "price" is the token's on-chain USD price source (see price_oracle.py); tokens without one
+# are valued at 0 and judged on their amounts alone. Decimals and symbols are read from the
+# token contracts at startup (see engine.load_token_metadata).
+DEFAULT_TOKENS = {
+    "USDC": {"address": "0xaf88d065e77c8cC2239327C5EDb3A432268e5831",
+             "price": {"type": "fixed", "price": 1.0}},
+    "ARB": {"address": "0x912CE59144191C1204E64559FE8253a0e49E6548",
+            "price": {"type": "chainlink", "feed": "0xb2A824043730FE05F3DA2efaFa1CBbe83fa548D6", "decimals": 8}},
+    # The governance tokens of the repositories the off-chain agent watches (correlator.REPO_TOKENS).
+    "UNI": {"address": "0xFa7F8980b0f1E64A2062791cc3b0871572f1F7f0",
+            "price": {"type": "chainlink", "feed": "0x9C917083fDb403ab5ADbEC26Ee294f6EcAda2720", "decimals": 8}},
+    "AAVE": {"address": "0xba5DdD1f9d7F570dc94a51479a000E3BCE967196",
+             "price": {"type": "chainlink", "feed": "0xaD1d5344AaDE45F43E596773Bcc4c423EAbdD034", "decimals": 8}},
+    "LINK": {"address": "0xf97f4df75117a78c1A5a0DBb814Af92458539FB4",
+             "price": {"type": "chainlink", "feed": "0x86E53CF1B870786351Da77A57575e79CB55812CB", "decimals": 8}},
+    "LDO": {"address": "0x13Ad51ed4F1B7e9Dc168d8a00cB3f4dDD85EfA60"},
+    "wstETH": {"address": "0x5979D7b546E38E414F7E9822514be443A4800529"},
+}
+
+# More tokens to monitor by contract address alone, comma separated. They are named
+# after their on-chain symbol; without a "price" source their transfers are valued at 0.
+EXTRA_TOKEN_ADDRESSES = list(settings.target_token_addresses)
+
+CHECKPOINT_AGENT = "onchain" # agent_state namespace for per-token scan checkpoints
+TOKEN_METADATA_AGENT = "tokens" # agent_state namespace for discovered token decimals/symbols
+
+def token_name(symbol, address, taken):
+    """The name a token given by address is monitored under: its symbol, suffixed if `taken` has it."""
+    return symbol if symbol not in taken else f"{symbol}-{address[2:8]}"
+
+def monitored_tokens(read_metadata, tokens=DEFAULT_TOKENS, extra_addresses=None):
+    """
+    The names of the tokens the on-chain agent monitors: `tokens`, plus every extra address
+    whose symbol it has cached (read_metadata(lowercased address) -> {"symbol": ...} or None).
+    """
+    extra_addresses = EXTRA_TOKEN_ADDRESSES if extra_addresses is None else extra_addresses
+    names = set(tokens)
+    known_addresses = {config['address'].lower() for config in tokens.values()}
+    for address in extra_addresses:
+        if address.lower() in known_addresses:
+            continue
+        known_addresses.add(address.lower())
+        cached = read_metadata(address.lower())
+        if cached is not None:
+            names.add(token_name(cached['symbol'], address, names))
+    return names
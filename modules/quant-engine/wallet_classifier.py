@@ -0,0 +1,164 @@
+"""
+ARKHEION-X: Fresh-Wallet Classifier v1.0 (Module Edition)
+
+Decides whether a receiver is a "fresh" wallet (few outgoing transactions)
+without one RPC round-trip per transfer. Callers first hand over every
+receiver found in a scanned block range; the unknown ones are resolved with a
+single batched JSON-RPC request, and the answers are cached:
+
+- Fresh wallets go in a bounded LRU cache with a TTL, because their nonce
+  will grow and they may stop being fresh.
+- Non-fresh wallets can never become fresh again (a nonce only increases),
+  so they go in a separate bounded LRU without expiry and are never queried again.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import requests
+
+import metrics
+
+# --- Configuration ---
+FRESH_CACHE_SIZE = 50000      # Max fresh-wallet nonces kept
+FRESH_CACHE_TTL = 300         # Seconds before a fresh wallet's nonce is re-checked
+NON_FRESH_CACHE_SIZE = 500000 # Max addresses remembered as non-fresh
+RPC_BATCH_SIZE = 100          # Max calls packed into one JSON-RPC batch request
+RPC_TIMEOUT = 15
+
+class LRUCache:
+    """A thread-safe LRU mapping with an optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]  # Expired
+            if count:
+                self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+class FreshWalletClassifier:
+    """Resolves and caches receiver nonces, batching RPC lookups per scanned block range."""
+
+    def __init__(self, w3, fresh_tx_count, rpc_url=None):
+        self.w3 = w3
+        self.fresh_tx_count = fresh_tx_count
+        self.rpc_url = rpc_url or getattr(w3.provider, 'endpoint_uri', None)
+        self.fresh = LRUCache(FRESH_CACHE_SIZE, ttl=FRESH_CACHE_TTL)
+        self.non_fresh = LRUCache(NON_FRESH_CACHE_SIZE)
+        self.rpc_batches = 0
+        self.rpc_lookups = 0
+        self._session = requests.Session()
+
+    def unknown(self, addresses):
+        """Returns the distinct addresses that are not cached yet, in first-seen order."""
+        return [address for address in dict.fromkeys(addresses)
+                if address not in self.non_fresh and address not in self.fresh]
+
+    def prefetch(self, addresses):
+        """Resolves every address not already cached, using batched JSON-RPC requests."""
+        unknown = self.unknown(addresses)
+        for start in range(0, len(unknown), RPC_BATCH_SIZE):
+            self.store(self._fetch_nonces(unknown[start:start + RPC_BATCH_SIZE]))
+
+    def get_nonce(self, address):
+        """Returns the receiver's transaction count, or None if it could not be fetched."""
+        nonce = self.non_fresh.get(address)
+        if nonce is None:
+            nonce = self.fresh.get(address)
+        if nonce is None:
+            nonce = self._fetch_nonces([address]).get(address)
+            if nonce is not None:
+                self.store({address: nonce})
+        return nonce
+
+    def is_fresh(self, address):
+        """Returns (tx_count, is_fresh). tx_count is 'unknown' when the lookup failed."""
+        nonce = self.get_nonce(address)
+        if nonce is None:
+            return 'unknown', False
+        return nonce, nonce < self.fresh_tx_count
+
+    def stats(self):
+        hits = self.fresh.hits + self.non_fresh.hits
+        lookups = hits + self.rpc_lookups
+        return {
+            "hits": hits,
+            "misses": self.rpc_lookups,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "rpc_batches": self.rpc_batches,
+            "fresh_cached": len(self.fresh),
+            "non_fresh_cached": len(self.non_fresh),
+        }
+
+    def store(self, nonces):
+        """Caches address -> nonce results, e.g. ones fetched by the asyncio agent."""
+        for address, nonce in nonces.items():
+            if nonce >= self.fresh_tx_count:
+                self.non_fresh.put(address, nonce)
+            else:
+                self.fresh.put(address, nonce)
+
+    # --- Internals ---
+    def _fetch_nonces(self, addresses):
+        """Fetches nonces with one JSON-RPC batch; falls back to single calls if batching fails."""
+        if not addresses:
+            return {}
+        self.rpc_batches += 1
+        self.rpc_lookups += len(addresses)
+        if self.rpc_url and self.rpc_url.startswith("http"):
+            payload = [
+                {"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionCount", "params": [address, "latest"]}
+                for i, address in enumerate(addresses)
+            ]
+            try:
+                with metrics.rpc_latency.time(call="nonce_batch", endpoint=self.rpc_url):
+                    response = self._session.post(self.rpc_url, json=payload, timeout=RPC_TIMEOUT)
+                response.raise_for_status()
+                results = response.json()
+                if isinstance(results, list):
+                    return {
+                        addresses[item['id']]: int(item['result'], 16)
+                        for item in results if 'result' in item and item.get('id') is not None
+                    }
+                logging.warning("FRESH-WALLET CLASSIFIER: Provider does not support batch requests; falling back to single calls.")
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                logging.warning(f"FRESH-WALLET CLASSIFIER: Batch nonce lookup failed ({e}); falling back to single calls.")
+
+        nonces = {}
+        for address in addresses:
+            try:
+                with metrics.rpc_latency.time(call="eth_getTransactionCount", endpoint=metrics.endpoint_of(self.w3)):
+                    nonces[address] = self.w3.eth.get_transaction_count(address)
+            except Exception:
+                pass  # Reported as 'unknown' by the caller
+        return nonces
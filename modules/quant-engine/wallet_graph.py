@@ -0,0 +1,152 @@
+"""
+ARKHEION-X: Wallet Graph v1.0 (Module Edition)
+
+An in-memory index of who sent large transfers to whom, built from the
+`from`/`to` of every on-chain signal. The correlator uses it to find the
+wallets that funded a fresh wallet, and to group wallets into clusters that
+are probably controlled by the same entity.
+
+Storage is compact: addresses are interned to integer ids, every node keeps
+its out- and in-neighbours in `array('I')` adjacency lists, and each distinct
+edge (one per sender/receiver pair) is stored once with its last-seen time.
+Connected components are kept up to date with a union-find as edges arrive.
+Edges older than the retention window are dropped by `prune()`, which rebuilds
+the arrays (and the union-find) in one pass.
+"""
+import time
+from array import array
+from collections import deque
+
+# --- Configuration ---
+GRAPH_RETENTION_DAYS = 7   # Funding usually happens shortly before accumulation
+MAX_HOP_RESULTS = 1000     # Addresses a k-hop query returns at most
+
+class WalletGraph:
+    """Directed sender -> receiver graph with k-hop queries and connected components."""
+
+    def __init__(self, retention_seconds=GRAPH_RETENTION_DAYS * 86400):
+        self.retention_seconds = retention_seconds
+        self._clear()
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @property
+    def edge_count(self):
+        return len(self.edges)
+
+    def add_transfer(self, sender, receiver, ts):
+        """Records a sender -> receiver transfer seen at epoch seconds `ts`."""
+        if not sender or not receiver:
+            return
+        src, dst = self._intern(sender), self._intern(receiver)
+        if src == dst:
+            return
+        key = (src << 32) | dst
+        if key in self.edges:
+            self.edges[key] = max(self.edges[key], ts)
+            return
+        self.edges[key] = ts
+        self.out_edges[src].append(dst)
+        self.in_edges[dst].append(src)
+        self._union(src, dst)
+
+    def k_hop(self, addresses, k, direction="in", limit=MAX_HOP_RESULTS):
+        """
+        Addresses within `k` hops of any of `addresses` (excluded), mapped to their hop
+        distance. direction "in" follows funding backwards, "out" follows it forwards.
+        """
+        adjacency = (self.in_edges,) if direction == "in" else (self.out_edges,) if direction == "out" \
+            else (self.in_edges, self.out_edges)
+        start = {self.ids[address.lower()] for address in addresses if address and address.lower() in self.ids}
+        seen = dict.fromkeys(start, 0)
+        frontier = deque(start)
+        found = {}
+        while frontier and len(found) < limit:
+            node = frontier.popleft()
+            hops = seen[node] + 1
+            if hops > k:
+                continue
+            for lists in adjacency:
+                for neighbour in lists[node]:
+                    if neighbour in seen:
+                        continue
+                    seen[neighbour] = hops
+                    found[self.addresses[neighbour]] = hops
+                    frontier.append(neighbour)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def funding_wallets(self, addresses, k=2, limit=MAX_HOP_RESULTS):
+        """Wallets that sent to `addresses`, directly or through up to k - 1 intermediaries."""
+        return self.k_hop(addresses, k, direction="in", limit=limit)
+
+    def cluster_id(self, address):
+        """Id of the connected component holding `address` (None if it never transacted)."""
+        node = self.ids.get(address.lower()) if address else None
+        return self._find(node) if node is not None else None
+
+    def cluster_size(self, address):
+        root = self.cluster_id(address)
+        return self.sizes[root] if root is not None else 0
+
+    def clusters(self, min_size=2):
+        """Every connected component of at least `min_size` wallets, largest first."""
+        members = {}
+        for node in range(len(self.addresses)):
+            root = self._find(node)
+            if self.sizes[root] >= min_size:
+                members.setdefault(root, []).append(self.addresses[node])
+        return sorted(members.values(), key=len, reverse=True)
+
+    def prune(self, now=None):
+        """Drops edges last seen before the retention window and rebuilds the index. Returns edges dropped."""
+        cutoff = (now if now is not None else time.time()) - self.retention_seconds
+        kept = [(self.addresses[key >> 32], self.addresses[key & 0xFFFFFFFF], ts)
+                for key, ts in self.edges.items() if ts >= cutoff]
+        dropped = len(self.edges) - len(kept)
+        if dropped:
+            self._clear()
+            for sender, receiver, ts in kept:
+                self.add_transfer(sender, receiver, ts)
+        return dropped
+
+    # --- Internals ---
+    def _clear(self):
+        self.ids = {}             # lowercased address -> node id
+        self.addresses = []       # node id -> lowercased address
+        self.out_edges = []       # node id -> array('I') of receivers
+        self.in_edges = []        # node id -> array('I') of senders
+        self.edges = {}           # (src << 32) | dst -> last seen (epoch seconds)
+        self.parents = array('I')
+        self.sizes = array('I')
+
+    def _intern(self, address):
+        address = address.lower()
+        node = self.ids.get(address)
+        if node is None:
+            node = len(self.addresses)
+            self.ids[address] = node
+            self.addresses.append(address)
+            self.out_edges.append(array('I'))
+            self.in_edges.append(array('I'))
+            self.parents.append(node)
+            self.sizes.append(1)
+        return node
+
+    def _find(self, node):
+        parents = self.parents
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]  # Path halving
+            node = parents[node]
+        return node
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if self.sizes[a] < self.sizes[b]:
+            a, b = b, a
+        self.parents[b] = a
+        self.sizes[a] += self.sizes[b]
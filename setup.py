@@ -13,6 +13,13 @@ setup(
         'streamlit',
         'pandas',
         'plotly',
+        'numpy',
         'python-telegram-bot'
     ],
+    extras_require={
+        'dev': ['pytest', 'pytest-benchmark'],
+    },
+    entry_points={
+        'console_scripts': ['arkheionx=arkheionx.cli:main'],
+    },
 )
\ No newline at end of file